@@ -0,0 +1,151 @@
+# benchmarks/generar_sitrad.py
+"""
+Generador de libros .xlsx sintéticos con la forma de los exportes Sitrad,
+para cada configuración de CONFIGURACION_ARCHIVOS (SENSOR_1, SENSOR_2,
+PRESION y COMPRESORES).
+
+Uso:
+    python -m benchmarks.generar_sitrad CARPETA --filas 50000 --archivos 2
+    python -m benchmarks.generar_sitrad CARPETA --formato-fecha iso
+"""
+import os
+import random
+import argparse
+from datetime import datetime, timedelta
+from openpyxl import Workbook
+from src.config import CONFIGURACION_ARCHIVOS
+
+# Carpeta de RUTAS_PROCESO en la que cae cada tipo de archivo
+GRUPO_POR_TIPO = {
+    'SENSOR_1': 'PASILLOS',
+    'SENSOR_2': 'PASILLOS',
+    'PRESION': 'PRESION',
+    'COMPRESORES': 'COMPRESORES',
+}
+
+ESTADOS_PROCESO = ['Refrigeración', 'Refrigeración', 'Refrigeración', 'Deshielo', 'Goteo']
+ESTADOS_SALIDA = ['Encendido', 'Apagado']
+ESTADOS_COMPRESOR = ['Conectado', 'Conectado', 'Conectado', 'Desconectado']
+
+# Representación de la fecha en los libros: 'mixto' mezcla celdas datetime con
+# texto dd/mm/aaaa con y sin segundos (por defecto); el resto usa una sola, como
+# un exporte real: datetime de Excel o texto en uno de los FORMATOS_FECHA de
+# src/transform.py.
+FORMATOS_FECHA_LIBRO = {
+    'mixto': None,
+    'datetime': None,
+    'dmy': '%d/%m/%Y %H:%M',
+    'dmy_seg': '%d/%m/%Y %H:%M:%S',
+    'iso': '%Y-%m-%d %H:%M:%S',
+}
+FORMATO_FECHA_LIBRO_DEFECTO = 'mixto'
+
+def _valor_numerico(rnd, base, dispersion, prob_vacio):
+    """Número como float, como texto con coma decimal o vacío (None / '')."""
+    sorteo = rnd.random()
+    if sorteo < prob_vacio:
+        return rnd.choice([None, ''])
+    valor = round(base + rnd.uniform(-dispersion, dispersion), 1)
+    if sorteo < 0.35:
+        return f"{valor}".replace('.', ',')
+    return valor
+
+def _valor_fecha(rnd, momento, prob_texto, formato_fecha=FORMATO_FECHA_LIBRO_DEFECTO):
+    """
+    La fecha llega como datetime de Excel o como texto: en 'mixto', una u otra
+    al azar ('dd/mm/aaaa hh:mm[:ss]'); si no, siempre la de 'formato_fecha'.
+    """
+    if formato_fecha != 'mixto':
+        formato = FORMATOS_FECHA_LIBRO[formato_fecha]
+        return momento if formato is None else momento.strftime(formato)
+    if rnd.random() >= prob_texto:
+        return momento
+    return momento.strftime(rnd.choice(['%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S']))
+
+def _fila_datos(rnd, config, momento, prob_vacio, prob_texto, formato_fecha=FORMATO_FECHA_LIBRO_DEFECTO):
+    fila = []
+    for columna_origen, columna_destino in config['column_mapping'].items():
+        if columna_destino == 'FechaHora_Original':
+            fila.append(_valor_fecha(rnd, momento, prob_texto, formato_fecha))
+        elif columna_destino in config.get('numeric_fields', []):
+            if columna_destino == 'Presion_Gas':
+                fila.append(_valor_numerico(rnd, 2.8, 0.6, prob_vacio))
+            elif columna_destino == 'Setpoint':
+                fila.append(_valor_numerico(rnd, -18.0, 0.0, prob_vacio))
+            elif columna_destino == 'Desvio_Relativo':
+                fila.append(_valor_numerico(rnd, 0.0, 3.0, prob_vacio))
+            else:
+                fila.append(_valor_numerico(rnd, -18.0, 4.0, prob_vacio))
+        elif columna_destino == 'Proceso_Actual':
+            fila.append(rnd.choice(ESTADOS_PROCESO))
+        elif config['tipo'] == 'COMPRESORES':
+            fila.append(rnd.choice(ESTADOS_COMPRESOR))
+        else:
+            fila.append(rnd.choice(ESTADOS_SALIDA))
+    return fila
+
+def generar_libro(ruta, config, nombre_interno, filas, inicio=datetime(2026, 1, 1),
+                  paso_segundos=60, prob_vacio=0.03, prob_texto=0.3, semilla=0,
+                  formato_fecha=FORMATO_FECHA_LIBRO_DEFECTO):
+    """
+    Escribe un .xlsx con B1 = nombre interno, la cabecera de 'column_mapping'
+    en 'data_start_row' y 'filas' lecturas cada 'paso_segundos' (con algunos
+    segundos de desfase, como los exportes reales). 'formato_fecha' es una
+    clave de FORMATOS_FECHA_LIBRO.
+    """
+    rnd = random.Random(semilla)
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet()
+
+    fila_inicio = config.get('data_start_row', 1)
+    hoja.append(['Nombre', nombre_interno])
+    for _ in range(2, fila_inicio):
+        hoja.append([])
+    hoja.append(list(config['column_mapping'].keys()))
+
+    momento = inicio
+    for _ in range(filas):
+        momento += timedelta(seconds=paso_segundos + rnd.choice([0, 0, 0, 7, 13]))
+        hoja.append(_fila_datos(rnd, config, momento, prob_vacio, prob_texto, formato_fecha))
+
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    libro.save(ruta)
+    return ruta
+
+def generar_bandeja(carpeta_raiz, filas=10000, archivos=1, semilla=0,
+                    formato_fecha=FORMATO_FECHA_LIBRO_DEFECTO):
+    """
+    Crea carpeta_raiz/Import/<GRUPO>/*.xlsx con 'archivos' libros por cada
+    configuración (cada uno con un nombre interno distinto de su lista).
+
+    Returns:
+        dict: {grupo: [rutas]} de los libros generados.
+    """
+    generados = {}
+    for n_config, config in enumerate(CONFIGURACION_ARCHIVOS):
+        grupo = GRUPO_POR_TIPO.get(config['tipo'], config['tipo'])
+        for i in range(archivos):
+            nombre = config['nombres_internos'][i % len(config['nombres_internos'])]
+            ruta = os.path.join(carpeta_raiz, 'Import', grupo, f"{config['tipo'].lower()}_{i:03d}.xlsx")
+            generar_libro(ruta, config, nombre, filas,
+                          inicio=datetime(2026, 1, 1) + timedelta(days=i),
+                          semilla=semilla * 1000 + n_config * 100 + i, formato_fecha=formato_fecha)
+            generados.setdefault(grupo, []).append(ruta)
+    return generados
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera libros Sitrad sintéticos para pruebas de rendimiento.")
+    parser.add_argument("carpeta", help="Carpeta raíz (se crea Import/<GRUPO>/ dentro).")
+    parser.add_argument("--filas", type=int, default=10000, help="Filas de datos por libro.")
+    parser.add_argument("--archivos", type=int, default=1, help="Libros por configuración.")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--formato-fecha", choices=tuple(FORMATOS_FECHA_LIBRO), default=FORMATO_FECHA_LIBRO_DEFECTO,
+                        help="Representación de la fecha (por defecto mezcla datetime y texto).")
+    args = parser.parse_args(argv)
+
+    generados = generar_bandeja(args.carpeta, args.filas, args.archivos, args.semilla, args.formato_fecha)
+    for grupo, rutas in generados.items():
+        print(f"{grupo}: {len(rutas)} libros de {args.filas} filas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,520 @@
+# benchmarks/run_benchmarks.py
+"""
+Suite de rendimiento del ETL con libros Sitrad sintéticos (benchmarks/generar_sitrad.py).
+
+Mide por separado, para cada configuración de CONFIGURACION_ARCHIVOS:
+  - leer_openpyxl / leer_directo : leer_archivo_excel hasta agotar las filas
+  - transformar                  : transformar_en_lotes sobre filas ya leídas
+  - transformar_llave_minutos    : lo mismo con Llave_Comun en formato 'minutos'
+  - transformar_fecha_<formato>  : 'transformar' con la fecha de todas las filas
+    en una sola representación de FORMATOS_FECHA_LIBRO (datetime, dmy,
+    dmy_seg, iso): detección del formato del archivo y ruta rápida de cada una
+  - escribir_shard               : escribir_shard_lotes sobre lotes ya transformados
+  - escribir / escribir_gzip     : guardar_datos_transformados sobre filas ya transformadas
+  - escribir_llave_minutos       : 'escribir' con Llave_Comun en minutos; esta y
+    'escribir' guardan además los 'bytes' del CSV, para comparar el tamaño
+  - dim_tiempo                   : filas_dim_tiempo para los días del libro
+    (filas = intervalos de 10 minutos generados)
+  - ordenar_externo              : ordenar_filas con 1 MB de memoria (fuerza runs en disco)
+  - escribir_sqlite              : guardar_en_sqlite (carga completa) sobre las mismas filas
+  - consultar_csv / consultar_indice / consultar_sqlite : CONSULTAS_BENCH
+    consultas "un identificador, un día" recorriendo el CSV completo, con el
+    índice de tiempo (recortar_salida) y contra la tabla SQLite; las filas son
+    las devueltas, así filas/s compara la latencia de las tres
+  - kpi_actualizar / kpi_tabla   : actualizar_estado_kpi desde cero y armar la
+    tabla de KPI diarios desde ese estado (filas = lecturas resumidas); solo
+    en los esquemas con KPI (sensores y presión)
+y una corrida completa de run_etl.main sobre una bandeja nueva ('main'), que
+se repite con la E/S sincrónica (HILOS_IO = 0, 'main_io_sincronico') para ver
+cuánto aporta archivar y escribir en segundo plano. Con --carpeta-archivado
+los Excel se archivan en otra carpeta (p. ej. otro volumen: mover es copiar +
+borrar) y con --latencia-archivado-ms cada movimiento espera además esos
+milisegundos, como un share de red lento.
+
+Reporta filas/s (mejor de N repeticiones) y pico de memoria (tracemalloc, en
+una pasada aparte para no distorsionar el tiempo). Con --guardar-baseline los
+resultados quedan como referencia; en las corridas siguientes se comparan contra
+ella y el proceso termina con código 1 si alguna medición empeoró más que la
+tolerancia.
+
+Uso:
+    python -m benchmarks.run_benchmarks --filas 20000 --guardar-baseline
+    python -m benchmarks.run_benchmarks --filas 20000
+    python -m benchmarks.run_benchmarks --filas 20000 --formato-fecha iso
+
+benchmarks/baseline.json es la referencia medida con los parámetros por
+defecto (la máquina y la versión de Python quedan registradas en el JSON).
+En otra máquina conviene guardar la propia antes de comparar.
+"""
+import os
+import io
+import csv
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import contextlib
+from datetime import datetime
+from src.config import CONFIGURACION_ARCHIVOS
+from src.extract import leer_archivo_excel
+from src.config import obtener_columna_identificador
+from src.transform import (limpiar_y_estandarizar, normalizar_momento, transformar_en_lotes,
+                           _CACHE_DIAS_TEXTO, _CACHE_DIAS_DATETIME)
+from src.shards import escribir_shard_lotes
+from src.load import guardar_datos_transformados
+from src.orden import ordenar_filas
+from src.carga_sqlite import COLUMNA_MOMENTO, guardar_en_sqlite, nombre_tabla
+from src.dim_tiempo import filas_dim_tiempo, rango_de_fechas
+from src.kpi import actualizar_estado_kpi, estado_nuevo, filas_kpi, variable_kpi
+from src.indice_tiempo import actualizar_indice_tiempo, normalizar_limite, recortar_salida
+from benchmarks.generar_sitrad import (FORMATO_FECHA_LIBRO_DEFECTO, FORMATOS_FECHA_LIBRO, GRUPO_POR_TIPO,
+                                      generar_bandeja)
+import run_etl
+
+CARPETA_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+BASELINE_DEFECTO = os.path.join(CARPETA_BENCHMARKS, "baseline.json")
+TOLERANCIA_DEFECTO = 0.15
+# Presupuesto chico a propósito: la medición incluye volcar y fusionar runs
+MEMORIA_ORDEN_BENCH_MB = 1
+# Consultas (identificador, día) por medición de latencia
+CONSULTAS_BENCH = 20
+
+# =================================================================
+# Medición
+# =================================================================
+
+def _limpiar_caches_fecha():
+    """Cada medición de transformación arranca sin días memorizados."""
+    for cache in _CACHE_DIAS_TEXTO:
+        cache.clear()
+    _CACHE_DIAS_DATETIME.clear()
+
+def medir(funcion, repeticiones=3, preparar=None):
+    """
+    Ejecuta funcion() 'repeticiones' veces (con preparar() antes de cada una,
+    fuera del tiempo) y una vez más bajo tracemalloc.
+
+    Returns:
+        dict: {'filas', 'segundos' (el mejor), 'filas_por_segundo', 'pico_mb'}.
+              funcion() debe devolver el número de filas procesadas.
+    """
+    mejor, filas = None, 0
+    for _ in range(max(repeticiones, 1)):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        filas = funcion()
+        segundos = time.perf_counter() - inicio
+        mejor = segundos if mejor is None else min(mejor, segundos)
+
+    if preparar:
+        preparar()
+    tracemalloc.start()
+    try:
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'filas': filas,
+        'segundos': round(mejor, 4),
+        'filas_por_segundo': round(filas / mejor) if mejor else 0,
+        'pico_mb': round(pico / 1048576, 2),
+    }
+
+def _silencioso():
+    """El ETL imprime por fila de progreso; durante la medición se descarta."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+# =================================================================
+# Etapas
+# =================================================================
+
+def _contar_lectura(ruta, lector):
+    _, filas, _ = leer_archivo_excel(ruta, lector)
+    total = 0
+    for _ in filas:
+        total += 1
+    return total
+
+def _leer_lista(ruta):
+    headers, filas, config = leer_archivo_excel(ruta)
+    return headers, list(filas), config
+
+def _con_fecha(headers, filas, config, formato_fecha):
+    """Copia de 'filas' con la fecha en una sola representación de FORMATOS_FECHA_LIBRO."""
+    idx_fecha = next(i for i, h in enumerate(headers) if config['column_mapping'].get(h) == 'FechaHora_Original')
+    formato = FORMATOS_FECHA_LIBRO[formato_fecha]
+    copia = []
+    for fila in filas:
+        fila = list(fila)
+        momento = normalizar_momento(fila[idx_fecha])
+        if momento is not None:
+            dt = datetime.fromisoformat(momento)
+            fila[idx_fecha] = dt if formato is None else dt.strftime(formato)
+        copia.append(fila)
+    return copia
+
+def _contar_transformacion(headers, filas, config, formato_llave='yyyymmddhhmm'):
+    lotes, _ = transformar_en_lotes(headers, filas, config, formato_llave=formato_llave)
+    return sum(lote['filas'] for lote in lotes)
+
+def _consultas_de(cabecera, filas, cantidad=CONSULTAS_BENCH):
+    """Hasta 'cantidad' pares (identificador, 'YYYY-MM-DD') repartidos entre los presentes en 'filas'."""
+    idx_id = cabecera.index(obtener_columna_identificador(cabecera))
+    idx_fecha = cabecera.index('FechaHora_Original')
+    pares = sorted({(str(f[idx_id]), momento[:10]) for f in filas
+                    for momento in (normalizar_momento(f[idx_fecha]),) if momento})
+    paso = max(len(pares) // cantidad, 1)
+    return pares[::paso][:cantidad]
+
+def _consultar_csv(ruta, consultas):
+    """Cada consulta recorre el CSV completo (lo que hace un consumidor sin índice)."""
+    total = 0
+    for identificador, dia in consultas:
+        with open(ruta, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f, delimiter=';')
+            cabecera = next(reader)
+            idx_id = cabecera.index(obtener_columna_identificador(cabecera))
+            idx_fecha = cabecera.index('FechaHora_Original')
+            for fila in reader:
+                if fila[idx_id] == identificador and (normalizar_momento(fila[idx_fecha]) or '')[:10] == dia:
+                    total += 1
+    return total
+
+def _consultar_csv_indice(ruta, consultas):
+    total = 0
+    for identificador, dia in consultas:
+        filas = recortar_salida(ruta, normalizar_limite(dia), normalizar_limite(dia, final=True), identificador)
+        total += max(sum(1 for _ in filas) - 1, 0)  # sin la cabecera
+    return total
+
+def _consultar_sqlite(ruta_db, tabla, id_col, consultas):
+    """Cada consulta usa el índice de la clave natural (identificador, Momento)."""
+    conexion = sqlite3.connect(ruta_db)
+    try:
+        sentencia = (f'SELECT * FROM "{tabla}" WHERE "{id_col}" = ? '
+                     f'AND "{COLUMNA_MOMENTO}" >= ? AND "{COLUMNA_MOMENTO}" <= ?')
+        return sum(len(conexion.execute(sentencia, (identificador, f"{dia} 00:00:00", f"{dia} 23:59:59")).fetchall())
+                   for identificador, dia in consultas)
+    finally:
+        conexion.close()
+
+def _lecturas_en_tabla_kpi(estado):
+    """Arma la tabla de KPI de un estado y devuelve cuántas lecturas resume."""
+    filas = filas_kpi({'BENCH': estado})
+    idx_lecturas = next(filas).index('Lecturas')
+    return sum(fila[idx_lecturas] for fila in filas)
+
+def medir_etapas(ruta, carpeta_salida, repeticiones):
+    """Mediciones de lectura, transformación y escritura de un libro."""
+    resultados = {}
+    for lector in ('openpyxl', 'directo'):
+        resultados[f'leer_{lector}'] = medir(lambda: _contar_lectura(ruta, lector), repeticiones)
+
+    headers, filas, config = _leer_lista(ruta)
+    resultados['transformar'] = medir(lambda: _contar_transformacion(headers, filas, config),
+                                      repeticiones, preparar=_limpiar_caches_fecha)
+    resultados['transformar_llave_minutos'] = medir(
+        lambda: _contar_transformacion(headers, filas, config, 'minutos'),
+        repeticiones, preparar=_limpiar_caches_fecha)
+    for formato_fecha in FORMATOS_FECHA_LIBRO:
+        if formato_fecha == 'mixto':
+            continue
+        filas_formato = _con_fecha(headers, filas, config, formato_fecha)
+        resultados[f'transformar_fecha_{formato_fecha}'] = medir(
+            lambda: _contar_transformacion(headers, filas_formato, config),
+            repeticiones, preparar=_limpiar_caches_fecha)
+
+    lotes, schema = transformar_en_lotes(headers, filas, config)
+    lotes = list(lotes)
+    ruta_shard = os.path.join(carpeta_salida, f"bench_{config['tipo']}.shard.csv")
+    resultados['escribir_shard'] = medir(lambda: escribir_shard_lotes(ruta_shard, schema, lotes), repeticiones)
+
+    cleaned_rows, schema = limpiar_y_estandarizar(headers, filas, config)
+    datos = [schema] + list(cleaned_rows)
+    for etapa, compresion in (('escribir', None), ('escribir_gzip', 'gzip')):
+        def _escribir():
+            with _silencioso():
+                return guardar_datos_transformados(datos, carpeta_salida, f"bench_{config['tipo']}.csv",
+                                                   compresion=compresion)
+        resultados[etapa] = medir(_escribir, repeticiones)
+
+    cleaned_rows, _ = limpiar_y_estandarizar(headers, filas, config, formato_llave='minutos')
+    datos_minutos = [schema] + list(cleaned_rows)
+    def _escribir_minutos():
+        with _silencioso():
+            return guardar_datos_transformados(datos_minutos, carpeta_salida,
+                                               f"bench_{config['tipo']}_minutos.csv")
+    resultados['escribir_llave_minutos'] = medir(_escribir_minutos, repeticiones)
+    for etapa, nombre in (('escribir', f"bench_{config['tipo']}.csv"),
+                          ('escribir_llave_minutos', f"bench_{config['tipo']}_minutos.csv")):
+        resultados[etapa]['bytes'] = os.path.getsize(os.path.join(carpeta_salida, nombre))
+
+    llaves = sorted(fila[0] for fila in datos_minutos[1:] if fila[0] is not None)
+    if llaves:
+        desde, hasta, _ = rango_de_fechas(llaves[0], llaves[-1])
+        resultados['dim_tiempo'] = medir(
+            lambda: sum(1 for _ in filas_dim_tiempo(desde, hasta, 'minutos')) - 1, repeticiones)
+
+    def _ordenar():
+        filas_ordenadas = ordenar_filas(schema, iter(datos[1:]), MEMORIA_ORDEN_BENCH_MB, carpeta_salida)
+        return sum(1 for _ in filas_ordenadas)
+    resultados['ordenar_externo'] = medir(_ordenar, repeticiones)
+
+    ruta_db = os.path.join(carpeta_salida, "bench.db")
+    tabla = nombre_tabla(f"bench_{config['tipo']}")
+    def _escribir_sqlite():
+        with _silencioso():
+            return guardar_en_sqlite(datos, ruta_db, tabla)
+    resultados['escribir_sqlite'] = medir(_escribir_sqlite, repeticiones)
+
+    ruta_csv = os.path.join(carpeta_salida, f"bench_{config['tipo']}.csv")
+    actualizar_indice_tiempo(ruta_csv)
+    consultas = _consultas_de(schema, datos[1:])
+    id_col = obtener_columna_identificador(schema)
+    resultados['consultar_csv'] = medir(lambda: _consultar_csv(ruta_csv, consultas), repeticiones)
+    resultados['consultar_indice'] = medir(lambda: _consultar_csv_indice(ruta_csv, consultas), repeticiones)
+    resultados['consultar_sqlite'] = medir(lambda: _consultar_sqlite(ruta_db, tabla, id_col, consultas),
+                                           repeticiones)
+
+    if variable_kpi(schema):
+        parametros = {'tolerancia': 2.0, 'hueco_maximo_min': 10.0}
+        def _actualizar_kpi():
+            estado = estado_nuevo(parametros)
+            estadisticas = {}
+            actualizar_estado_kpi(estado, iter(datos), carpeta_temporal=carpeta_salida, estadisticas=estadisticas)
+            return estadisticas['nuevas']
+        resultados['kpi_actualizar'] = medir(_actualizar_kpi, repeticiones)
+        estado = estado_nuevo(parametros)
+        actualizar_estado_kpi(estado, iter(datos), carpeta_temporal=carpeta_salida)
+        resultados['kpi_tabla'] = medir(lambda: _lecturas_en_tabla_kpi(estado), repeticiones)
+    return resultados
+
+@contextlib.contextmanager
+def _archivado_lento(latencia_ms):
+    """Agrega 'latencia_ms' a cada shutil.move (simula archivar en un share de red)."""
+    if not latencia_ms:
+        yield
+        return
+    mover = shutil.move
+
+    def _mover_lento(origen, destino, *args, **kwargs):
+        time.sleep(latencia_ms / 1000)
+        return mover(origen, destino, *args, **kwargs)
+
+    shutil.move = _mover_lento
+    try:
+        yield
+    finally:
+        shutil.move = mover
+
+def medir_main(carpeta_origen, carpeta_trabajo, workers, lector, repeticiones, total_filas,
+               hilos_io=2, carpeta_archivado=None, latencia_archivado_ms=0):
+    """
+    Corrida completa de run_etl.main. Antes de cada repetición se copia la
+    bandeja generada a una carpeta nueva (main mueve los Excel a Archive).
+    Con workers > 1 el pico de memoria solo cubre el proceso principal.
+    Shards y reportes quedan siempre en la carpeta de trabajo: con
+    'carpeta_archivado' solo los Excel van a la otra carpeta.
+    """
+    ruta_config = os.path.join(carpeta_trabajo, "config.json")
+    carpeta_archivado = carpeta_archivado or os.path.join(carpeta_trabajo, "Archive")
+
+    def _preparar():
+        for carpeta in (carpeta_trabajo, carpeta_archivado):
+            if os.path.exists(carpeta):
+                shutil.rmtree(carpeta)
+        shutil.copytree(os.path.join(carpeta_origen, "Import"), os.path.join(carpeta_trabajo, "Import"))
+        config = {
+            "RUTAS_PROCESO": {
+                grupo: {"INPUT": os.path.join(carpeta_trabajo, "Import", grupo),
+                        "OUTPUT_NAME": f"consol_{grupo.lower()}.csv"}
+                for grupo in sorted(set(GRUPO_POR_TIPO.values()))
+            },
+            "CARPETA_DESTINO_GENERAL": os.path.join(carpeta_trabajo, "Export"),
+            "CARPETA_ARCHIVADOS_GENERAL": carpeta_archivado,
+            "CARPETA_SHARDS": os.path.join(carpeta_trabajo, "_shards"),
+            "CARPETA_REPORTES": os.path.join(carpeta_trabajo, "_reportes"),
+            "WORKERS": workers,
+            "HILOS_IO": hilos_io,
+            "LECTOR_EXCEL": lector,
+        }
+        os.makedirs(config["CARPETA_DESTINO_GENERAL"], exist_ok=True)
+        with open(ruta_config, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=4)
+
+    def _correr():
+        with _silencioso(), _archivado_lento(latencia_archivado_ms):
+            run_etl.main(["--config", ruta_config])
+        return total_filas
+
+    return medir(_correr, repeticiones, preparar=_preparar)
+
+def ejecutar_suite(filas, archivos, repeticiones, workers, lector, carpeta, hilos_io=2,
+                   carpeta_archivado=None, latencia_archivado_ms=0, formato_fecha=FORMATO_FECHA_LIBRO_DEFECTO):
+    carpeta_origen = os.path.join(carpeta, "origen")
+    print(f"Generando libros sintéticos: {filas} filas x {archivos} archivo(s) por configuración "
+          f"(fechas: {formato_fecha})...")
+    generados = generar_bandeja(carpeta_origen, filas, archivos, formato_fecha=formato_fecha)
+
+    mediciones = {}
+    carpeta_salida = os.path.join(carpeta, "salida")
+    os.makedirs(carpeta_salida, exist_ok=True)
+    for config in CONFIGURACION_ARCHIVOS:
+        grupo = GRUPO_POR_TIPO.get(config['tipo'], config['tipo'])
+        ruta = next(r for r in generados[grupo] if os.path.basename(r).startswith(config['tipo'].lower()))
+        print(f"   Midiendo {config['tipo']}...")
+        for etapa, resultado in medir_etapas(ruta, carpeta_salida, repeticiones).items():
+            mediciones[f"{etapa}/{config['tipo']}"] = resultado
+
+    print(f"   Midiendo corrida completa (workers={workers}, lector={lector})...")
+    total_filas = filas * archivos * len(CONFIGURACION_ARCHIVOS)
+    for clave, hilos in (('main/TODOS', hilos_io), ('main_io_sincronico/TODOS', 0)):
+        if clave != 'main/TODOS' and not hilos_io:
+            continue
+        mediciones[clave] = medir_main(carpeta_origen, os.path.join(carpeta, "trabajo"), workers, lector,
+                                       repeticiones, total_filas, hilos, carpeta_archivado,
+                                       latencia_archivado_ms)
+    return mediciones
+
+# =================================================================
+# Baseline y reporte
+# =================================================================
+
+def comparar_con_baseline(mediciones, baseline, tolerancia):
+    """
+    Lista de regresiones: filas/s por debajo de baseline*(1 - tolerancia) o
+    pico de memoria por encima de baseline*(1 + tolerancia). Solo se comparan
+    mediciones hechas con los mismos parámetros (filas, archivos, workers, lector,
+    hilos de E/S y archivado).
+    """
+    regresiones = []
+    for clave, actual in mediciones.items():
+        referencia = baseline.get(clave)
+        if not referencia:
+            continue
+        if actual['filas_por_segundo'] < referencia['filas_por_segundo'] * (1 - tolerancia):
+            regresiones.append(f"{clave}: {actual['filas_por_segundo']} filas/s "
+                               f"(baseline {referencia['filas_por_segundo']})")
+        # Picos muy chicos varían por ruido del intérprete: se ignoran bajo 1 MB
+        if referencia['pico_mb'] >= 1 and actual['pico_mb'] > referencia['pico_mb'] * (1 + tolerancia):
+            regresiones.append(f"{clave}: pico {actual['pico_mb']} MB (baseline {referencia['pico_mb']} MB)")
+    return regresiones
+
+def imprimir_reporte(mediciones, baseline=None):
+    print(f"\n{'Medición':<40}{'Filas':>10}{'Segundos':>10}{'Filas/s':>12}{'Pico MB':>10}{'vs base':>10}")
+    print("-" * 92)
+    for clave, m in mediciones.items():
+        variacion = ""
+        referencia = (baseline or {}).get(clave)
+        if referencia and referencia['filas_por_segundo']:
+            variacion = f"{(m['filas_por_segundo'] / referencia['filas_por_segundo'] - 1) * 100:+.1f}%"
+        print(f"{clave:<40}{m['filas']:>10}{m['segundos']:>10.3f}{m['filas_por_segundo']:>12}"
+              f"{m['pico_mb']:>10.2f}{variacion:>10}")
+
+def cargar_baseline(ruta):
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        print(f"ADVERTENCIA: Baseline ilegible ({e}). Se ignora.")
+        return None
+
+def guardar_json(ruta, contenido):
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(contenido, f, indent=2, ensure_ascii=False)
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del ETL Sitrad con libros sintéticos.")
+    parser.add_argument("--filas", type=int, default=20000, help="Filas de datos por libro.")
+    parser.add_argument("--archivos", type=int, default=1, help="Libros por configuración (corrida completa).")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Se reporta la mejor de N repeticiones.")
+    parser.add_argument("--workers", type=int, default=1, help="Workers de la corrida completa.")
+    parser.add_argument("--lector", choices=('openpyxl', 'directo'), default='openpyxl',
+                        help="Lector de la corrida completa.")
+    parser.add_argument("--hilos-io", type=int, default=2,
+                        help="HILOS_IO de la corrida completa (0 = E/S sincrónica).")
+    parser.add_argument("--carpeta-archivado", default=None,
+                        help="Archivar los Excel de la corrida completa en esta carpeta "
+                             "(p. ej. en otro volumen); se vacía antes de cada repetición.")
+    parser.add_argument("--latencia-archivado-ms", type=float, default=0,
+                        help="Demora agregada a cada archivado (simula un share de red).")
+    parser.add_argument("--formato-fecha", choices=tuple(FORMATOS_FECHA_LIBRO), default=FORMATO_FECHA_LIBRO_DEFECTO,
+                        help="Representación de la fecha en los libros generados.")
+    parser.add_argument("--baseline", default=BASELINE_DEFECTO, help="Archivo de baseline (JSON).")
+    parser.add_argument("--guardar-baseline", action="store_true",
+                        help="Guardar esta corrida como nueva baseline.")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_DEFECTO,
+                        help="Empeoramiento admitido antes de marcar regresión (0.15 = 15%%).")
+    parser.add_argument("--salida", default=None, help="Guardar también los resultados en este JSON.")
+    parser.add_argument("--carpeta", default=None,
+                        help="Carpeta de trabajo (por defecto una temporal que se borra al final).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+    parametros = {'filas': args.filas, 'archivos': args.archivos, 'workers': args.workers,
+                  'lector': args.lector, 'hilos_io': args.hilos_io,
+                  'archivado_aparte': bool(args.carpeta_archivado),
+                  'latencia_archivado_ms': args.latencia_archivado_ms,
+                  'formato_fecha': args.formato_fecha}
+
+    carpeta = args.carpeta or tempfile.mkdtemp(prefix="bench_sitrad_")
+    try:
+        mediciones = ejecutar_suite(args.filas, args.archivos, args.repeticiones,
+                                    args.workers, args.lector, carpeta, args.hilos_io,
+                                    args.carpeta_archivado, args.latencia_archivado_ms,
+                                    args.formato_fecha)
+    finally:
+        if not args.carpeta:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'maquina': platform.machine(),
+        'parametros': parametros,
+        'mediciones': mediciones,
+    }
+
+    baseline = None if args.guardar_baseline else cargar_baseline(args.baseline)
+    if baseline and baseline.get('parametros') != parametros:
+        print(f"ADVERTENCIA: La baseline se midió con otros parámetros ({baseline.get('parametros')}). "
+              "No se compara.")
+        baseline = None
+
+    imprimir_reporte(mediciones, baseline and baseline['mediciones'])
+
+    if args.salida:
+        guardar_json(args.salida, resultado)
+
+    if args.guardar_baseline:
+        guardar_json(args.baseline, resultado)
+        print(f"\nBaseline guardada en: {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("\nSin baseline comparable. Use --guardar-baseline para crearla.")
+        return 0
+
+    regresiones = comparar_con_baseline(mediciones, baseline['mediciones'], args.tolerancia)
+    if regresiones:
+        print(f"\nREGRESIONES (tolerancia {args.tolerancia:.0%}):")
+        for regresion in regresiones:
+            print(f"   - {regresion}")
+        return 1
+    print(f"\nSin regresiones respecto de la baseline (tolerancia {args.tolerancia:.0%}).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Recorte rápido de una salida consolidada por rango de fechas y/o identificador,
+usando el índice lateral de tiempo (src/indice_tiempo.py).
+
+Uso:
+    python consultar_rango.py PASILLOS --desde 2026-01-06 --hasta 2026-01-06 --id P007
+    python consultar_rango.py Export/consol_pasillos.csv --desde "2026-01-06 08:00" \\
+        --hasta "2026-01-06 12:00" --id "Pasillo 7" -o recorte.csv
+
+La salida puede ser el nombre de un proceso de RUTAS_PROCESO (se busca en
+CARPETA_DESTINO_GENERAL del config.json) o la ruta de un CSV, .csv.gz o
+carpeta particionada. Sin -o, el CSV recortado sale por la salida estándar y
+los mensajes por la de errores.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import contextlib
+from src.indice_tiempo import normalizar_limite, recortar_salida
+
+def resolver_salida(salida, config_file):
+    """Ruta de la salida: tal cual si existe, o la del proceso con ese nombre en el config.json."""
+    if os.path.exists(salida):
+        return salida
+    try:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except Exception as e:
+        print(f"ERROR Config: {e}")
+        return None
+
+    rutas = config.get("RUTAS_PROCESO", {}).get(salida)
+    destino = config.get("CARPETA_DESTINO_GENERAL")
+    if not rutas or not destino:
+        print(f"ERROR: '{salida}' no es un archivo ni un proceso de RUTAS_PROCESO.")
+        return None
+    candidatos = [os.path.join(destino, rutas.get("OUTPUT_NAME", "")),
+                  os.path.join(destino, rutas.get("OUTPUT_NAME", "") + ".gz"),
+                  os.path.join(destino, salida)]
+    if config.get("SALIDA_PARTICIONADA", False):
+        candidatos.insert(0, candidatos.pop())
+    for candidato in candidatos:
+        if os.path.exists(candidato):
+            return candidato
+    print(f"ERROR: No se encontró la salida consolidada de {salida} en {destino}.")
+    return None
+
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Recorte de una salida consolidada por fecha e identificador.")
+    parser.add_argument("salida", help="Proceso de RUTAS_PROCESO (p. ej. PASILLOS) o ruta de la salida.")
+    parser.add_argument("--desde", default=None,
+                        help="Inicio del rango: YYYY-MM-DD[ HH:MM[:SS]] o DD/MM/YYYY (incluido).")
+    parser.add_argument("--hasta", default=None,
+                        help="Fin del rango (incluido; sin hora, el día completo).")
+    parser.add_argument("--id", default=None,
+                        help="Identificador: Pasillo/Sistema/Modulo (p. ej. 'Pasillo 7') o Pasillo_est (P007).")
+    parser.add_argument("-o", "--salida-csv", default=None,
+                        help="Archivo donde escribir el recorte (por defecto, la salida estándar).")
+    parser.add_argument("--config", default="config.json",
+                        help="Ruta del archivo de configuración (para nombres de proceso).")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parsear_argumentos(argv)
+    destino_csv = sys.stdout
+    # Con el CSV en la salida estándar, los mensajes van a la de errores
+    mensajes = contextlib.redirect_stdout(sys.stderr) if not args.salida_csv else contextlib.nullcontext()
+
+    with mensajes:
+        desde = normalizar_limite(args.desde) if args.desde else None
+        hasta = normalizar_limite(args.hasta, final=True) if args.hasta else None
+        if (args.desde and not desde) or (args.hasta and not hasta):
+            print("ERROR: Fecha inválida en --desde/--hasta (use YYYY-MM-DD[ HH:MM]).")
+            return 2
+
+        ruta = resolver_salida(args.salida, args.config)
+        if not ruta:
+            return 1
+
+        inicio = time.perf_counter()
+        estadisticas = {}
+        total = 0
+        archivo = open(args.salida_csv, 'w', newline='', encoding='utf-8') if args.salida_csv else None
+        try:
+            writer = csv.writer(archivo or destino_csv, delimiter=';')
+            filas = recortar_salida(ruta, desde, hasta, args.id, estadisticas)
+            for fila in filas:
+                writer.writerow(fila)
+                total += 1
+        finally:
+            if archivo:
+                archivo.close()
+
+        milisegundos = (time.perf_counter() - inicio) * 1000
+        print(f"{max(total - 1, 0)} filas de {ruta} en {milisegundos:.1f} ms "
+              f"({estadisticas.get('tramos', 0)} tramos, "
+              f"{estadisticas.get('bytes_leidos', 0) / 1048576:.2f} MB leídos de "
+              f"{os.path.getsize(ruta) / 1048576 if os.path.isfile(ruta) else 0:.2f} MB).")
+    return 0
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # La salida estándar se cerró antes de tiempo (p. ej. '| head')
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(0)
@@ -1,9 +1,37 @@
 import os
 import json
+import time
 import shutil
-from src.extract import encontrar_archivos_por_procesar, leer_archivo_excel
-from src.transform import limpiar_y_estandarizar
-from src.load import guardar_datos_transformados
+import signal
+import argparse
+import itertools
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from src.extract import LECTORES_EXCEL, encontrar_archivos_por_procesar, leer_archivo_excel
+from src.transform import FORMATO_LLAVE_DEFECTO, FORMATOS_LLAVE, transformar_en_lotes
+from src.load import (BUFFER_ESCRITURA_DEFECTO, COMPRESIONES_SALIDA, guardar_datos_transformados,
+                      guardar_particionado, leer_salida_consolidada, nombre_archivo_salida)
+from src.metricas import (bytes_escritos_desde, combinar_perfiles, cronometrar_filas, escribir_reporte,
+                          guardar_perfil, iniciar_perfil, iniciar_traza_memoria, pico_rss_mb,
+                          pico_traza_mb, redondear, resumir_grupo)
+from src.orden import MEMORIA_ORDEN_MB_DEFECTO
+from src.preescaneo import preescanear_trabajos
+from src.carga_sqlite import (DESTINOS_CARGA, LOTE_SQLITE_DEFECTO, NOMBRE_BASE_DEFECTO, existe_tabla,
+                              guardar_en_sqlite, leer_tabla_sqlite, nombre_tabla, reemplazar_tabla_sqlite)
+from src.kpi import (CARPETA_ESTADO_KPI, HUECO_MAXIMO_MIN_DEFECTO, NOMBRE_KPI_DEFECTO, TIPOS_SQLITE_KPI,
+                     TOLERANCIA_DESVIO_DEFECTO, actualizar_estado_kpi, cargar_estado_kpi, estado_nuevo,
+                     filas_kpi, guardar_estado_kpi, leer_estados_kpi, resumen_kpi, ruta_estado_kpi,
+                     variable_kpi)
+from src.dim_tiempo import (NOMBRE_DIM_TIEMPO_DEFECTO, TIPOS_SQLITE_DIM_TIEMPO, TURNOS_DEFECTO, cobertura_csv,
+                            cobertura_sqlite, filas_dim_tiempo, rango_de_fechas, registrar_rango_llaves,
+                            turno_por_intervalo, unir_rangos)
+from src.io_fondo import cerrar_cola_io, crear_cola_io, encolar, resultado_o_error
+from src.union import filas_tabla_unificada, resumen_union
+from src.vigilancia import actualizar_seguimiento, archivos_listos, escanear_carpeta, marcar_entregados
+from src.shards import (ESTADO_CONSOLIDADO, ESTADO_LISTO, RETENCION_SHARDS_DIAS_DEFECTO, calcular_hash_archivo,
+                        cargar_ledger, escribir_shard_lotes, leer_shard, purgar_shards_consolidados,
+                        registrar_en_ledger, ruta_shard, shards_pendientes)
 
 # Nota: Ya no importamos COLUMNAS_SALIDA fijo, porque ahora es dinámico.
 
@@ -20,6 +48,7 @@ def mover_a_archivados(filepath, carpeta_base_archivados, subcarpeta):
     """
     Mueve el archivo a Archive/Subcarpeta (ej: Archive/Pasillos/)
     Sobrescribe si el archivo ya existe en el destino.
+    Devuelve True si se archivó.
     """
     try:
         destino_folder = os.path.join(carpeta_base_archivados, subcarpeta)
@@ -34,90 +63,1306 @@ def mover_a_archivados(filepath, carpeta_base_archivados, subcarpeta):
             
         shutil.move(filepath, destino_path)
         # print(f"   -> Archivado en: {subcarpeta}") 
+        return True
     except Exception as e:
         print(f"ERROR al archivar {filepath}: {e}")
+        return False
 
-def main():
-    print("==================================================")
-    print("       INICIO DEL PROCESO ETL (MULTI-SCHEMA)      ")
-    print("==================================================")
+def archivar_y_medir(filepath, carpeta_base_archivados, subcarpeta, medicion):
+    """mover_a_archivados para la cola de E/S: anota el tiempo en la medición del archivo."""
+    inicio = time.perf_counter()
+    archivado = mover_a_archivados(filepath, carpeta_base_archivados, subcarpeta)
+    medicion['seg_archivar'] = round(time.perf_counter() - inicio, 4)
+    if not archivado:
+        medicion['archivado'] = False
+    return archivado
 
-    config = cargar_configuracion_rutas()
-    if not config: return
+def procesar_archivo(filepath, carpeta_shards, lector='openpyxl', trazar_memoria=False,
+                     carpeta_perfiles=None, formato_llave=FORMATO_LLAVE_DEFECTO):
+    """
+    Extrae y transforma un único archivo Excel y deja sus filas en un shard
+    intermedio identificado por el hash del contenido (src/shards.py).
+    Se ejecuta en el proceso principal o en un worker del pool, por eso
+    debe ser una función de módulo (serializable) y no tocar el disco de salida.
+
+    Si el shard de ese contenido ya existe (re-ejecución o archivo re-depositado)
+    no se abre el Excel. Con otro 'formato_llave' que el por defecto el shard
+    es otro (el hash lleva el formato como sufijo): las llaves nunca se mezclan.
+
+    Con trazar_memoria se mide el pico de tracemalloc del archivo y con
+    carpeta_perfiles se guarda ahí su perfil cProfile (solo en workers: en el
+    proceso principal el perfil cubre toda la corrida).
+
+    Returns:
+        tuple: (estado, resultado, medicion) donde estado es 'OK', 'SALTADO' o
+               'FALLO', resultado es (hash, ruta_shard, desde_cache) cuando
+               estado == 'OK' y medicion es el dict de tiempos y filas del archivo
+               (src/metricas.py).
+    """
+    medicion = {'archivo': os.path.basename(filepath), 'pid': os.getpid(), 'desde_cache': False}
+    detener_traza = iniciar_traza_memoria() if trazar_memoria else False
+    perfil = iniciar_perfil() if carpeta_perfiles else None
+    try:
+        estado, resultado = _extraer_y_transformar(filepath, carpeta_shards, lector, medicion, formato_llave)
+    finally:
+        if perfil:
+            guardar_perfil(perfil, os.path.join(
+                carpeta_perfiles, f"w{os.getpid()}_{next(_PERFILES_DEL_PROCESO)}.prof"))
+        if trazar_memoria:
+            medicion['pico_traza_mb'] = pico_traza_mb(detener_traza)
+
+    medicion['estado'] = estado
+    medicion['rss_max_mb'] = pico_rss_mb()
+    return estado, resultado, redondear(medicion)
+
+# Numeración de los perfiles parciales que deja cada worker
+_PERFILES_DEL_PROCESO = itertools.count()
+
+def _extraer_y_transformar(filepath, carpeta_shards, lector, medicion, formato_llave=FORMATO_LLAVE_DEFECTO):
+    """Cuerpo de procesar_archivo; anota en 'medicion' el tiempo propio de cada etapa."""
+    reloj = time.perf_counter
+    inicio = reloj()
+    hash_archivo = calcular_hash_archivo(filepath)
+    if formato_llave != FORMATO_LLAVE_DEFECTO:
+        # '-2': shards de 'minutos' con 23:55-23:59 en las 00:00 del día siguiente
+        hash_archivo = f"{hash_archivo}-{formato_llave}-2"
+    ruta = ruta_shard(carpeta_shards, hash_archivo)
+    medicion['seg_hash'] = reloj() - inicio
+    if os.path.exists(ruta):
+        medicion['desde_cache'] = True
+        return 'OK', (hash_archivo, ruta, True)
+
+    # 1. Extracción
+    # leer_archivo_excel devuelve un generador que cierra el archivo al agotarse
+    inicio = reloj()
+    headers, data_rows, conf = leer_archivo_excel(filepath, lector)
+    apertura = medicion['seg_extraer'] = reloj() - inicio
+
+    if data_rows is None or not conf:
+        return 'SALTADO', None
+
+    # 2. Transformación
+    # Devuelve una TUPLA: (Lotes_Columnares, Cabecera_Usada)
+    # Cada etapa se envuelve para saber cuánto tiempo pasa dentro de ella
+    filas_leidas = cronometrar_filas(data_rows, medicion, 'seg_extraer', 'filas_leidas')
+    inicio = reloj()
+    resultado = transformar_en_lotes(headers, filas_leidas, conf, formato_llave=formato_llave)
+    medicion['seg_transformar'] = reloj() - inicio
+    if not resultado:
+        data_rows.close()
+        return 'FALLO', None
+
+    lotes, current_schema_header = resultado
+    filas_limpias = cronometrar_filas(lotes, medicion, 'seg_transformar', 'filas_transformadas',
+                                      contar=lambda lote: lote['filas'])
+    inicio = reloj()
+    try:
+        if not escribir_shard_lotes(ruta, current_schema_header, filas_limpias):
+            return 'SALTADO', None
+    except Exception as e:
+        print(f"ERROR procesando {os.path.basename(filepath)}: {e}")
+        return 'FALLO', None
+    finally:
+        escritura = reloj() - inicio
+        filas_limpias.close()
+        filas_leidas.close()
+        data_rows.close()
+        # Tiempos propios: cada envoltura incluye el de la etapa anterior
+        medicion['seg_shard'] = escritura - medicion['seg_transformar']
+        medicion['seg_transformar'] -= medicion['seg_extraer'] - apertura
+
+    medicion['bytes_shard'] = os.path.getsize(ruta)
+    return 'OK', (hash_archivo, ruta, False)
+
+def resultados_en_orden(archivos, executor=None, ventana=None):
+    """
+    Genera (filepath, estado, resultado, medicion) en el MISMO orden de 'archivos', que es
+    una lista de tuplas con los argumentos de procesar_archivo (la primera
+    posición es el filepath). Si hay executor, se mantienen como
+    máximo 'ventana' archivos en vuelo en el pool; si no, se procesan
+    secuencialmente.
+    """
+    if executor is None:
+        for argumentos in archivos:
+            yield (argumentos[0],) + procesar_archivo(*argumentos)
+        return
+
+    ventana = max(ventana or 1, 1)
+    pendientes = deque()
+    archivos = iter(archivos)
+
+    def _enviar_siguiente():
+        siguiente = next(archivos, None)
+        if siguiente is not None:
+            pendientes.append((siguiente[0], executor.submit(procesar_archivo, *siguiente)))
+
+    for _ in range(ventana):
+        _enviar_siguiente()
+
+    while pendientes:
+        filepath, futuro = pendientes.popleft()
+        try:
+            resultado = (filepath,) + futuro.result()
+        except Exception as e:
+            print(f"ERROR en worker procesando {filepath}: {e}")
+            resultado = (filepath, 'FALLO', None, {'archivo': os.path.basename(filepath)})
+        _enviar_siguiente()
+        yield resultado
+
+def registrar_resultados_del_grupo(resultados, carpeta_shards, pendientes, carpeta_archivados,
+                                   nombre_proceso, mediciones_archivos, cola_io, archivados,
+                                   posiciones=None):
+    """
+    Recorre los resultados del grupo en el orden original: registra cada shard
+    como 'listo' en el ledger y recién entonces encola el archivado de su Excel
+    en la cola de E/S (en 'archivados' quedan los futures). La medición de
+    cada archivo se agrega a 'mediciones_archivos'. Con 'posiciones'
+    ({filepath: índice}) los hashes de esta corrida se consolidan en ese orden
+    aunque los resultados lleguen en otro (p. ej. del más grande al más chico).
+
+    Returns:
+        list: Hashes a consolidar, en orden y sin repetir: primero los que
+              quedaron 'listo' en una corrida anterior que se cortó
+              ('pendientes') y luego los de esta corrida.
+    """
+    ledger = cargar_ledger(carpeta_shards)
+    hashes = []
+    for hash_archivo in pendientes:
+        print(f"   [PENDIENTE] {ledger[hash_archivo].get('archivo')} (shard de una corrida anterior)")
+        hashes.append(hash_archivo)
+
+    nuevos = []
+    for filepath, estado, resultado, medicion in resultados:
+        filename = os.path.basename(filepath)
+        medicion['grupo'] = nombre_proceso
+        mediciones_archivos.append(medicion)
+
+        if estado == 'SALTADO':
+            print(f"   [SALTADO] {filename} (No se identificó config o está vacío)")
+            continue
+
+        if estado != 'OK':
+            print(f"   [FALLO TRANSFORMACIÓN] {filename}")
+            continue
+
+        hash_archivo, _, desde_cache = resultado
+
+        # 3. Archivado (solo en el proceso principal y solo si el shard ya está en disco)
+        registrar_en_ledger(carpeta_shards, [{'hash': hash_archivo, 'estado': ESTADO_LISTO,
+                                              'archivo': filename}])
+        archivados.append((filename, encolar(cola_io, archivar_y_medir, filepath, carpeta_archivados,
+                                             nombre_proceso.capitalize(), medicion)))
+        print(f"   [OK{' - CACHÉ' if desde_cache else ''}] {filename}")
+
+        posicion = posiciones.get(filepath, len(nuevos)) if posiciones else len(nuevos)
+        nuevos.append((posicion, hash_archivo))
+
+    # Un mismo contenido depositado dos veces se consolida una sola vez
+    for _, hash_archivo in sorted(nuevos, key=lambda par: par[0]):
+        if hash_archivo not in hashes:
+            hashes.append(hash_archivo)
+    return hashes
+
+def filas_de_shards(carpeta_shards, hashes):
+    """Encadena los shards en un solo flujo: la cabecera (del primer shard) y después las filas."""
+    cabecera_emitida = False
+    for hash_archivo in hashes:
+        filas = leer_shard(ruta_shard(carpeta_shards, hash_archivo))
+        cabecera = next(filas)
+        if not cabecera_emitida:
+            yield cabecera
+            cabecera_emitida = True
+        yield from filas
+
+def cargar_grupo(contexto, nombre_proceso, carpeta_shards, hashes, output_filename):
+    """
+    4. Carga: concatena los shards del grupo en su salida consolidada (CSV o
+    particiones). Se ejecuta en la cola de E/S mientras se procesa el grupo
+    siguiente.
+
+    Returns:
+        dict: Medición de la carga, con 'total' = filas escritas (None si falló).
+    """
+    OUT_DIR_GENERAL = contexto['destino']
+    opciones_salida = contexto['opciones_salida']
+    incremental = contexto['incremental']
+    particionado = contexto['particionado']
+
+    # Lo que pasa dentro del flujo (leer los shards) se descuenta del tiempo de carga.
+    medicion = {}
+    filas_grupo = filas_de_shards(carpeta_shards, hashes)
+    rango_llaves = {}
+    if contexto['dim_tiempo']:
+        # Rango de Llave_Comun de lo que se carga, para saber si dim_tiempo lo cubre
+        filas_grupo = registrar_rango_llaves(filas_grupo, rango_llaves)
+    filas_grupo = cronometrar_filas(filas_grupo, medicion, 'seg_entrada_carga', 'filas_entrada_carga')
+    sqlite = contexto['sqlite']
+    if sqlite:
+        ruta_salida = sqlite['ruta']
+    elif particionado:
+        ruta_salida = os.path.join(OUT_DIR_GENERAL, nombre_proceso)
+    else:
+        ruta_salida = os.path.join(OUT_DIR_GENERAL,
+                                   nombre_archivo_salida(output_filename, opciones_salida['compresion']))
+    tamano_previo = (os.path.getsize(ruta_salida)
+                     if (incremental or sqlite) and not particionado and os.path.isfile(ruta_salida) else None)
+    reloj_inicio, inicio = time.time(), time.perf_counter()
+
+    try:
+        if sqlite:
+            total = guardar_en_sqlite(filas_grupo, sqlite['ruta'], nombre_tabla(nombre_proceso),
+                                      incremental=incremental, agregar=contexto['agregar'],
+                                      transiciones=contexto['transiciones'], tamano_lote=sqlite['tamano_lote'])
+        elif particionado:
+            total = guardar_particionado(filas_grupo, ruta_salida, agregar=contexto['agregar'],
+                                         transiciones=contexto['transiciones'], orden=contexto['orden'])
+        else:
+            total = guardar_datos_transformados(filas_grupo, OUT_DIR_GENERAL, output_filename,
+                                                incremental=incremental, agregar=contexto['agregar'],
+                                                transiciones=contexto['transiciones'],
+                                                orden=contexto['orden'], indice_tiempo=contexto['indice_tiempo'],
+                                                **opciones_salida)
+    finally:
+        filas_grupo.close()
+
+    seg_carga = time.perf_counter() - inicio
+    filas_entrada = max(medicion.get('filas_entrada_carga', 0) - 1, 0)  # sin la cabecera
+    medicion.update({
+        'total': total,
+        'salida': ruta_salida,
+        'seg_carga': seg_carga - medicion.pop('seg_entrada_carga', 0.0),
+        'filas_entrada_carga': filas_entrada,
+        'filas_escritas': total or 0,
+        'filas_omitidas_carga': filas_entrada - total if total is not None else None,
+        'bytes_escritos': bytes_escritos_desde(ruta_salida, reloj_inicio, tamano_previo),
+    })
+    if total is not None and rango_llaves.get('min') is not None:
+        medicion['llave_min'], medicion['llave_max'] = rango_llaves['min'], rango_llaves['max']
+
+    if contexto['kpi'] and total is not None:
+        salida = (sqlite['ruta'], nombre_tabla(nombre_proceso)) if sqlite else ruta_salida
+        try:
+            medicion.update(actualizar_kpis_del_grupo(contexto, nombre_proceso, salida, carpeta_shards, hashes))
+        except Exception as e:
+            # Sin estado, la próxima corrida lo reconstruye desde la salida consolidada
+            print(f"ERROR al actualizar los KPI de {nombre_proceso}: {e}")
+            ruta_estado = ruta_estado_kpi(contexto['kpi']['carpeta_estado'], nombre_proceso)
+            if os.path.exists(ruta_estado):
+                os.remove(ruta_estado)
+    return medicion
+
+def actualizar_kpis_del_grupo(contexto, nombre_proceso, salida, carpeta_shards=None, hashes=()):
+    """
+    Actualiza el estado de KPI diarios del grupo (src/kpi.py) después de su
+    carga. Con salida acumulativa (incremental o particionada) se suman solo
+    las lecturas de los shards de esta corrida; si el estado falta o es de
+    otros parámetros se reconstruye una vez desde la salida consolidada
+    ('salida': ruta o (ruta_db, tabla)). Con carga completa el estado se
+    rehace desde los shards, igual que la salida. Sin 'hashes' solo se arma
+    desde la salida consolidada.
+
+    Returns:
+        dict: Medición para el reporte ({} si el grupo no tiene KPI).
+    """
+    opciones = contexto['kpi']
+    ruta_estado = ruta_estado_kpi(opciones['carpeta_estado'], nombre_proceso)
+    acumulativa = contexto['incremental'] or contexto['particionado']
+    estado = cargar_estado_kpi(ruta_estado, opciones['parametros']) if acumulativa else None
+    inicio = time.perf_counter()
+    estadisticas = {'origen': 'shards'}
+    consolidada = None
+    if estado is None:
+        estado = estado_nuevo(opciones['parametros'])
+        if acumulativa or not hashes:
+            consolidada = leer_tabla_sqlite(*salida) if isinstance(salida, tuple) else leer_salida_consolidada(salida)
+            cabecera = next(consolidada, None)
+            if variable_kpi(cabecera):
+                # La salida ya incluye esta corrida: los shards no agregan nada
+                estadisticas['origen'] = 'salida consolidada'
+                filas = itertools.chain([cabecera], consolidada)
+            elif cabecera is not None and 'Lecturas' in cabecera:
+                print(f"   ADVERTENCIA: La salida de {nombre_proceso} está agregada por 10 minutos; "
+                      "los KPI diarios cuentan desde esta corrida.")
+    if estadisticas['origen'] == 'shards':
+        if not hashes:
+            return {}
+        filas = filas_de_shards(carpeta_shards, hashes)
+    try:
+        if not actualizar_estado_kpi(estado, filas, opciones['memoria_mb'], opciones['carpeta_temporal'],
+                                     estadisticas):
+            return {}
+    finally:
+        if consolidada is not None:
+            consolidada.close()
+        if estadisticas['origen'] == 'shards':
+            filas.close()
+    guardar_estado_kpi(ruta_estado, estado)
+    print(f"   {resumen_kpi(estadisticas)}")
+    return {'kpi_lecturas_nuevas': estadisticas['nuevas'], 'seg_kpi': time.perf_counter() - inicio}
+
+def cerrar_grupo(en_curso):
+    """
+    Espera la carga y los archivados de un grupo, marca sus shards como
+    consolidados (solo si la carga terminó bien) e imprime su resumen.
+
+    Returns:
+        dict: Resumen del grupo para el reporte.
+    """
+    (nombre_proceso, carpeta_shards, hashes, archivos_del_grupo, archivados,
+     medicion_grupo, output_filename, inicio_grupo, carga) = en_curso
+
+    medicion_carga = resultado_o_error(carga, f"carga de {nombre_proceso}") or {'total': None}
+    total = medicion_carga.pop('total')
+    fallos_archivado = [nombre for nombre, futuro in archivados
+                        if not resultado_o_error(futuro, f"archivado de {nombre}")]
+    if fallos_archivado:
+        print(f"   ADVERTENCIA: {len(fallos_archivado)} archivo(s) de {nombre_proceso} no se pudieron "
+              f"archivar y siguen en la carpeta de entrada: {', '.join(fallos_archivado)}")
+
+    # Solo con el CSV escrito se marcan los shards como consolidados; si
+    # algo falló quedan 'listo' y la próxima corrida los retoma.
+    if total is not None:
+        registrar_en_ledger(carpeta_shards, [{'hash': h, 'estado': ESTADO_CONSOLIDADO} for h in hashes])
+
+    medicion_grupo.update(medicion_carga)
+    medicion_grupo.setdefault('filas_escritas', 0)
+    medicion_grupo.setdefault('bytes_escritos', 0)
+    medicion_grupo['seg_total'] = time.perf_counter() - inicio_grupo
+    medicion_grupo['rss_max_mb'] = pico_rss_mb()
+    resumen = resumir_grupo(nombre_proceso, medicion_grupo, archivos_del_grupo)
+    print(f"   Tiempos {nombre_proceso}: extracción {resumen['seg_extraer']:.1f} s | transformación "
+          f"{resumen['seg_transformar']:.1f} s | shards {resumen['seg_shard']:.1f} s | "
+          f"archivado {resumen['seg_archivar']:.1f} s | carga {resumen.get('seg_carga', 0.0):.1f} s")
+
+    if total:
+        print(f"   -> ÉXITO: Se generó {output_filename} con {total} registros.")
+    else:
+        print(f"   -> FINALIZADO: No se generaron datos válidos para {nombre_proceso}.")
+    return resumen
+
+def obtener_numero_workers(args, config):
+    """Prioridad: argumento --workers, luego clave WORKERS del config.json, por defecto 1."""
+    workers = args.workers if args.workers is not None else config.get("WORKERS", 1)
+    try:
+        workers = int(workers)
+    except (TypeError, ValueError):
+        print(f"ADVERTENCIA: Valor de WORKERS inválido ({workers}). Se usará 1.")
+        return 1
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+def obtener_lector_excel(args, config):
+    """Prioridad: argumento --lector, luego clave LECTOR_EXCEL del config.json, por defecto openpyxl."""
+    lector = args.lector or str(config.get("LECTOR_EXCEL", "openpyxl")).lower()
+    if lector not in LECTORES_EXCEL:
+        print(f"ADVERTENCIA: LECTOR_EXCEL inválido ({lector}). Se usará openpyxl.")
+        return 'openpyxl'
+    return lector
+
+def es_modo_incremental(args, config):
+    """Prioridad: argumento --incremental, luego "MODO_CARGA": "INCREMENTAL" del config.json."""
+    if args.incremental:
+        return True
+    return str(config.get("MODO_CARGA", "COMPLETO")).upper() == "INCREMENTAL"
+
+def obtener_opciones_salida(args, config):
+    """
+    Opciones del escritor CSV. Prioridad: argumentos --gzip/--nivel-gzip, luego
+    claves COMPRESION_SALIDA, NIVEL_GZIP, BUFFER_ESCRITURA_MB y DECIMALES_SALIDA.
+    """
+    compresion = 'gzip' if args.gzip else config.get("COMPRESION_SALIDA")
+    compresion = str(compresion).lower() if compresion else None
+    if compresion not in COMPRESIONES_SALIDA:
+        print(f"ADVERTENCIA: COMPRESION_SALIDA inválida ({compresion}). Se escribirá sin comprimir.")
+        compresion = None
+    try:
+        nivel = int(args.nivel_gzip if args.nivel_gzip is not None else config.get("NIVEL_GZIP", 6))
+        buffer_mb = float(config.get("BUFFER_ESCRITURA_MB", BUFFER_ESCRITURA_DEFECTO / 1048576))
+        decimales = config.get("DECIMALES_SALIDA")
+        decimales = int(decimales) if decimales is not None else None
+    except (TypeError, ValueError) as e:
+        print(f"ADVERTENCIA: Opciones de salida inválidas ({e}). Se usan los valores por defecto.")
+        nivel, buffer_mb, decimales = 6, BUFFER_ESCRITURA_DEFECTO / 1048576, None
+    return {
+        'compresion': compresion,
+        'nivel_gzip': min(max(nivel, 1), 9),
+        'tamano_buffer': max(int(buffer_mb * 1048576), 64 * 1024),
+        'decimales': decimales,
+    }
+
+def es_salida_particionada(args, config):
+    """Prioridad: argumento --particionado, luego "SALIDA_PARTICIONADA": true del config.json."""
+    return bool(args.particionado or config.get("SALIDA_PARTICIONADA", False))
+
+def es_salida_agregada(args, config):
+    """Prioridad: argumento --agregar-10min, luego "AGREGACION_10MIN": true del config.json."""
+    return bool(args.agregar_10min or config.get("AGREGACION_10MIN", False))
+
+def obtener_hilos_io(args, config):
+    """Prioridad: argumento --hilos-io, luego clave HILOS_IO del config.json, por defecto 2 (0 = sincrónico)."""
+    hilos = args.hilos_io if args.hilos_io is not None else config.get("HILOS_IO", 2)
+    try:
+        return max(int(hilos), 0)
+    except (TypeError, ValueError):
+        print(f"ADVERTENCIA: Valor de HILOS_IO inválido ({hilos}). Se usará 2.")
+        return 2
+
+def obtener_retencion_shards(config):
+    """Clave RETENCION_SHARDS_DIAS del config.json (por defecto 7; 0 = borrar al consolidar)."""
+    dias = config.get("RETENCION_SHARDS_DIAS", RETENCION_SHARDS_DIAS_DEFECTO)
+    try:
+        return max(float(dias), 0.0)
+    except (TypeError, ValueError):
+        print(f"ADVERTENCIA: Valor de RETENCION_SHARDS_DIAS inválido ({dias}). "
+              f"Se usará {RETENCION_SHARDS_DIAS_DEFECTO}.")
+        return RETENCION_SHARDS_DIAS_DEFECTO
+
+def obtener_opciones_orden(args, config, carpeta_shards):
+    """
+    Orden externo de las salidas (src/orden.py). Prioridad: argumento --ordenar,
+    luego "ORDENAR_SALIDA": true del config.json. Ver obtener_memoria_orden.
+
+    Returns:
+        dict: {'memoria_mb', 'carpeta_temporal'}, o None si no se ordena.
+    """
+    if not (args.ordenar or config.get("ORDENAR_SALIDA", False)):
+        return None
+    return obtener_memoria_orden(config, carpeta_shards)
+
+def obtener_opciones_transiciones(args, config, carpeta_shards):
+    """
+    Salida por cambios de estado de los esquemas solo de estados
+    (src/transiciones.py). Prioridad: argumento --transiciones, luego
+    "TRANSICIONES_ESTADO": true del config.json. Usa el orden externo para
+    recorrer las lecturas en orden de tiempo (ver obtener_memoria_orden).
+
+    Returns:
+        dict: {'memoria_mb', 'carpeta_temporal'}, o None si no se comprime.
+    """
+    if not (args.transiciones or config.get("TRANSICIONES_ESTADO", False)):
+        return None
+    return obtener_memoria_orden(config, carpeta_shards)
+
+def obtener_opciones_kpi(args, config, carpeta_shards):
+    """
+    KPI diarios con estado incremental (src/kpi.py). Prioridad: argumento
+    --kpi, luego "KPI_DIARIO": true del config.json. KPI_TOLERANCIA_DESVIO
+    (por defecto 2.0) y KPI_HUECO_MAXIMO_MIN (por defecto 10) fijan los
+    parámetros; el estado va a CARPETA_ESTADO_KPI (por defecto
+    <CARPETA_DESTINO_GENERAL>/_kpi). Usa el orden externo (ver obtener_memoria_orden).
+
+    Returns:
+        dict: {'parametros', 'carpeta_estado', 'nombre', 'memoria_mb',
+               'carpeta_temporal'}, o None si no se calculan.
+    """
+    if not (args.kpi or config.get("KPI_DIARIO", False)):
+        return None
+    try:
+        tolerancia = abs(float(config.get("KPI_TOLERANCIA_DESVIO", TOLERANCIA_DESVIO_DEFECTO)))
+        hueco = max(float(config.get("KPI_HUECO_MAXIMO_MIN", HUECO_MAXIMO_MIN_DEFECTO)), 0.0)
+    except (TypeError, ValueError) as e:
+        print(f"ADVERTENCIA: Parámetros de KPI inválidos ({e}). Se usan los valores por defecto.")
+        tolerancia, hueco = TOLERANCIA_DESVIO_DEFECTO, HUECO_MAXIMO_MIN_DEFECTO
+    opciones = {
+        'parametros': {'tolerancia': tolerancia, 'hueco_maximo_min': hueco},
+        'carpeta_estado': config.get("CARPETA_ESTADO_KPI") or os.path.join(
+            config.get("CARPETA_DESTINO_GENERAL") or ".", CARPETA_ESTADO_KPI),
+        'nombre': config.get("NOMBRE_TABLA_KPI", NOMBRE_KPI_DEFECTO),
+    }
+    opciones.update(obtener_memoria_orden(config, carpeta_shards))
+    return opciones
+
+def obtener_formato_llave(args, config):
+    """
+    Formato de Llave_Comun (src/transform.py). Prioridad: argumento
+    --formato-llave, luego clave FORMATO_LLAVE_COMUN del config.json, por
+    defecto yyyymmddhhmm.
+    """
+    formato = args.formato_llave or str(config.get("FORMATO_LLAVE_COMUN", FORMATO_LLAVE_DEFECTO)).lower()
+    if formato not in FORMATOS_LLAVE:
+        print(f"ADVERTENCIA: FORMATO_LLAVE_COMUN inválido ({formato}). Se usará {FORMATO_LLAVE_DEFECTO}.")
+        formato = FORMATO_LLAVE_DEFECTO
+    return formato
+
+def obtener_opciones_dim_tiempo(args, config):
+    """
+    Dimensión de tiempo (src/dim_tiempo.py). Prioridad: argumento --dim-tiempo,
+    luego "DIM_TIEMPO": true del config.json. NOMBRE_DIM_TIEMPO fija el nombre
+    (por defecto dim_tiempo.csv) y TURNOS_DIM_TIEMPO los turnos como
+    {nombre: "HH:MM" de inicio}.
+
+    Returns:
+        dict: {'nombre', 'turnos'}, o None si no se genera.
+    """
+    if not (args.dim_tiempo or config.get("DIM_TIEMPO", False)):
+        return None
+    turnos = config.get("TURNOS_DIM_TIEMPO") or TURNOS_DEFECTO
+    try:
+        turno_por_intervalo(turnos)
+    except (AttributeError, TypeError, ValueError) as e:
+        print(f"ADVERTENCIA: TURNOS_DIM_TIEMPO inválido ({e}). Se usan los turnos por defecto.")
+        turnos = TURNOS_DEFECTO
+    return {'nombre': config.get("NOMBRE_DIM_TIEMPO", NOMBRE_DIM_TIEMPO_DEFECTO), 'turnos': dict(turnos)}
+
+def obtener_memoria_orden(config, carpeta_shards):
+    """
+    Presupuesto del orden externo: MEMORIA_ORDEN_MB (por defecto 256) y runs
+    temporales en CARPETA_TEMPORAL_ORDEN (por defecto <CARPETA_SHARDS>/_orden).
+    """
+    memoria = config.get("MEMORIA_ORDEN_MB", MEMORIA_ORDEN_MB_DEFECTO)
+    try:
+        memoria = max(float(memoria), 1.0)
+    except (TypeError, ValueError):
+        print(f"ADVERTENCIA: Valor de MEMORIA_ORDEN_MB inválido ({memoria}). Se usará {MEMORIA_ORDEN_MB_DEFECTO}.")
+        memoria = MEMORIA_ORDEN_MB_DEFECTO
+    return {
+        'memoria_mb': memoria,
+        'carpeta_temporal': config.get("CARPETA_TEMPORAL_ORDEN") or os.path.join(carpeta_shards, "_orden"),
+    }
+
+def obtener_destino_sqlite(args, config):
+    """
+    Destino de carga (src/carga_sqlite.py). Prioridad: argumento
+    --destino-carga, luego clave DESTINO_CARGA del config.json, por defecto
+    csv. La base es RUTA_SQLITE (por defecto <CARPETA_DESTINO_GENERAL>/sitrad.db)
+    y LOTE_SQLITE las filas por executemany.
+
+    Returns:
+        dict: {'ruta', 'tamano_lote'}, o None si se escriben CSV.
+    """
+    destino = args.destino_carga or str(config.get("DESTINO_CARGA", "csv")).lower()
+    if destino not in DESTINOS_CARGA:
+        print(f"ADVERTENCIA: DESTINO_CARGA inválido ({destino}). Se escribirán CSV.")
+        return None
+    if destino != 'sqlite':
+        return None
+    tamano_lote = config.get("LOTE_SQLITE", LOTE_SQLITE_DEFECTO)
+    try:
+        tamano_lote = max(int(tamano_lote), 1)
+    except (TypeError, ValueError):
+        print(f"ADVERTENCIA: Valor de LOTE_SQLITE inválido ({tamano_lote}). Se usará {LOTE_SQLITE_DEFECTO}.")
+        tamano_lote = LOTE_SQLITE_DEFECTO
+    return {
+        'ruta': config.get("RUTA_SQLITE") or os.path.join(config.get("CARPETA_DESTINO_GENERAL") or ".",
+                                                          NOMBRE_BASE_DEFECTO),
+        'tamano_lote': tamano_lote,
+    }
+
+def obtener_opciones_preescaneo(config):
+    """
+    Preescaneo de la bandeja (src/preescaneo.py): "PREESCANEO" (por defecto
+    true) y COLUMNAS_FALTANTES_TOLERADAS (por defecto 0) del config.json.
+
+    Returns:
+        dict: {'faltantes_tolerados'}, o None si no se preescanea.
+    """
+    if not config.get("PREESCANEO", True):
+        return None
+    tolerados = config.get("COLUMNAS_FALTANTES_TOLERADAS", 0)
+    try:
+        tolerados = max(int(tolerados), 0)
+    except (TypeError, ValueError):
+        print(f"ADVERTENCIA: Valor de COLUMNAS_FALTANTES_TOLERADAS inválido ({tolerados}). Se usará 0.")
+        tolerados = 0
+    return {'faltantes_tolerados': tolerados}
+
+def es_tabla_unificada(args, config):
+    """Prioridad: argumento --unificar, luego "TABLA_UNIFICADA": true del config.json."""
+    return bool(args.unificar or config.get("TABLA_UNIFICADA", False))
+
+def es_modo_perfil(args, config):
+    """Prioridad: argumento --perfil, luego "PERFILAR": true del config.json."""
+    return bool(args.perfil or config.get("PERFILAR", False))
+
+def obtener_opciones_vigilancia(config):
+    """Claves INTERVALO_VIGILANCIA_SEG, SEGUNDOS_ESTABLE y LOTE_MAXIMO del config.json."""
+    try:
+        intervalo = float(config.get("INTERVALO_VIGILANCIA_SEG", 2))
+        segundos_estable = float(config.get("SEGUNDOS_ESTABLE", 3))
+        lote_maximo = int(config.get("LOTE_MAXIMO", 20))
+    except (TypeError, ValueError) as e:
+        print(f"ADVERTENCIA: Opciones de vigilancia inválidas ({e}). Se usan los valores por defecto.")
+        intervalo, segundos_estable, lote_maximo = 2.0, 3.0, 20
+    return {
+        'intervalo': max(intervalo, 0.2),
+        'segundos_estable': max(segundos_estable, 0.0),
+        'lote_maximo': max(lote_maximo, 1),
+    }
 
+def parsear_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="ETL de archivos Sitrad (multi-esquema).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos para extracción+transformación en paralelo "
+                             "(1 = secuencial, 0 = todos los núcleos).")
+    parser.add_argument("--lector", choices=LECTORES_EXCEL, default=None,
+                        help="Lector de Excel: openpyxl (por defecto) o directo "
+                             "(zipfile + XML, sin openpyxl).")
+    parser.add_argument("--hilos-io", type=int, default=None,
+                        help="Hilos de E/S en segundo plano para archivar y escribir los CSV "
+                             "(por defecto 2; 0 = todo sincrónico).")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Anexar solo filas nuevas a los CSV existentes "
+                             "(descarta lecturas ya cargadas).")
+    parser.add_argument("--destino-carga", choices=DESTINOS_CARGA, default=None,
+                        help="Destino de la carga: un CSV por grupo (por defecto) o una tabla "
+                             "por grupo en la base SQLite RUTA_SQLITE.")
+    parser.add_argument("--gzip", action="store_true",
+                        help="Comprimir los CSV consolidados (.csv.gz).")
+    parser.add_argument("--nivel-gzip", type=int, default=None,
+                        help="Nivel de compresión gzip 1-9 (por defecto 6).")
+    parser.add_argument("--particionado", action="store_true",
+                        help="Escribir Export/<PROCESO>/Anio=YYYY/Mes=MM/part-*.csv "
+                             "reescribiendo solo los meses con datos nuevos.")
+    parser.add_argument("--agregar-10min", action="store_true",
+                        help="Escribir sensores y presión resumidos por intervalo de 10 minutos "
+                             "(lecturas, promedio/mín/máx y último estado) en lugar de cada lectura.")
+    parser.add_argument("--transiciones", action="store_true",
+                        help="Escribir los compresores (esquemas solo de estados) como una fila por "
+                             "cambio de estado, con inicio, fin y duración de cada tramo.")
+    parser.add_argument("--ordenar", action="store_true",
+                        help="Escribir cada salida ordenada por Llave_Comun, identificador y "
+                             "FechaHora_Original (orden externo con MEMORIA_ORDEN_MB de memoria).")
+    parser.add_argument("--kpi", action="store_true",
+                        help="Mantener KPI diarios por pasillo/sistema (promedio, mín/máx, p95, tiempo "
+                             "fuera de tolerancia, descongelamiento) con estado incremental (NOMBRE_TABLA_KPI).")
+    parser.add_argument("--formato-llave", choices=FORMATOS_LLAVE, default=None,
+                        help="Formato de Llave_Comun: yyyymmddhhmm (legible, por defecto) o minutos "
+                             "(minutos desde 1970, más corta). Cambiarlo requiere una carga completa.")
+    parser.add_argument("--dim-tiempo", action="store_true",
+                        help="Generar la dimensión de tiempo (NOMBRE_DIM_TIEMPO) con una fila por "
+                             "intervalo de 10 minutos del rango de los datos.")
+    parser.add_argument("--unificar", action="store_true",
+                        help="Unir sensores, presión y compresores por Llave_Comun en una "
+                             "tabla de hechos única (NOMBRE_TABLA_UNIFICADA).")
+    parser.add_argument("--perfil", action="store_true",
+                        help="Guardar un perfil cProfile de la corrida y el pico de memoria "
+                             "(tracemalloc) de cada archivo en la carpeta de reportes.")
+    parser.add_argument("--vigilar", action="store_true",
+                        help="Modo servicio: vigilar las carpetas INPUT y procesar cada "
+                             "archivo en cuanto termina de copiarse.")
+    parser.add_argument("--config", default="config.json",
+                        help="Ruta del archivo de configuración.")
+    return parser.parse_args(argv)
+
+def preparar_contexto(args, config):
+    """
+    Resuelve una sola vez las rutas y opciones de la corrida (lector, modo de
+    carga, salida, shards, reportes). En modo servicio el mismo contexto se
+    reutiliza en cada lote.
+
+    Returns:
+        dict: Contexto de la corrida, o None si no hay procesos definidos.
+    """
     # Rutas generales
-    OUT_DIR_GENERAL = config.get("CARPETA_DESTINO_GENERAL")
-    ARCHIVE_DIR_GENERAL = config.get("CARPETA_ARCHIVADOS_GENERAL")
     PROCESOS = config.get("RUTAS_PROCESO", {})
-
     if not PROCESOS:
         print("ADVERTENCIA: No se encontraron procesos definidos en 'RUTAS_PROCESO'.")
-        return
+        return None
+    ARCHIVE_DIR_GENERAL = config.get("CARPETA_ARCHIVADOS_GENERAL")
 
-    # Iterar sobre cada proceso configurado (PASILLOS, PRESION, COMPRESORES, etc.)
-    for nombre_proceso, rutas in PROCESOS.items():
-        print(f"\n>>> PROCESANDO GRUPO: {nombre_proceso}")
-        
+    workers = obtener_numero_workers(args, config)
+    if workers > 1:
+        print(f"Modo paralelo: {workers} workers.")
+
+    lector = obtener_lector_excel(args, config)
+    if lector != 'openpyxl':
+        print(f"Lector de Excel: {lector}.")
+
+    incremental = es_modo_incremental(args, config)
+    opciones_salida = obtener_opciones_salida(args, config)
+    if opciones_salida['compresion']:
+        print(f"Salida comprimida: {opciones_salida['compresion']} (nivel {opciones_salida['nivel_gzip']}).")
+
+    sqlite = obtener_destino_sqlite(args, config)
+    particionado = es_salida_particionada(args, config)
+    if sqlite:
+        print(f"Destino de carga: SQLite ({sqlite['ruta']}), una tabla por grupo.")
+        if particionado:
+            print("ADVERTENCIA: La salida particionada no aplica a SQLite. Se ignora.")
+            particionado = False
+    if particionado:
+        # Cada partición tocada se reescribe sin repetidos: ya es incremental
+        print("Salida particionada por Anio/Mes: solo se reescriben los meses con datos nuevos.")
+    elif incremental:
+        print("Modo incremental: se anexan solo filas nuevas a los CSV existentes.")
+
+    agregar = es_salida_agregada(args, config)
+    if agregar:
+        print("Salida agregada por intervalos de 10 minutos (sensores y presión).")
+
+    # Shards intermedios y ledger por grupo (por defecto dentro de Archive)
+    carpeta_shards = config.get("CARPETA_SHARDS") or os.path.join(ARCHIVE_DIR_GENERAL, "_shards")
+
+    orden = obtener_opciones_orden(args, config, carpeta_shards)
+    if orden:
+        print(f"Salida ordenada por Llave_Comun/identificador/fecha (orden externo, {orden['memoria_mb']:g} MB).")
+
+    transiciones = obtener_opciones_transiciones(args, config, carpeta_shards)
+    if transiciones:
+        print("Salida por cambios de estado (compresores): una fila por tramo de estados iguales.")
+
+    kpi = obtener_opciones_kpi(args, config, carpeta_shards)
+    if kpi:
+        print(f"KPI diarios con estado incremental (tolerancia de desvío {kpi['parametros']['tolerancia']:g}).")
+
+    formato_llave = obtener_formato_llave(args, config)
+    if formato_llave != FORMATO_LLAVE_DEFECTO:
+        print(f"Llave_Comun en formato {formato_llave}.")
+
+    dim_tiempo = obtener_opciones_dim_tiempo(args, config)
+    if dim_tiempo:
+        print(f"Dimensión de tiempo: {dim_tiempo['nombre']} (turnos {', '.join(dim_tiempo['turnos'])}).")
+
+    unificar = es_tabla_unificada(args, config)
+    if unificar:
+        print("Tabla unificada: sensores + presión + compresores por Llave_Comun.")
+
+    perfilar = es_modo_perfil(args, config)
+    return {
+        'procesos': PROCESOS,
+        'destino': config.get("CARPETA_DESTINO_GENERAL"),
+        'archivados': ARCHIVE_DIR_GENERAL,
+        'shards': carpeta_shards,
+        'retencion_shards_dias': obtener_retencion_shards(config),
+        # Reporte de la corrida (y perfiles en modo perfil), por defecto en Archive/_reportes
+        'reportes': config.get("CARPETA_REPORTES") or os.path.join(ARCHIVE_DIR_GENERAL, "_reportes"),
+        'workers': workers,
+        'hilos_io': obtener_hilos_io(args, config),
+        'lector': lector,
+        'preescaneo': obtener_opciones_preescaneo(config),
+        'incremental': incremental,
+        'opciones_salida': opciones_salida,
+        'sqlite': sqlite,
+        'particionado': particionado,
+        'agregar': agregar,
+        'transiciones': transiciones,
+        'orden': orden,
+        # Índice lateral de tiempo de cada CSV sin comprimir (src/indice_tiempo.py)
+        'indice_tiempo': bool(config.get("INDICE_TIEMPO", True)),
+        'kpi': kpi,
+        'formato_llave': formato_llave,
+        'dim_tiempo': dim_tiempo,
+        'unificar': unificar,
+        'nombre_union': config.get("NOMBRE_TABLA_UNIFICADA", "fact_sitrad.csv"),
+        'perfilar': perfilar,
+    }
+
+def descubrir_trabajos(contexto, archivos_por_proceso=None):
+    """
+    Lista de (nombre_proceso, rutas, carpeta_shards, archivos) por grupo.
+    Sin 'archivos_por_proceso' se listan las carpetas INPUT; en modo servicio
+    llega {proceso: [rutas listas]} y solo se incluyen esos grupos.
+    """
+    SHARDS_DIR_GENERAL = contexto['shards']
+
+    # 1. Descubrir los archivos de TODOS los procesos antes de empezar, para que
+    #    el pool pueda adelantar trabajo de grupos siguientes mientras se consolida uno.
+    trabajos = []
+    for nombre_proceso, rutas in contexto['procesos'].items():
         input_folder = rutas.get("INPUT")
-        output_filename = rutas.get("OUTPUT_NAME")
-        
+        carpeta_shards = os.path.join(SHARDS_DIR_GENERAL, nombre_proceso)
+        archivos = []
+
+        if archivos_por_proceso is not None:
+            if nombre_proceso not in archivos_por_proceso:
+                continue
+            archivos = archivos_por_proceso[nombre_proceso]
         # Validaciones básicas
-        if not input_folder or not os.path.exists(input_folder):
-            print(f"   Advertencia: Carpeta de entrada no existe o no definida: {input_folder}")
+        elif input_folder and os.path.exists(input_folder):
+            archivos = encontrar_archivos_por_procesar(input_folder)
+
+        trabajos.append((nombre_proceso, rutas, carpeta_shards, archivos))
+
+    return trabajos
+
+def rutas_de_salida(contexto):
+    """
+    {nombre_proceso: ruta} de las salidas consolidadas que ya existen en disco
+    (con destino SQLite, {nombre_proceso: (ruta_db, tabla)}).
+    """
+    salidas = {}
+    for nombre_proceso, rutas in contexto['procesos'].items():
+        if contexto['sqlite']:
+            ruta_db, tabla = contexto['sqlite']['ruta'], nombre_tabla(nombre_proceso)
+            if existe_tabla(ruta_db, tabla):
+                salidas[nombre_proceso] = (ruta_db, tabla)
             continue
+        if contexto['particionado']:
+            ruta = os.path.join(contexto['destino'], nombre_proceso)
+        else:
+            ruta = os.path.join(contexto['destino'], nombre_archivo_salida(
+                rutas.get("OUTPUT_NAME"), contexto['opciones_salida']['compresion']))
+        if os.path.exists(ruta):
+            salidas[nombre_proceso] = ruta
+    return salidas
 
-        archivos = encontrar_archivos_por_procesar(input_folder)
-        
-        if not archivos:
-            print("   No hay archivos nuevos para procesar.")
+def preescanear_bandeja(contexto, trabajos, executor=None):
+    """
+    Clasifica los archivos de 'trabajos' leyendo solo B1 y las cabeceras y
+    deja en cada grupo los aceptados, del más grande al más chico. Los
+    rechazados quedan en su carpeta de entrada.
+
+    Returns:
+        tuple: (trabajos, medición del preescaneo para el reporte).
+    """
+    inicio = time.perf_counter()
+    trabajos, resumen = preescanear_trabajos(trabajos, executor,
+                                             contexto['preescaneo']['faltantes_tolerados'])
+    resumen['seg_total'] = time.perf_counter() - inicio
+    if resumen['archivos']:
+        firmas = ", ".join(f"{firma}: {n}" for firma, n in sorted(resumen['firmas'].items()))
+        print(f"\n>>> PREESCANEO: {resumen['archivos']} archivo(s) en {resumen['seg_total']:.2f} s; "
+              f"{resumen['aceptados']} aceptado(s){f' ({firmas})' if firmas else ''}, "
+              f"{len(resumen['rechazados'])} rechazado(s).")
+    for rechazo in resumen['rechazados']:
+        print(f"   [RECHAZADO] {rechazo['grupo']}/{rechazo['archivo']}: {rechazo['estado']} - {rechazo['motivo']}")
+    return trabajos, redondear(resumen)
+
+def construir_tabla_unificada(contexto):
+    """
+    Reescribe la tabla unificada (src/union.py) desde las salidas consolidadas
+    de todos los grupos, con las mismas opciones de escritura que los CSV.
+
+    Returns:
+        dict: Medición de la unión para el reporte de la corrida.
+    """
+    print(f"\n>>> TABLA UNIFICADA: {contexto['nombre_union']}")
+    opciones_salida = contexto['opciones_salida']
+    estadisticas = {}
+    inicio = time.perf_counter()
+    filas = filas_tabla_unificada(rutas_de_salida(contexto), estadisticas)
+    if contexto['sqlite']:
+        # Se reemplaza completa en cada corrida: sin clave natural
+        ruta_salida = contexto['sqlite']['ruta']
+        total = guardar_en_sqlite(filas, ruta_salida, nombre_tabla(contexto['nombre_union']),
+                                  tamano_lote=contexto['sqlite']['tamano_lote'], clave_natural=False)
+    else:
+        ruta_salida = os.path.join(contexto['destino'], nombre_archivo_salida(
+            contexto['nombre_union'], opciones_salida['compresion']))
+        total = guardar_datos_transformados(filas, contexto['destino'], contexto['nombre_union'],
+                                            indice_tiempo=contexto['indice_tiempo'], **opciones_salida)
+    if estadisticas.get('filas'):
+        print(resumen_union(estadisticas))
+    medicion = {'salida': ruta_salida,
+                'seg_total': time.perf_counter() - inicio,
+                'filas_escritas': total or 0}
+    medicion.update(estadisticas)
+    return redondear(medicion)
+
+def completar_estados_kpi(contexto):
+    """
+    Arma desde su salida consolidada el estado de KPI de los grupos que
+    todavía no lo tienen (p. ej. al activar --kpi con historia ya cargada).
+
+    Returns:
+        int: Lecturas sumadas a los estados nuevos.
+    """
+    nuevas = 0
+    for nombre_proceso, salida in rutas_de_salida(contexto).items():
+        if os.path.exists(ruta_estado_kpi(contexto['kpi']['carpeta_estado'], nombre_proceso)):
             continue
+        try:
+            nuevas += actualizar_kpis_del_grupo(contexto, nombre_proceso, salida).get('kpi_lecturas_nuevas', 0)
+        except Exception as e:
+            print(f"ERROR al armar los KPI de {nombre_proceso}: {e}")
+    return nuevas
 
-        buffer_proceso = []
-        schema_header_to_use = None # Aquí guardaremos la cabecera correcta para este lote
+def exportar_kpis(contexto):
+    """
+    Rearma la tabla de KPI diarios desde los estados de todos los grupos
+    (src/kpi.py): un CSV en la carpeta de destino o una tabla SQLite.
 
-        for filepath in archivos:
-            filename = os.path.basename(filepath)
-            
-            # 1. Extracción
-            # leer_archivo_excel cierra el archivo automáticamente ahora
-            headers, data_rows, conf = leer_archivo_excel(filepath)
-            
-            if not data_rows or not conf:
-                print(f"   [SALTADO] {filename} (No se identificó config o está vacío)")
+    Returns:
+        dict: Medición de la exportación para el reporte de la corrida.
+    """
+    opciones = contexto['kpi']
+    print(f"\n>>> KPI DIARIOS: {opciones['nombre']}")
+    inicio = time.perf_counter()
+    estados = leer_estados_kpi(opciones['carpeta_estado'])
+    filas = filas_kpi(estados)
+    if contexto['sqlite']:
+        ruta_salida = contexto['sqlite']['ruta']
+        total = reemplazar_tabla_sqlite(filas, ruta_salida, nombre_tabla(opciones['nombre']), TIPOS_SQLITE_KPI,
+                                        indices=('Fecha',), tamano_lote=contexto['sqlite']['tamano_lote'])
+        if total is not None:
+            print(f"KPI diarios: {total} filas en {ruta_salida} (tabla {nombre_tabla(opciones['nombre'])})")
+    else:
+        ruta_salida = os.path.join(contexto['destino'], nombre_archivo_salida(
+            opciones['nombre'], contexto['opciones_salida']['compresion']))
+        total = guardar_datos_transformados(filas, contexto['destino'], opciones['nombre'],
+                                            indice_tiempo=False, **contexto['opciones_salida'])
+    return redondear({'salida': ruta_salida, 'grupos': len(estados),
+                      'seg_total': time.perf_counter() - inicio, 'filas_escritas': total or 0})
+
+def cobertura_dim_tiempo(contexto):
+    """Rango (desde, hasta, formato) que ya cubre la dimensión de tiempo, o None si no existe."""
+    nombre = contexto['dim_tiempo']['nombre']
+    if contexto['sqlite']:
+        ruta_db, tabla = contexto['sqlite']['ruta'], nombre_tabla(nombre)
+        return cobertura_sqlite(ruta_db, tabla) if existe_tabla(ruta_db, tabla) else None
+    return cobertura_csv(os.path.join(contexto['destino'], nombre))
+
+def rango_de_salidas(contexto):
+    """
+    Rango de fechas de todas las salidas consolidadas, recorriéndolas una vez.
+    Solo hace falta cuando todavía no hay dimensión de tiempo.
+    """
+    rangos = []
+    for salida in rutas_de_salida(contexto).values():
+        rango = {}
+        filas = leer_tabla_sqlite(*salida) if isinstance(salida, tuple) else leer_salida_consolidada(salida)
+        for _ in registrar_rango_llaves(filas, rango):
+            pass
+        if rango.get('min') is not None:
+            rangos.append(rango_de_fechas(rango['min'], rango['max']))
+    return unir_rangos(*rangos)
+
+def actualizar_dim_tiempo(contexto, mediciones_grupos):
+    """
+    Reescribe la dimensión de tiempo (src/dim_tiempo.py) solo si las llaves
+    cargadas en esta corrida quedan fuera de su rango o si cambió el formato
+    de la llave. El rango nunca se achica.
+
+    Returns:
+        dict: Medición para el reporte, o None si no hubo que reescribirla.
+    """
+    opciones = contexto['dim_tiempo']
+    formato = contexto['formato_llave']
+    inicio = time.perf_counter()
+    cargado = unir_rangos(*(rango_de_fechas(g['llave_min'], g['llave_max'])
+                            for g in mediciones_grupos if g.get('llave_min') is not None))
+    cobertura = cobertura_dim_tiempo(contexto)
+    if cobertura is None:
+        cargado = unir_rangos(cargado, rango_de_salidas(contexto))
+    elif cobertura[2] != formato:
+        print(f"ADVERTENCIA: {opciones['nombre']} está en formato {cobertura[2]}; se reescribe en {formato}. "
+              "Las salidas ya consolidadas necesitan una carga completa para coincidir.")
+        cobertura = (cobertura[0], cobertura[1], formato)
+    elif cargado is None or (cobertura[0] <= cargado[0] and cargado[1] <= cobertura[1]):
+        return None
+    desde, hasta, _ = unir_rangos(cargado, cobertura) or (None, None, None)
+    if desde is None:
+        return None
+
+    print(f"\n>>> DIMENSIÓN DE TIEMPO: {opciones['nombre']} ({desde} a {hasta})")
+    filas = filas_dim_tiempo(desde, hasta, formato, opciones['turnos'])
+    if contexto['sqlite']:
+        ruta_salida = contexto['sqlite']['ruta']
+        total = reemplazar_tabla_sqlite(filas, ruta_salida, nombre_tabla(opciones['nombre']),
+                                        TIPOS_SQLITE_DIM_TIEMPO, indices=('Fecha',),
+                                        tamano_lote=contexto['sqlite']['tamano_lote'])
+    else:
+        # Sin comprimir: la cobertura se lee de la primera y la última fila
+        ruta_salida = os.path.join(contexto['destino'], opciones['nombre'])
+        total = guardar_datos_transformados(filas, contexto['destino'], opciones['nombre'], indice_tiempo=False,
+                                            **dict(contexto['opciones_salida'], compresion=None))
+    return redondear({'salida': ruta_salida, 'desde': desde.isoformat(), 'hasta': hasta.isoformat(),
+                      'formato_llave': formato, 'seg_total': time.perf_counter() - inicio,
+                      'filas_escritas': total or 0})
+
+def purgar_shards(contexto, trabajos):
+    """
+    Borra en cada grupo de 'trabajos' los shards consolidados hace más de
+    RETENCION_SHARDS_DIAS (src/shards.py). Un error solo se avisa: los shards
+    son caché.
+
+    Returns:
+        dict: {'shards_purgados', 'bytes_liberados'} sumados de todos los grupos.
+    """
+    total = {'shards_purgados': 0, 'bytes_liberados': 0}
+    for nombre_proceso, _, carpeta_shards, _ in trabajos:
+        try:
+            purgados = purgar_shards_consolidados(carpeta_shards, contexto['retencion_shards_dias'])
+        except OSError as e:
+            print(f"ADVERTENCIA: No se pudieron purgar los shards de {nombre_proceso}: {e}")
+            continue
+        for clave in total:
+            total[clave] += purgados[clave]
+    if total['shards_purgados']:
+        print(f"\nShards consolidados purgados: {total['shards_purgados']} "
+              f"({total['bytes_liberados'] / 1048576:.1f} MB liberados).")
+    return total
+
+def ejecutar_corrida(contexto, trabajos, executor=None):
+    """
+    Extrae, transforma y consolida los archivos de 'trabajos' (ver
+    descubrir_trabajos) y escribe el reporte de la corrida.
+
+    Returns:
+        dict: El reporte de la corrida (src/metricas.py).
+    """
+    OUT_DIR_GENERAL = contexto['destino']
+    ARCHIVE_DIR_GENERAL = contexto['archivados']
+    REPORTES_DIR = contexto['reportes']
+    lector = contexto['lector']
+    incremental = contexto['incremental']
+    opciones_salida = contexto['opciones_salida']
+    particionado = contexto['particionado']
+    perfilar = contexto['perfilar']
+
+    momento_inicio = datetime.now()
+    # Con milisegundos: en modo servicio puede haber varios lotes por segundo
+    sello = f"{momento_inicio:%Y%m%d_%H%M%S}_{momento_inicio.microsecond // 1000:03d}"
+    inicio_corrida = time.perf_counter()
+    perfil_principal = None
+    carpeta_perfiles = None
+    if perfilar:
+        print(f"Modo perfil: cProfile y tracemalloc activos (salida en {REPORTES_DIR}).")
+        carpeta_perfiles = os.path.join(REPORTES_DIR, f"perfil_{sello}_partes")
+        iniciar_traza_memoria()
+        perfil_principal = iniciar_perfil()
+    mediciones_archivos = []
+    mediciones_grupos = []
+    medicion_union = None
+    medicion_kpi = None
+    medicion_dim_tiempo = None
+    medicion_shards = None
+
+    # Preescaneo: solo B1 y cabeceras; los aceptados se procesan del más grande
+    # al más chico pero cada grupo se consolida en el orden original
+    posiciones = {fp: i for _, _, _, archivos in trabajos for i, fp in enumerate(archivos)}
+    medicion_preescaneo = None
+    if contexto['preescaneo'] is not None:
+        trabajos, medicion_preescaneo = preescanear_bandeja(contexto, trabajos, executor)
+
+    # Un único flujo de resultados para todos los grupos: con pool, mantiene
+    # 2 archivos en vuelo por worker y adelanta los del grupo siguiente.
+    # En modo perfil cada worker deja su propio perfil; en secuencial lo cubre el principal.
+    perfiles_workers = carpeta_perfiles if executor else None
+    todos_los_archivos = [(fp, carpeta_shards, lector, perfilar, perfiles_workers, contexto['formato_llave'])
+                          for _, _, carpeta_shards, archivos in trabajos for fp in archivos]
+    flujo_resultados = resultados_en_orden(todos_los_archivos, executor, ventana=contexto['workers'] * 2)
+
+    # Archivado y escritura de los CSV en segundo plano (src/io_fondo.py)
+    cola_io = crear_cola_io(contexto['hilos_io'])
+    en_curso = None
+
+    def _cerrar_en_curso():
+        nonlocal en_curso
+        cerrado, en_curso = en_curso, None
+        if cerrado:
+            mediciones_grupos.append(cerrar_grupo(cerrado))
+            mediciones_archivos.extend(cerrado[3])
+
+    try:
+        # Iterar sobre cada proceso configurado (PASILLOS, PRESION, COMPRESORES, etc.)
+        for nombre_proceso, rutas, carpeta_shards, archivos in trabajos:
+            print(f"\n>>> PROCESANDO GRUPO: {nombre_proceso}")
+
+            input_folder = rutas.get("INPUT")
+            output_filename = rutas.get("OUTPUT_NAME")
+
+            # Shards que una corrida anterior dejó sin consolidar (se cortó a mitad)
+            pendientes = shards_pendientes(carpeta_shards, cargar_ledger(carpeta_shards))
+
+            if (not input_folder or not os.path.exists(input_folder)) and not pendientes:
+                print(f"   Advertencia: Carpeta de entrada no existe o no definida: {input_folder}")
                 continue
-            
-            # 2. Transformación
-            # Ahora devuelve una TUPLA: (Filas_Limpias, Cabecera_Usada)
-            resultado = limpiar_y_estandarizar(headers, data_rows, conf)
-            
-            if resultado:
-                cleaned_rows, current_schema_header = resultado
-                
-                # Acumular filas
-                buffer_proceso.extend(cleaned_rows)
-                
-                # Capturar la cabecera (Asumimos que todos los archivos de esta carpeta usan el mismo esquema)
-                schema_header_to_use = current_schema_header
-                
-                # 3. Archivado
-                mover_a_archivados(filepath, ARCHIVE_DIR_GENERAL, nombre_proceso.capitalize())
-                print(f"   [OK] {filename}")
+
+            if not archivos and not pendientes:
+                print("   No hay archivos nuevos para procesar.")
+                continue
+
+            # Los resultados llegan en el orden original de los archivos, así el CSV
+            # es idéntico al de una ejecución secuencial.
+            inicio_grupo = time.perf_counter()
+            resultados = itertools.islice(flujo_resultados, len(archivos))
+            archivos_del_grupo = []
+            archivados = []
+            hashes = registrar_resultados_del_grupo(resultados, carpeta_shards, pendientes,
+                                                    ARCHIVE_DIR_GENERAL, nombre_proceso,
+                                                    archivos_del_grupo, cola_io, archivados, posiciones)
+            medicion_grupo = {'pendientes': len(pendientes)}
+
+            # Se escribe un solo CSV a la vez: antes de encolar esta carga se cierra la anterior,
+            # que se fue escribiendo mientras se procesaba este grupo.
+            _cerrar_en_curso()
+
+            # 4. Carga (el CSV consolidado solo concatena shards ya escritos)
+            carga = encolar(cola_io, cargar_grupo, contexto, nombre_proceso, carpeta_shards, hashes,
+                            output_filename)
+            if contexto['sqlite']:
+                nombre_salida = f"la tabla {nombre_tabla(nombre_proceso)}"
+            elif particionado:
+                nombre_salida = nombre_proceso
             else:
-                print(f"   [FALLO TRANSFORMACIÓN] {filename}")
+                nombre_salida = nombre_archivo_salida(output_filename, opciones_salida['compresion'])
+            en_curso = (nombre_proceso, carpeta_shards, hashes, archivos_del_grupo, archivados,
+                        medicion_grupo, nombre_salida, inicio_grupo, carga)
 
-        # 4. Carga (Guardar CSV consolidado del proceso)
-        if buffer_proceso and schema_header_to_use:
-            # Construimos la data final: Cabecera + Filas
-            full_data = [schema_header_to_use] + buffer_proceso
-            
-            guardar_datos_transformados(full_data, OUT_DIR_GENERAL, output_filename)
-            print(f"   -> ÉXITO: Se generó {output_filename} con {len(buffer_proceso)} registros.")
+        _cerrar_en_curso()
+
+        # 5. Tabla unificada: se rehace solo si algún grupo cambió (o si aún no existe)
+        if contexto['unificar']:
+            if contexto['sqlite']:
+                existe_union = existe_tabla(contexto['sqlite']['ruta'], nombre_tabla(contexto['nombre_union']))
+            else:
+                existe_union = os.path.exists(os.path.join(OUT_DIR_GENERAL, nombre_archivo_salida(
+                    contexto['nombre_union'], opciones_salida['compresion'])))
+            if any(g['filas_escritas'] for g in mediciones_grupos) or not existe_union:
+                medicion_union = construir_tabla_unificada(contexto)
+
+        # 6. KPI diarios: la tabla se rearma desde los estados si alguno cambió
+        if contexto['kpi']:
+            completados = completar_estados_kpi(contexto)
+            if contexto['sqlite']:
+                existe_kpi = existe_tabla(contexto['sqlite']['ruta'], nombre_tabla(contexto['kpi']['nombre']))
+            else:
+                existe_kpi = os.path.exists(os.path.join(OUT_DIR_GENERAL, nombre_archivo_salida(
+                    contexto['kpi']['nombre'], opciones_salida['compresion'])))
+            if completados or any(g.get('kpi_lecturas_nuevas') for g in mediciones_grupos) or not existe_kpi:
+                medicion_kpi = exportar_kpis(contexto)
+
+        # 7. Dimensión de tiempo: se reescribe solo si hay llaves fuera de su rango
+        if contexto['dim_tiempo']:
+            medicion_dim_tiempo = actualizar_dim_tiempo(contexto, mediciones_grupos)
+
+        # Shards consolidados fuera del plazo de retención: en el ledger queda su hash
+        medicion_shards = purgar_shards(contexto, trabajos)
+    finally:
+        # La E/S encolada termina antes del reporte: si la corrida se cortó, la
+        # carga ya encolada se completa y se cierra (el resto queda 'listo' en el ledger)
+        try:
+            _cerrar_en_curso()
+        finally:
+            cerrar_cola_io(cola_io)
+
+        # 8. Reporte de la corrida (también si se cortó a mitad)
+        reporte = {
+            'inicio': momento_inicio.isoformat(timespec='seconds'),
+            'fin': datetime.now().isoformat(timespec='seconds'),
+            'segundos': round(time.perf_counter() - inicio_corrida, 3),
+            'opciones': {'workers': contexto['workers'], 'hilos_io': contexto['hilos_io'], 'lector': lector, 'incremental': incremental,
+                         'destino_carga': 'sqlite' if contexto['sqlite'] else 'csv',
+                         'particionado': particionado, 'compresion': opciones_salida['compresion'],
+                         'agregado_10min': contexto['agregar'], 'transiciones': bool(contexto['transiciones']),
+                         'ordenado': bool(contexto['orden']), 'unificada': contexto['unificar'],
+                         'kpi': bool(contexto['kpi']), 'formato_llave': contexto['formato_llave'],
+                         'dim_tiempo': bool(contexto['dim_tiempo']),
+                         'perfil': perfilar},
+            'totales': {
+                'archivos': len(mediciones_archivos),
+                'filas_escritas': sum(g['filas_escritas'] for g in mediciones_grupos),
+                'bytes_escritos': sum(g['bytes_escritos'] for g in mediciones_grupos),
+                'rss_max_mb': pico_rss_mb(),
+            },
+            'grupos': mediciones_grupos,
+            'archivos': mediciones_archivos,
+        }
+        if medicion_preescaneo is not None:
+            reporte['preescaneo'] = medicion_preescaneo
+        if medicion_union is not None:
+            reporte['union'] = medicion_union
+        if medicion_kpi is not None:
+            reporte['kpi'] = medicion_kpi
+        if medicion_dim_tiempo is not None:
+            reporte['dim_tiempo'] = medicion_dim_tiempo
+        if medicion_shards is not None:
+            reporte['shards'] = medicion_shards
+        if perfilar:
+            guardar_perfil(perfil_principal, os.path.join(carpeta_perfiles, "principal.prof"))
+            reporte['totales']['pico_traza_mb'] = pico_traza_mb(detener=True)
+            partes = [os.path.join(carpeta_perfiles, f) for f in os.listdir(carpeta_perfiles)]
+            ruta_perfil = combinar_perfiles(partes, os.path.join(REPORTES_DIR, f"perfil_{sello}.prof"))
+            shutil.rmtree(carpeta_perfiles, ignore_errors=True)
+            if ruta_perfil:
+                print(f"\nPerfil de la corrida: {ruta_perfil} (resumen en .txt)")
+        ruta_reporte = escribir_reporte(REPORTES_DIR, sello, reporte)
+        if ruta_reporte:
+            print(f"\nReporte de la corrida: {ruta_reporte}")
+
+    return reporte
+
+def _detener_servicio(signum, frame):
+    raise KeyboardInterrupt
+
+def vigilar_carpetas(contexto, executor, intervalo, segundos_estable, lote_maximo):
+    """
+    Modo servicio: sondea las carpetas INPUT cada 'intervalo' segundos y, en
+    cuanto hay archivos estables y completos (src/vigilancia.py), los procesa en
+    lotes de hasta 'lote_maximo' con ejecutar_corrida. El proceso, el pool de
+    workers y los planes de transformación quedan calientes entre lotes.
+    Se detiene con Ctrl+C (entre lotes; un lote cortado se retoma por el ledger).
+    """
+    carpetas = {}
+    for nombre_proceso, rutas in contexto['procesos'].items():
+        input_folder = rutas.get("INPUT")
+        if input_folder and os.path.isdir(input_folder):
+            carpetas[nombre_proceso] = input_folder
+        else:
+            print(f"   Advertencia: Carpeta de entrada no existe o no definida: {input_folder}")
+    if not carpetas:
+        print("ERROR: No hay carpetas de entrada que vigilar.")
+        return
+
+    print(f"\nMODO SERVICIO: vigilando {len(carpetas)} carpetas cada {intervalo:g} s "
+          f"(archivo listo tras {segundos_estable:g} s sin cambios). Ctrl+C para detener.")
+
+    # Un servicio de Windows/systemd se detiene con SIGTERM: se trata igual que Ctrl+C
+    signal.signal(signal.SIGTERM, _detener_servicio)
+
+    seguimiento = {}
+    try:
+        while True:
+            firmas = {}
+            proceso_de = {}
+            for nombre_proceso, carpeta in carpetas.items():
+                for ruta, firma in escanear_carpeta(carpeta).items():
+                    firmas[ruta] = firma
+                    proceso_de[ruta] = nombre_proceso
+            actualizar_seguimiento(seguimiento, firmas)
+
+            listos = archivos_listos(seguimiento, segundos_estable)[:lote_maximo]
+            if not listos:
+                time.sleep(intervalo)
+                continue
+
+            marcar_entregados(seguimiento, listos)
+            archivos_por_proceso = {}
+            for ruta in listos:
+                archivos_por_proceso.setdefault(proceso_de[ruta], []).append(ruta)
+            llegada = min(seguimiento[ruta]['visto'] for ruta in listos)
+
+            print(f"\n>>> LOTE {datetime.now():%H:%M:%S}: {len(listos)} archivo(s) listo(s)")
+            ejecutar_corrida(contexto, descubrir_trabajos(contexto, archivos_por_proceso), executor)
+            print(f"<<< Lote exportado {time.time() - llegada:.1f} s después de la llegada del primer archivo.")
+            # Sin pausa: puede haber más archivos listos esperando
+    except KeyboardInterrupt:
+        print("\nModo servicio detenido.")
+
+def main(argv=None):
+    print("==================================================")
+    print("       INICIO DEL PROCESO ETL (MULTI-SCHEMA)      ")
+    print("==================================================")
+
+    args = parsear_argumentos(argv)
+    config = cargar_configuracion_rutas(args.config)
+    if not config: return
+
+    contexto = preparar_contexto(args, config)
+    if not contexto: return
+
+    if args.vigilar and not (contexto['incremental'] or contexto['particionado']):
+        # Cada lote trae solo sus archivos: reescribir el CSV perdería los lotes anteriores
+        print("Modo servicio: se activa la carga incremental (cada lote anexa al CSV).")
+        contexto['incremental'] = True
+
+    workers = contexto['workers']
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    try:
+        if args.vigilar:
+            vigilar_carpetas(contexto, executor, **obtener_opciones_vigilancia(config))
         else:
-            print(f"   -> FINALIZADO: No se generaron datos válidos para {nombre_proceso}.")
+            ejecutar_corrida(contexto, descubrir_trabajos(contexto), executor)
+    finally:
+        if executor:
+            executor.shutdown()
 
     print("\n==================================================")
     print("             PROCESO ETL FINALIZADO               ")
     print("==================================================")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,155 @@
+# src/agregacion.py
+"""
+Pre-agregación por intervalos de 10 minutos (Llave_Comun) para las salidas con
+campos numéricos (sensores y presión).
+
+Por cada (Llave_Comun, identificador) se emite una fila con la cantidad de
+lecturas, promedio/mínimo/máximo/cantidad de cada campo numérico y el último
+valor de las columnas de estado (Proceso_Actual, Salida_*...). Se hace en una
+sola pasada sobre el flujo de filas con un número acotado de intervalos
+abiertos en memoria.
+
+Con la Llave_Comun por defecto (yyyymmddhhmm) las lecturas de 23:55 a 23:59
+llevan la llave de las 00:00 del MISMO día (src/transform.py), así que se
+resumen en esa misma fila junto con las de las 00:00 reales de ese día. Con
+FORMATO_LLAVE_COMUN 'minutos' su llave es la de las 00:00 del día siguiente y
+cada intervalo tiene solo sus lecturas.
+"""
+from src.config import obtener_campos_numericos, obtener_columna_identificador
+from src.transform import normalizar_momento
+
+# Intervalos abiertos a la vez. Las lecturas de un archivo vienen ordenadas en
+# el tiempo, así que un intervalo ya no recibe filas mucho después de abrirse;
+# si excepcionalmente vuelve a aparecer tras cerrarse, sale como otra fila con
+# cantidades sumables.
+LIMITE_INTERVALOS_ABIERTOS = 4096
+
+# Columnas que se copian de la primera lectura del intervalo (todas iguales dentro de él)
+COLUMNAS_DEL_INTERVALO = ['Pasillo_est', 'Anio', 'Mes', 'Dia', 'Hora_10min']
+SUFIJOS_ESTADISTICAS = ('_prom', '_min', '_max', '_n')
+
+def _columnas(cabecera):
+    """(fijas, numéricos, estados) de una cabecera cruda, o None si no se agrega."""
+    if 'Lecturas' in cabecera:
+        return None  # Ya es una salida agregada
+    numericos = [c for c in obtener_campos_numericos(cabecera) if c in cabecera]
+    id_col = obtener_columna_identificador(cabecera)
+    if not numericos or not id_col or 'Llave_Comun' not in cabecera or 'FechaHora_Original' not in cabecera:
+        return None
+    fijas = ['Llave_Comun', id_col] + [c for c in COLUMNAS_DEL_INTERVALO if c in cabecera]
+    estados = [c for c in cabecera if c not in fijas and c not in numericos and c != 'FechaHora_Original']
+    return fijas, numericos, estados
+
+def esquema_agregado(cabecera):
+    """
+    Cabecera de salida agregada para una cabecera de filas crudas, o None si el
+    esquema no tiene campos numéricos (p. ej. compresores) y no se agrega.
+    FechaHora_Original pasa a ser la última lectura del intervalo.
+    """
+    columnas = _columnas(list(cabecera))
+    if columnas is None:
+        return None
+    fijas, numericos, estados = columnas
+    estadisticas = [f"{campo}{sufijo}" for campo in numericos for sufijo in SUFIJOS_ESTADISTICAS]
+    return fijas + ['FechaHora_Original', 'Lecturas'] + estadisticas + estados
+
+def a_numero(val):
+    """float de un valor numérico (o su texto en un CSV); None si está vacío o no es un número."""
+    if val is None or val == '':
+        return None
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return None
+
+def agregar_intervalos(cabecera, filas, estadisticas=None):
+    """
+    Agrega 'filas' (crudas, con 'cabecera') por intervalo de 10 minutos.
+
+    Las lecturas repetidas (mismo identificador y FechaHora_Original, típicas de
+    exportes solapados) se cuentan una sola vez. Las filas sin Llave_Comun no
+    pueden ubicarse en un intervalo y se descartan.
+
+    Returns:
+        tuple: (cabecera_agregada, generador_de_filas). Si el esquema no se
+               agrega, devuelve (cabecera, filas) sin cambios.
+    """
+    cabecera = list(cabecera)
+    salida = esquema_agregado(cabecera)
+    if salida is None:
+        return cabecera, filas
+    if estadisticas is None:
+        estadisticas = {}
+    return salida, _agregar(cabecera, filas, estadisticas)
+
+def _agregar(cabecera, filas, estadisticas):
+    fijas, numericos, estados = _columnas(cabecera)
+    idx_llave, idx_id = cabecera.index(fijas[0]), cabecera.index(fijas[1])
+    idx_fijas = [cabecera.index(c) for c in fijas[2:]]
+    idx_fecha = cabecera.index('FechaHora_Original')
+    idx_numericos = [cabecera.index(c) for c in numericos]
+    idx_estados = [cabecera.index(c) for c in estados]
+
+    for clave in ('lecturas', 'repetidas', 'sin_fecha', 'intervalos'):
+        estadisticas.setdefault(clave, 0)
+
+    # Intervalo abierto: [fijas, momentos_vistos, ultimo_momento, fecha_original,
+    #                     estados, stats] con stats = [n, suma, min, max] por campo
+    abiertos = {}
+
+    def _fila_de(clave, intervalo):
+        fijas, momentos, _, fecha_original, estados, stats = intervalo
+        fila = [clave[0], clave[1]] + fijas + [fecha_original, len(momentos)]
+        for n, suma, minimo, maximo in stats:
+            fila.extend((round(suma / n, 4) if n else None, minimo, maximo, n))
+        fila.extend(estados)
+        estadisticas['intervalos'] += 1
+        return fila
+
+    for fila in filas:
+        estadisticas['lecturas'] += 1
+        llave = fila[idx_llave]
+        momento = normalizar_momento(fila[idx_fecha])
+        if llave is None or llave == '' or momento is None:
+            estadisticas['sin_fecha'] += 1
+            continue
+
+        clave = (llave, fila[idx_id])
+        intervalo = abiertos.get(clave)
+        if intervalo is None:
+            if len(abiertos) >= LIMITE_INTERVALOS_ABIERTOS:
+                mas_antigua = next(iter(abiertos))
+                yield _fila_de(mas_antigua, abiertos.pop(mas_antigua))
+            intervalo = abiertos[clave] = [
+                [fila[i] for i in idx_fijas], set(), '', None,
+                [None] * len(idx_estados), [[0, 0.0, None, None] for _ in idx_numericos]]
+        elif momento in intervalo[1]:
+            estadisticas['repetidas'] += 1
+            continue
+
+        intervalo[1].add(momento)
+        if momento >= intervalo[2]:
+            intervalo[2] = momento
+            intervalo[3] = fila[idx_fecha]
+            intervalo[4] = [fila[i] for i in idx_estados]
+
+        for stats, i in zip(intervalo[5], idx_numericos):
+            valor = a_numero(fila[i])
+            if valor is None:
+                continue
+            stats[0] += 1
+            stats[1] += valor
+            if stats[2] is None or valor < stats[2]:
+                stats[2] = valor
+            if stats[3] is None or valor > stats[3]:
+                stats[3] = valor
+
+    for clave, intervalo in abiertos.items():
+        yield _fila_de(clave, intervalo)
+
+def resumen_agregacion(estadisticas):
+    """Línea de consola con el efecto de la agregación."""
+    lecturas, intervalos = estadisticas.get('lecturas', 0), estadisticas.get('intervalos', 0)
+    factor = f" (x{lecturas / intervalos:.1f} menos filas)" if intervalos else ""
+    return (f"Agregación 10 min: {lecturas} lecturas -> {intervalos} intervalos{factor}; "
+            f"repetidas: {estadisticas.get('repetidas', 0)}, sin fecha: {estadisticas.get('sin_fecha', 0)}")
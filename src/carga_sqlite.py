@@ -0,0 +1,304 @@
+# src/carga_sqlite.py
+"""
+Destino de carga alternativo: una base SQLite local en lugar de un CSV por
+grupo. Cada proceso (PASILLOS, PRESION, COMPRESORES, ...) queda en su propia
+tabla con las columnas de su esquema de salida (COLUMNAS_SALIDA_SENSORES,
+_PRESION, _COMPRESORES o el derivado de --agregar-10min / --transiciones).
+
+  - Inserción por lotes (executemany) dentro de una sola transacción por
+    grupo: si la carga falla, la tabla queda como estaba.
+  - Modo WAL: los lectores (Power BI, consultas) no bloquean la carga.
+  - Clave natural (identificador, Momento), donde Momento es FechaHora_Original
+    normalizada; las filas repetidas se resuelven con un upsert.
+  - Índices por Llave_Comun y por identificador (el de la clave natural).
+
+Como con los CSV, la carga completa reemplaza la tabla y la incremental
+agrega solo lecturas posteriores a las marcas de agua, que salen de la propia
+tabla (no hay índice .marcas.json).
+"""
+import os
+import re
+import sqlite3
+import time
+from src.config import obtener_columna_identificador, obtener_campos_numericos
+from src.transform import normalizar_momento
+from src.load import filtrar_filas_nuevas
+from src.agregacion import agregar_intervalos, esquema_agregado, resumen_agregacion
+from src.transiciones import comprimir_transiciones, esquema_transiciones, resumen_transiciones
+
+DESTINOS_CARGA = ('csv', 'sqlite')
+NOMBRE_BASE_DEFECTO = "sitrad.db"
+LOTE_SQLITE_DEFECTO = 5000
+# Columna agregada a cada tabla con clave natural
+COLUMNA_MOMENTO = 'Momento'
+COLUMNAS_ENTERAS = ('Llave_Comun', 'Llave_Comun_Fin', 'Anio', 'Mes', 'Dia', 'Lecturas')
+
+def nombre_tabla(nombre):
+    """Nombre de tabla para un proceso o archivo: 'PRESION' -> 'presion', 'fact_sitrad.csv' -> 'fact_sitrad'."""
+    nombre = re.sub(r'\.(csv|gz)$', '', re.sub(r'\.gz$', '', str(nombre)), flags=re.IGNORECASE)
+    nombre = re.sub(r'\W+', '_', nombre).strip('_').lower()
+    return nombre if nombre and not nombre[0].isdigit() else f"t_{nombre}"
+
+def _citar(nombre):
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+def conectar_sqlite(ruta_db):
+    """Conexión en modo WAL y con transacciones explícitas (BEGIN/COMMIT)."""
+    carpeta = os.path.dirname(ruta_db)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    conexion = sqlite3.connect(ruta_db, isolation_level=None)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    # En WAL, NORMAL no pierde consistencia ante un corte (solo la última transacción)
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    return conexion
+
+def columnas_tabla(conexion, tabla):
+    """Columnas de 'tabla' en orden, o [] si no existe."""
+    return [fila[1] for fila in conexion.execute(f"PRAGMA table_info({_citar(tabla)})")]
+
+def existe_tabla(ruta_db, tabla):
+    """True si la base existe y tiene 'tabla'."""
+    if not os.path.isfile(ruta_db):
+        return False
+    conexion = sqlite3.connect(ruta_db)
+    try:
+        return bool(columnas_tabla(conexion, tabla))
+    finally:
+        conexion.close()
+
+def _tipo_columna(columna, numericos):
+    if columna in COLUMNAS_ENTERAS:
+        return 'INTEGER'
+    if columna in numericos or columna == 'Duracion_Min':
+        return 'REAL'
+    return 'TEXT'
+
+def _crear_tabla(conexion, tabla, cabecera, id_col, clave_natural):
+    numericos = set(obtener_campos_numericos(cabecera))
+    columnas = [f"{_citar(c)} {_tipo_columna(c, numericos)}" for c in cabecera]
+    if clave_natural:
+        columnas.append(f"{_citar(COLUMNA_MOMENTO)} TEXT")
+    conexion.execute(f"CREATE TABLE {_citar(tabla)} ({', '.join(columnas)})")
+    if clave_natural:
+        # Antes de insertar: el upsert necesita el índice único
+        conexion.execute(f"CREATE UNIQUE INDEX {_citar('ux_' + tabla + '_clave')} "
+                         f"ON {_citar(tabla)} ({_citar(id_col)}, {_citar(COLUMNA_MOMENTO)})")
+
+def _crear_indices(conexion, tabla, id_col, clave_natural):
+    """Índices de consulta (después de la inserción masiva, que así es más rápida)."""
+    conexion.execute(f"CREATE INDEX IF NOT EXISTS {_citar('ix_' + tabla + '_llave')} "
+                     f"ON {_citar(tabla)} ({_citar('Llave_Comun')})")
+    if not clave_natural:
+        # Con clave natural, el índice único ya empieza por el identificador
+        conexion.execute(f"CREATE INDEX IF NOT EXISTS {_citar('ix_' + tabla + '_id')} "
+                         f"ON {_citar(tabla)} ({_citar(id_col)})")
+
+def marcas_desde_tabla(conexion, tabla, cabecera, id_col):
+    """
+    Marcas de agua {identificador: 'YYYY-MM-DD HH:MM:SS'} de una tabla con
+    clave natural. En una salida por cambios de estado la marca es el fin del
+    último tramo (FechaHora_Fin).
+    """
+    if 'FechaHora_Fin' not in cabecera:
+        consulta = (f"SELECT {_citar(id_col)}, MAX({_citar(COLUMNA_MOMENTO)}) FROM {_citar(tabla)} "
+                    f"GROUP BY {_citar(id_col)}")
+        return {str(i): m for i, m in conexion.execute(consulta) if i is not None and m}
+    marcas = {}
+    consulta = f"SELECT {_citar(id_col)}, {_citar('FechaHora_Fin')} FROM {_citar(tabla)}"
+    for identificador, fecha_fin in conexion.execute(consulta):
+        momento = normalizar_momento(fecha_fin)
+        if identificador is not None and momento and momento > marcas.get(str(identificador), ''):
+            marcas[str(identificador)] = momento
+    return marcas
+
+def _filas_para_insertar(filas, idx_fecha):
+    """Vacíos como NULL y, con clave natural (idx_fecha), el Momento al final."""
+    for fila in filas:
+        valores = [None if v == '' else v for v in fila]
+        if idx_fecha is not None:
+            valores.append(normalizar_momento(fila[idx_fecha]))
+        yield valores
+
+def _lotes(filas, tamano_lote):
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def guardar_en_sqlite(data_rows, ruta_db, tabla, incremental=False, agregar=False, transiciones=None,
+                      tamano_lote=LOTE_SQLITE_DEFECTO, clave_natural=True):
+    """
+    Carga las filas (la primera es la cabecera) en 'tabla' de la base
+    'ruta_db', en streaming y dentro de una transacción.
+
+    Args:
+        data_rows (iterable): Cabecera y luego filas (p. ej. de los shards).
+        ruta_db (str): Archivo de la base (se crea si no existe).
+        tabla (str): Tabla del proceso (ver nombre_tabla).
+        incremental (bool): Si es False la tabla se reemplaza; si es True se
+                            agregan solo las lecturas nuevas (upsert).
+        agregar, transiciones: Como en guardar_datos_transformados.
+        tamano_lote (int): Filas por executemany.
+        clave_natural (bool): False para tablas sin clave (p. ej. la tabla
+                              unificada, que siempre se reemplaza).
+
+    Returns:
+        int: Filas enviadas a la tabla (nuevas o actualizadas), o None si hubo un error.
+    """
+    filas = iter(data_rows)
+    cabecera = next(filas, None)
+    if cabecera is None:
+        print("ADVERTENCIA: No hay datos de filas para guardar.")
+        return 0
+    cabecera = list(cabecera)
+    cabecera_agregada = esquema_agregado(cabecera) if agregar else None
+    cabecera_transiciones = esquema_transiciones(cabecera) if transiciones else None
+    cabecera_salida = cabecera_agregada or cabecera_transiciones or cabecera
+    id_col = obtener_columna_identificador(cabecera_salida)
+    if clave_natural and (not id_col or 'FechaHora_Original' not in cabecera_salida):
+        print(f"ERROR: El esquema de {tabla} no tiene identificador y FechaHora_Original para la clave natural.")
+        return None
+
+    conexion = None
+    estadisticas = {'descartadas': 0}
+    total_filas = 0
+    try:
+        conexion = conectar_sqlite(ruta_db)
+        inicio = time.perf_counter()
+        conexion.execute("BEGIN IMMEDIATE")
+        existentes = columnas_tabla(conexion, tabla)
+        esperadas = cabecera_salida + ([COLUMNA_MOMENTO] if clave_natural else [])
+        if incremental and existentes:
+            if existentes != esperadas:
+                print(f"ERROR: La tabla {tabla} de {ruta_db} no coincide con el esquema actual. "
+                      "No se puede anexar en modo incremental.")
+                conexion.execute("ROLLBACK")
+                return None
+            # Las marcas se aplican a las lecturas crudas, antes de agregar
+            marcas = marcas_desde_tabla(conexion, tabla, cabecera_salida, id_col)
+            filas = filtrar_filas_nuevas(filas, cabecera, marcas, estadisticas)
+        else:
+            conexion.execute(f"DROP TABLE IF EXISTS {_citar(tabla)}")
+            _crear_tabla(conexion, tabla, cabecera_salida, id_col, clave_natural)
+
+        estadisticas_agregacion = {}
+        if cabecera_agregada:
+            _, filas = agregar_intervalos(cabecera, filas, estadisticas_agregacion)
+        estadisticas_transiciones = {}
+        if cabecera_transiciones:
+            _, filas = comprimir_transiciones(cabecera, filas, estadisticas_transiciones,
+                                              transiciones['memoria_mb'], transiciones['carpeta_temporal'])
+
+        marcadores = ', '.join('?' * len(esperadas))
+        sentencia = f"INSERT INTO {_citar(tabla)} VALUES ({marcadores})"
+        if clave_natural:
+            actualizar = ', '.join(f"{_citar(c)} = excluded.{_citar(c)}" for c in cabecera_salida
+                                   if c != id_col)
+            sentencia += (f" ON CONFLICT ({_citar(id_col)}, {_citar(COLUMNA_MOMENTO)}) "
+                          f"DO UPDATE SET {actualizar}")
+        idx_fecha = cabecera_salida.index('FechaHora_Original') if clave_natural else None
+        for lote in _lotes(_filas_para_insertar(filas, idx_fecha), max(int(tamano_lote), 1)):
+            conexion.executemany(sentencia, lote)
+            total_filas += len(lote)
+
+        _crear_indices(conexion, tabla, id_col, clave_natural)
+        conexion.execute("COMMIT")
+        # Estadísticas del planificador solo si cambiaron lo suficiente (barato)
+        conexion.execute("PRAGMA optimize")
+
+        if not total_filas:
+            if estadisticas['descartadas']:
+                print(f"Sin filas nuevas: {estadisticas['descartadas']} filas ya cargadas fueron descartadas.")
+            else:
+                print("ADVERTENCIA: No hay datos de filas para guardar.")
+            return 0
+
+        segundos = max(time.perf_counter() - inicio, 1e-9)
+        print(f"\n--- CARGA EXITOSA (SQLite) ---")
+        print(f"Datos guardados en: {ruta_db} (tabla {tabla})")
+        print(f"Filas de datos totales escritas: {total_filas} en {segundos:.1f} s "
+              f"({total_filas / segundos:.0f} filas/s)")
+        if incremental:
+            print(f"Filas duplicadas descartadas: {estadisticas['descartadas']}")
+        if cabecera_agregada:
+            print(resumen_agregacion(estadisticas_agregacion))
+        if cabecera_transiciones:
+            print(resumen_transiciones(estadisticas_transiciones))
+
+    except Exception as e:
+        print(f"ERROR al guardar en SQLite ({ruta_db}, tabla {tabla}): {e}")
+        if conexion is not None and conexion.in_transaction:
+            conexion.execute("ROLLBACK")
+        return None
+    finally:
+        if conexion is not None:
+            conexion.close()
+
+    return total_filas
+
+def reemplazar_tabla_sqlite(data_rows, ruta_db, tabla, tipos=None, indices=(),
+                            tamano_lote=LOTE_SQLITE_DEFECTO):
+    """
+    Reemplaza 'tabla' por las filas (la primera es la cabecera) en una
+    transacción. Para tablas derivadas que no siguen un esquema de salida (p.
+    ej. los KPI diarios): 'tipos' = {columna: tipo SQL} (por defecto TEXT) e
+    'indices' = columnas con índice propio.
+
+    Returns:
+        int: Filas escritas, o None si hubo un error.
+    """
+    filas = iter(data_rows)
+    cabecera = next(filas, None)
+    if cabecera is None:
+        return 0
+    tipos = tipos or {}
+    conexion = None
+    total_filas = 0
+    try:
+        conexion = conectar_sqlite(ruta_db)
+        conexion.execute("BEGIN IMMEDIATE")
+        conexion.execute(f"DROP TABLE IF EXISTS {_citar(tabla)}")
+        columnas = [f"{_citar(c)} {tipos.get(c, 'TEXT')}" for c in cabecera]
+        conexion.execute(f"CREATE TABLE {_citar(tabla)} ({', '.join(columnas)})")
+        sentencia = f"INSERT INTO {_citar(tabla)} VALUES ({', '.join('?' * len(cabecera))})"
+        for lote in _lotes(filas, max(int(tamano_lote), 1)):
+            conexion.executemany(sentencia, lote)
+            total_filas += len(lote)
+        for columna in indices:
+            conexion.execute(f"CREATE INDEX {_citar('ix_' + tabla + '_' + columna.lower())} "
+                             f"ON {_citar(tabla)} ({_citar(columna)})")
+        conexion.execute("COMMIT")
+    except Exception as e:
+        print(f"ERROR al guardar en SQLite ({ruta_db}, tabla {tabla}): {e}")
+        if conexion is not None and conexion.in_transaction:
+            conexion.execute("ROLLBACK")
+        return None
+    finally:
+        if conexion is not None:
+            conexion.close()
+    return total_filas
+
+def leer_tabla_sqlite(ruta_db, tabla):
+    """
+    Generador: cabecera y luego filas (como texto, igual que un CSV leído) de
+    una tabla cargada con guardar_en_sqlite, en orden de inserción y sin la
+    columna Momento.
+    """
+    if not os.path.isfile(ruta_db):
+        return
+    conexion = sqlite3.connect(ruta_db)
+    try:
+        cabecera = [c for c in columnas_tabla(conexion, tabla) if c != COLUMNA_MOMENTO]
+        if not cabecera:
+            return
+        yield cabecera
+        consulta = f"SELECT {', '.join(_citar(c) for c in cabecera)} FROM {_citar(tabla)} ORDER BY rowid"
+        for fila in conexion.execute(consulta):
+            yield ['' if v is None else str(v) for v in fila]
+    finally:
+        conexion.close()
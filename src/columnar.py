@@ -0,0 +1,109 @@
+# src/columnar.py
+"""
+Representación columnar de las filas transformadas (lotes).
+
+Un lote es un dict {'filas': n, 'columnas': [...]} con una columna por columna
+del esquema de salida, en alguno de estos formatos:
+  - ('constante', valor)               el mismo valor en todas las filas
+                                       (identificador, Pasillo_est)
+  - ('numerica', array('d'))           float; NaN = vacío
+  - ('entera', array(tipo))            enteros sin signo; 0 = vacío
+                                       (Anio, Mes, Dia, Llave_Comun)
+  - ('diccionario', valores, codigos)  valores distintos + array('H') de
+                                       posiciones (estados, Hora_10min)
+  - ('objetos', lista)                 cualquier valor de Python
+                                       (FechaHora_Original tal como llegó)
+
+La serialización a CSV trabaja por columna (en un diccionario, cada valor
+distinto se convierte a texto una sola vez) y escribe las filas con zip.
+"""
+import itertools
+from array import array
+
+NAN = float('nan')
+
+def columna_constante(valor):
+    return ('constante', valor)
+
+def columna_numerica(valores):
+    """Columna float desde una lista de float/None; si hay otro tipo, queda como objetos."""
+    try:
+        return ('numerica', array('d', [NAN if v is None else v for v in valores]))
+    except TypeError:
+        return ('objetos', valores)
+
+def columna_entera(enteros):
+    """Columna desde un array de enteros (0 = vacío)."""
+    return ('entera', enteros)
+
+def columna_diccionario(valores):
+    """Codifica una lista de valores repetidos como (valores distintos, códigos)."""
+    indice = {}
+    distintos = []
+    codigos = []
+    for valor in valores:
+        # Los textos son su propia clave; al resto se le agrega el tipo para que
+        # 1, 1.0 y True no se confundan (se escriben distinto)
+        clave = valor if valor.__class__ is str else (valor.__class__, valor)
+        codigo = indice.get(clave)
+        if codigo is None:
+            codigo = indice[clave] = len(distintos)
+            distintos.append(valor)
+        codigos.append(codigo)
+    if len(distintos) == 1:
+        return ('constante', distintos[0])
+    return ('diccionario', distintos, array('H' if len(distintos) <= 0xFFFF else 'L', codigos))
+
+def texto_de_valor(valor):
+    """Lo mismo que escribe csv.writer para un valor suelto."""
+    if valor is None:
+        return ''
+    return valor if valor.__class__ is str else str(valor)
+
+def celdas_de_columna(columna, n):
+    """
+    Iterable con lo que recibe csv.writer por cada fila de la columna: textos
+    ya convertidos (constantes y diccionarios, una vez por valor distinto) o
+    float/int que el propio csv convierte en C. Los vacíos van como None.
+    """
+    tipo = columna[0]
+    if tipo == 'constante':
+        return itertools.repeat(texto_de_valor(columna[1]), n)
+    if tipo == 'numerica':
+        return [None if v != v else v for v in columna[1]]
+    if tipo == 'entera':
+        return [v or None for v in columna[1]]
+    if tipo == 'diccionario':
+        textos = [texto_de_valor(v) for v in columna[1]]
+        return [textos[c] for c in columna[2]]
+    return columna[1]
+
+def valores_de_columna(columna, n, como_texto=False):
+    """Iterable con el valor de Python de cada fila de la columna."""
+    tipo = columna[0]
+    if tipo == 'constante':
+        return itertools.repeat(columna[1], n)
+    if tipo == 'numerica':
+        return [None if v != v else v for v in columna[1]]
+    if tipo == 'entera':
+        return [(str(v) if como_texto else v) if v else None for v in columna[1]]
+    if tipo == 'diccionario':
+        distintos = columna[1]
+        return [distintos[c] for c in columna[2]]
+    return columna[1]
+
+def filas_de_lote(lote, enteras_como_texto=()):
+    """
+    Genera las filas (listas) de un lote. Las columnas enteras cuyo índice está
+    en 'enteras_como_texto' se devuelven como str (p. ej. Llave_Comun).
+    """
+    n = lote['filas']
+    columnas = [valores_de_columna(col, n, i in enteras_como_texto) for i, col in enumerate(lote['columnas'])]
+    for fila in zip(*columnas):
+        yield list(fila)
+
+def escribir_lote(writer, lote):
+    """Escribe un lote con un csv.writer, serializando columna por columna."""
+    n = lote['filas']
+    writer.writerows(zip(*[celdas_de_columna(col, n) for col in lote['columnas']]))
+    return n
@@ -28,6 +28,18 @@ COLUMNAS_SALIDA_COMPRESORES = [
     'G1_Salida1_Estado', 'G2_Salida_OUT'
 ]
 
+# Esquema D: TABLA UNIFICADA (src/union.py). Cada fila de sensores conserva sus
+# columnas y recibe, por Llave_Comun, el estado de presión y compresores de ese
+# intervalo de 10 minutos. Destino -> columna de origen.
+COLUMNAS_UNION_PRESION = {
+    'Sistema': 'Sistema',
+    'Presion_Gas': 'Presion_Gas',               # Promedio del intervalo
+    'Presion_Proceso': 'Proceso_Actual',        # Último valor del intervalo
+}
+COLUMNAS_UNION_COMPRESORES = {
+    col: col for col in COLUMNAS_SALIDA_COMPRESORES[COLUMNAS_SALIDA_COMPRESORES.index('FechaHora_Original') + 1:]
+}
+
 # =================================================================
 # 2. Mapeos de Columnas
 # =================================================================
@@ -157,6 +169,14 @@ CONFIGURACION_ARCHIVOS = [
     CONFIG_COMPRESORES
 ]
 
+# Índice nombre interno -> configuración (gana la primera config de la lista
+# maestra, igual que el recorrido secuencial original)
+INDICE_CONFIG_POR_NOMBRE = {}
+for _config in CONFIGURACION_ARCHIVOS:
+    for _nombre in _config['nombres_internos']:
+        INDICE_CONFIG_POR_NOMBRE.setdefault(_nombre, _config)
+del _config, _nombre
+
 # =================================================================
 # 4. Funciones de Ayuda
 # =================================================================
@@ -165,12 +185,46 @@ def obtener_configuracion_por_nombre_interno(nombre_en_excel):
     if not nombre_en_excel: return None
     nombre_limpio = str(nombre_en_excel).strip()
     
+    config = INDICE_CONFIG_POR_NOMBRE.get(nombre_limpio)
+    if config is None:
+        return None
+    resolved = config.copy()
+    resolved['nombre_identificador'] = nombre_limpio
+    return resolved
+
+# Columnas numéricas de las salidas agregadas por 10 minutos (src/agregacion.py)
+SUFIJOS_NUMERICOS_AGREGADOS = ('_prom', '_min', '_max')
+
+def obtener_columna_identificador(output_schema):
+    """
+    Nombre de la columna identificador (Pasillo/Sistema/Modulo) de un esquema de
+    salida. Para esquemas derivados (salida agregada) se busca la primera
+    columna identificador conocida presente en la cabecera.
+    """
     for config in CONFIGURACION_ARCHIVOS:
-        if nombre_limpio in config['nombres_internos']:
-            resolved = config.copy()
-            resolved['nombre_identificador'] = nombre_limpio
-            return resolved
+        if list(config['output_schema']) == list(output_schema):
+            return config.get('id_column_name')
+    for config in CONFIGURACION_ARCHIVOS:
+        if config.get('id_column_name') in output_schema:
+            return config['id_column_name']
     return None
 
+def obtener_campos_numericos(output_schema):
+    """
+    Campos numéricos (numeric_fields) de todas las configuraciones con ese
+    esquema de salida. En un esquema derivado (salida agregada o tabla
+    unificada) son las columnas de campos numéricos conocidos y sus
+    <campo>_prom, <campo>_min y <campo>_max.
+    """
+    campos = []
+    for config in CONFIGURACION_ARCHIVOS:
+        if list(config['output_schema']) == list(output_schema):
+            campos.extend(c for c in config.get('numeric_fields', []) if c not in campos)
+    if not campos:
+        base = {c for config in CONFIGURACION_ARCHIVOS for c in config.get('numeric_fields', [])}
+        campos = [col for col in output_schema
+                  if col in base or any(col == f"{campo}{sufijo}" for campo in base for sufijo in SUFIJOS_NUMERICOS_AGREGADOS)]
+    return campos
+
 def obtener_celda_pasillo(filename):
     return 'B1'
\ No newline at end of file
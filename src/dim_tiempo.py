@@ -0,0 +1,151 @@
+# src/dim_tiempo.py
+"""
+Dimensión de tiempo (dim_tiempo) para relacionar en Power BI cualquier salida
+por Llave_Comun: una fila por intervalo de 10 minutos con fecha, año, mes,
+día, hora, turno y día de la semana.
+
+Se genera una sola vez para el rango de fechas de los datos y se vuelve a
+escribir solo si llegan lecturas fuera de ese rango (o si cambia el formato
+de la llave). El rango de cada corrida se toma de las llaves que pasan por la
+carga (registrar_rango_llaves), sin releer las salidas; solo la primera vez,
+si todavía no hay dimensión, se recorren las salidas ya consolidadas.
+
+Las llaves se calculan con la misma aritmética que la transformación
+(src/transform.py), en el formato configurado: cada Llave_Comun de las salidas
+tiene su fila.
+"""
+import os
+import csv
+import sqlite3
+from datetime import timedelta
+from src.transform import (FORMATO_LLAVE_DEFECTO, fecha_de_llave, formato_de_llave, generar_llave_comun,
+                           llave_en_minutos)
+
+NOMBRE_DIM_TIEMPO_DEFECTO = "dim_tiempo.csv"
+# Turnos por hora de inicio; el último sigue hasta el inicio del primero del día siguiente
+TURNOS_DEFECTO = {'Mañana': '06:00', 'Tarde': '14:00', 'Noche': '22:00'}
+NOMBRES_DIA = ('Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo')
+COLUMNAS_DIM_TIEMPO = ['Llave_Comun', 'Fecha', 'Anio', 'Mes', 'Dia', 'Hora', 'Hora_10min',
+                       'Turno', 'Dia_Semana', 'Nombre_Dia']
+# Tipos de la dimensión con destino SQLite (el resto, TEXT)
+TIPOS_SQLITE_DIM_TIEMPO = {c: 'INTEGER' for c in ('Llave_Comun', 'Anio', 'Mes', 'Dia', 'Hora', 'Dia_Semana')}
+
+def _minuto_del_dia(texto):
+    horas, minutos = str(texto).strip().split(':')
+    minuto = int(horas) * 60 + int(minutos)
+    if not 0 <= minuto < 1440:
+        raise ValueError(f"hora fuera del día: {texto}")
+    return minuto
+
+def turno_por_intervalo(turnos):
+    """
+    Nombre del turno de cada intervalo de 10 minutos del día (144 valores)
+    para 'turnos' = {nombre: 'HH:MM' de inicio}.
+    """
+    inicios = sorted((_minuto_del_dia(inicio), nombre) for nombre, inicio in turnos.items())
+    if not inicios:
+        return [None] * 144
+    resultado = []
+    for minuto in range(0, 1440, 10):
+        # El último turno que empezó antes; antes del primero sigue el último del día anterior
+        actual = inicios[-1][1]
+        for inicio, nombre in inicios:
+            if inicio <= minuto:
+                actual = nombre
+        resultado.append(actual)
+    return resultado
+
+def filas_dim_tiempo(desde, hasta, formato_llave=FORMATO_LLAVE_DEFECTO, turnos=None):
+    """Cabecera y filas de la dimensión, de 'desde' a 'hasta' (date, inclusive)."""
+    turno = turno_por_intervalo(TURNOS_DEFECTO if turnos is None else turnos)
+    yield list(COLUMNAS_DIM_TIEMPO)
+    dia = desde
+    while dia <= hasta:
+        if formato_llave == 'minutos':
+            base = llave_en_minutos(dia.year, dia.month, dia.day, '00:00')
+            llaves = [base + minuto for minuto in range(0, 1440, 10)]
+        else:
+            base = int(generar_llave_comun(dia.year, dia.month, dia.day, '00:00'))
+            llaves = [base + minuto // 60 * 100 + minuto % 60 for minuto in range(0, 1440, 10)]
+        fecha = dia.isoformat()
+        dia_semana = dia.isoweekday()
+        for i, llave in enumerate(llaves):
+            hora, minuto = divmod(i * 10, 60)
+            yield [llave, fecha, dia.year, dia.month, dia.day, hora, f"{hora:02d}:{minuto:02d}",
+                   turno[i], dia_semana, NOMBRES_DIA[dia_semana - 1]]
+        dia += timedelta(days=1)
+
+def registrar_rango_llaves(filas, rango):
+    """
+    Generador que deja pasar 'filas' (cabecera y luego filas) y anota en
+    'rango' ('min', 'max') la menor y la mayor Llave_Comun como texto. Las
+    llaves de un mismo formato tienen todas el mismo ancho, así que se comparan
+    como texto sin convertirlas.
+    """
+    filas = iter(filas)
+    cabecera = next(filas, None)
+    if cabecera is None:
+        return
+    yield cabecera
+    if 'Llave_Comun' not in cabecera:
+        yield from filas
+        return
+    idx_llave = list(cabecera).index('Llave_Comun')
+    minimo, maximo = rango.get('min'), rango.get('max')
+    try:
+        for fila in filas:
+            llave = fila[idx_llave]
+            if llave:
+                if minimo is None or llave < minimo:
+                    minimo = llave
+                if maximo is None or llave > maximo:
+                    maximo = llave
+            yield fila
+    finally:
+        rango['min'], rango['max'] = minimo, maximo
+
+def rango_de_fechas(llave_min, llave_max):
+    """(date desde, date hasta, formato) de un par de llaves, o None si no son llaves."""
+    desde, hasta = fecha_de_llave(llave_min), fecha_de_llave(llave_max)
+    if desde is None or hasta is None:
+        return None
+    return desde[0], hasta[0], formato_de_llave(llave_min)
+
+def unir_rangos(*rangos):
+    """Menor rango (desde, hasta, formato) que cubre todos los dados (se ignoran los None)."""
+    rangos = [r for r in rangos if r]
+    if not rangos:
+        return None
+    return min(r[0] for r in rangos), max(r[1] for r in rangos), rangos[0][2]
+
+def cobertura_csv(ruta):
+    """
+    Rango (desde, hasta, formato) de una dim_tiempo ya escrita en CSV, leyendo
+    solo la primera y la última fila (la dimensión se escribe en orden). None
+    si no existe o no se puede leer.
+    """
+    if not os.path.isfile(ruta):
+        return None
+    try:
+        with open(ruta, 'rb') as f:
+            f.readline()
+            primera = f.readline()
+            f.seek(max(os.path.getsize(ruta) - 4096, 0))
+            ultima = f.read().rstrip(b'\r\n').rsplit(b'\n', 1)[-1]
+    except OSError:
+        return None
+    llaves = [next(csv.reader([linea.decode('utf-8')], delimiter=';'), [''])[0] for linea in (primera, ultima)]
+    return rango_de_fechas(*llaves)
+
+def cobertura_sqlite(ruta_db, tabla):
+    """Rango (desde, hasta, formato) de una dim_tiempo cargada en SQLite, o None."""
+    if not os.path.isfile(ruta_db):
+        return None
+    conexion = sqlite3.connect(ruta_db)
+    try:
+        minimo, maximo = conexion.execute(f'SELECT MIN("Llave_Comun"), MAX("Llave_Comun") FROM "{tabla}"').fetchone()
+    except sqlite3.Error:
+        return None
+    finally:
+        conexion.close()
+    return rango_de_fechas(minimo, maximo)
@@ -2,6 +2,14 @@
 import os
 from openpyxl import load_workbook
 from src.config import obtener_configuracion_por_nombre_interno, obtener_celda_pasillo
+from src.xlsx_directo import iterar_filas_xlsx
+
+# Lectores disponibles: 'openpyxl' (por defecto) o 'directo' (src/xlsx_directo.py)
+LECTORES_EXCEL = ('openpyxl', 'directo')
+
+def es_archivo_por_procesar(filename):
+    """Excel de datos (.xlsx), descartando los archivos temporales de Excel abiertos (~$)."""
+    return filename.endswith('.xlsx') and not filename.startswith('~$')
 
 def encontrar_archivos_por_procesar(input_folder):
     """Busca archivos .xlsx en la carpeta de entrada especificada."""
@@ -10,8 +18,7 @@ def encontrar_archivos_por_procesar(input_folder):
         print(f"ERROR: La carpeta de entrada no existe: {input_folder}")
         return archivos_a_procesar
 
-    archivos_en_input = [f for f in os.listdir(input_folder) if f.endswith('.xlsx') and not f.startswith('~$')]
-    # Nota: Agregué 'not f.startswith('~$')' para ignorar archivos temporales de Excel abiertos
+    archivos_en_input = [f for f in os.listdir(input_folder) if es_archivo_por_procesar(f)]
 
     for filename in archivos_en_input:
         filepath = os.path.join(input_folder, filename)
@@ -19,10 +26,41 @@ def encontrar_archivos_por_procesar(input_folder):
             
     return archivos_a_procesar
 
-def leer_archivo_excel(filepath):
+def _iterar_filas(workbook, sheet, start_row):
     """
-    Lee datos de un archivo Excel y CIERRA la conexión para permitir moverlo después.
+    Generador de filas de datos (tuplas) que CIERRA el workbook al agotarse o al
+    llamar a close(). leer_archivo_excel lo "ceba" con un primer next() para que
+    close() libere el archivo aunque nunca se haya leído una fila.
     """
+    try:
+        yield None
+        for row in sheet.iter_rows(min_row=start_row, values_only=True):
+            # Las filas vacías (huecos o "fantasma" hasta la dimensión de la hoja)
+            # vienen todas en None: se saltan sin cortar la lectura
+            if row.count(None) == len(row):
+                continue
+            yield row
+    finally:
+        # --- BLOQUE CRÍTICO: CERRAR EL ARCHIVO ---
+        workbook.close()
+
+def leer_archivo_excel(filepath, lector='openpyxl'):
+    """
+    Lee la identificación y cabeceras de un archivo Excel y devuelve las filas
+    de datos como un GENERADOR, para no tener el archivo completo en memoria.
+    Las filas completamente vacías se saltan, estén donde estén.
+
+    Con lector='directo' se usa el lector de librería estándar de
+    src/xlsx_directo.py, que entrega los mismos valores sin openpyxl.
+
+    Returns:
+        tuple: (headers, filas, config). 'filas' produce una tupla por fila y
+               cierra el archivo al agotarse (o con filas.close()), lo que
+               permite moverlo después. (None, None, None) si no se reconoce.
+    """
+    if lector == 'directo':
+        return _leer_archivo_excel_directo(filepath)
+
     filename = os.path.basename(filepath)
     # print(f"--- Leido: {filename} ---") # Opcional: comentar para menos ruido
     
@@ -49,19 +87,18 @@ def leer_archivo_excel(filepath):
         
         # 3. Extraer Datos
         headers = []
-        data_rows = []
         
         # Leer Cabeceras
         for row in sheet.iter_rows(min_row=data_start_row, max_row=data_start_row, values_only=True):
             headers = [str(cell).strip() if cell is not None else f"Col_{i}" for i, cell in enumerate(row)]
             break
 
-        # Leer Datos
-        start_data_row = data_start_row + 1
-        for row in sheet.iter_rows(min_row=start_data_row, values_only=True):
-            data_rows.append(list(row)) 
+        # Leer Datos (bajo demanda: el generador pasa a ser dueño del workbook)
+        filas = _iterar_filas(workbook, sheet, data_start_row + 1)
+        next(filas)
+        workbook = None
         
-        return headers, data_rows, config
+        return headers, filas, config
         
     except FileNotFoundError:
         print(f"ERROR: Archivo no encontrado: {filepath}")
@@ -71,5 +108,67 @@ def leer_archivo_excel(filepath):
         return None, None, None
     finally:
         # --- BLOQUE CRÍTICO: CERRAR EL ARCHIVO ---
+        # (solo si no se entregó al generador de filas)
         if workbook:
-            workbook.close()
\ No newline at end of file
+            workbook.close()
+
+def _filas_datos_directo(filas, start_row):
+    """
+    Filas de datos del lector directo desde start_row, saltando las vacías
+    (o ausentes en el XML). Misma regla y mismo cebado que _iterar_filas.
+    """
+    try:
+        yield None
+        for numero_fila, row in filas:
+            if numero_fila < start_row or row.count(None) == len(row):
+                continue
+            yield row
+    finally:
+        filas.close()
+
+def _leer_archivo_excel_directo(filepath):
+    """Igual que leer_archivo_excel, con el lector de src/xlsx_directo.py."""
+    filename = os.path.basename(filepath)
+    filas = None
+    try:
+        filas = iterar_filas_xlsx(filepath)
+        config = None
+        headers = []
+        data_start_row = None
+
+        for numero_fila, row in filas:
+            # 1. Identificar Pasillo (celda B1) y 2. Configuración
+            if config is None:
+                if numero_fila != 1 or len(row) < 2 or not row[1]:
+                    return None, None, None
+                config = obtener_configuracion_por_nombre_interno(str(row[1]))
+                if not config:
+                    return None, None, None
+                data_start_row = config.get('data_start_row', 1)
+                if data_start_row > 1:
+                    continue
+
+            # 3. Cabeceras
+            if numero_fila >= data_start_row:
+                if numero_fila == data_start_row:
+                    headers = [str(cell).strip() if cell is not None else f"Col_{i}" for i, cell in enumerate(row)]
+                break
+
+        if config is None:
+            return None, None, None
+
+        datos = _filas_datos_directo(filas, data_start_row + 1)
+        next(datos)
+        filas = None
+
+        return headers, datos, config
+
+    except FileNotFoundError:
+        print(f"ERROR: Archivo no encontrado: {filepath}")
+        return None, None, None
+    except Exception as e:
+        print(f"ERROR al leer {filename}: {e}")
+        return None, None, None
+    finally:
+        if filas is not None:
+            filas.close()
@@ -0,0 +1,308 @@
+# src/indice_tiempo.py
+"""
+Índice lateral de tiempo de los CSV consolidados (<archivo>.indice.json) y
+recorte rápido de un rango de fechas y/o un identificador.
+
+El índice divide el CSV en bloques de filas consecutivas del mismo día (el de
+Llave_Comun, en cualquiera de sus formatos) y guarda por bloque el byte de
+inicio y de fin y los identificadores (Pasillo/Sistema/Modulo) que aparecen en
+él. Con el
+CSV tal como lo escribe el ETL (un Excel tras otro, o ordenado con --ordenar)
+un año son unos pocos miles de bloques.
+
+Para recortar se eligen los bloques de esos días (y de ese identificador), se
+leen solo esos bytes del archivo mapeado en memoria (mmap) y se filtran sus
+filas por FechaHora_Original. Solo los CSV sin comprimir tienen índice: un .gz
+se recorre completo y en la salida particionada se leen solo las carpetas
+Anio=/Mes= del rango.
+
+Todas las salidas tienen Llave_Comun en la primera columna y el identificador
+en la segunda, así que para indexar no hace falta parsear la fila completa.
+Se asume que ningún valor contiene saltos de línea (Sitrad no los exporta).
+"""
+import io
+import os
+import csv
+import gzip
+import json
+import mmap
+from src.config import obtener_columna_identificador
+from src.transform import fecha_de_llave, normalizar_momento
+
+VERSION_INDICE = 1
+
+def ruta_indice_tiempo(ruta_csv):
+    """Archivo lateral con el índice de tiempo del CSV consolidado."""
+    return ruta_csv + ".indice.json"
+
+def es_indexable(cabecera):
+    """True si la cabecera tiene Llave_Comun y el identificador en las dos primeras columnas."""
+    cabecera = list(cabecera or ())
+    return (len(cabecera) > 1 and cabecera[0] == 'Llave_Comun'
+            and cabecera[1] == obtener_columna_identificador(cabecera))
+
+def _dia_de_llave(llave):
+    """
+    b'202601061230' -> '2026-01-06' (o la llave en minutos, ver
+    src/transform.fecha_de_llave); '' si la fila no tiene Llave_Comun.
+    """
+    if len(llave) == 12:
+        dia = llave[:8].decode('ascii', 'replace')
+        return f"{dia[:4]}-{dia[4:6]}-{dia[6:]}"
+    fecha = fecha_de_llave(llave.decode('ascii', 'replace')) if llave else None
+    return fecha[0].isoformat() if fecha else ''
+
+def _llave_e_identificador(linea):
+    """(Llave_Comun, identificador) como bytes, leyendo solo las dos primeras columnas."""
+    campos = linea.split(b';', 2)
+    if len(campos) < 2:
+        return campos[0].rstrip(b'\r\n'), b''
+    if campos[0][:1] == b'"' or campos[1][:1] == b'"':
+        # Valor entre comillas (contiene ';' o comillas): se parsea la fila
+        fila = next(csv.reader([linea.decode('utf-8')], delimiter=';'), ['', ''])
+        return fila[0].encode('utf-8'), (fila[1] if len(fila) > 1 else '').encode('utf-8')
+    return campos[0], campos[1].rstrip(b'\r\n')
+
+def _escanear(f, desde_byte, bloques):
+    """
+    Recorre el CSV desde 'desde_byte' (inicio de una fila) agregando bloques
+    [dia, inicio, fin, [identificadores]] a 'bloques'. Si el último bloque
+    termina justo en 'desde_byte' se continúa (anexado incremental).
+    """
+    f.seek(desde_byte)
+    posicion = desde_byte
+    dia_actual, inicio, ids = None, desde_byte, set()
+    if bloques and bloques[-1][2] == desde_byte:
+        dia, inicio, _, previos = bloques.pop()
+        dia_actual, ids = dia, {i.encode('utf-8') for i in previos}
+
+    llave_anterior = None
+    for linea in f:
+        llave, identificador = _llave_e_identificador(linea)
+        # La llave cambia cada 10 minutos: el día se recalcula solo entonces
+        if llave != llave_anterior:
+            dia = _dia_de_llave(llave)
+            llave_anterior = llave
+            if dia != dia_actual:
+                if dia_actual is not None and posicion > inicio:
+                    bloques.append([dia_actual, inicio, posicion, sorted(i.decode('utf-8') for i in ids)])
+                dia_actual, inicio, ids = dia, posicion, set()
+        ids.add(identificador)
+        posicion += len(linea)
+
+    if dia_actual is not None and posicion > inicio:
+        bloques.append([dia_actual, inicio, posicion, sorted(i.decode('utf-8') for i in ids)])
+    return posicion
+
+def construir_indice_tiempo(ruta_csv, desde_byte=0, indice_previo=None):
+    """
+    Índice del CSV. Con 'indice_previo' válido hasta 'desde_byte' (carga
+    incremental) solo se recorre lo anexado; si no, el archivo completo.
+
+    Returns:
+        dict: El índice, o None si la cabecera no es indexable.
+    """
+    with open(ruta_csv, 'rb') as f:
+        primera = f.readline()
+        cabecera = next(csv.reader([primera.decode('utf-8-sig')], delimiter=';'), [])
+        if not es_indexable(cabecera):
+            return None
+        if (indice_previo and desde_byte and indice_previo.get('version') == VERSION_INDICE
+                and indice_previo.get('bytes') == desde_byte and indice_previo.get('cabecera') == cabecera):
+            bloques = indice_previo['bloques']
+        else:
+            bloques, desde_byte = [], len(primera)
+        total = _escanear(f, desde_byte, bloques)
+
+    return {
+        'version': VERSION_INDICE,
+        'bytes': total,
+        'inicio_datos': len(primera),
+        'cabecera': cabecera,
+        'bloques': bloques,
+    }
+
+def _leer_indice(ruta_csv):
+    try:
+        with open(ruta_indice_tiempo(ruta_csv), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def actualizar_indice_tiempo(ruta_csv, desde_byte=0):
+    """
+    Escribe (atómicamente) el índice de un CSV recién escrito. 'desde_byte' =
+    tamaño que tenía el CSV antes de anexar (0 si se reescribió completo).
+    Un error no afecta la carga: se informa y se borra el índice viejo.
+
+    Returns:
+        dict: El índice, o None si no se pudo construir.
+    """
+    ruta_indice = ruta_indice_tiempo(ruta_csv)
+    try:
+        indice = construir_indice_tiempo(ruta_csv, desde_byte,
+                                         _leer_indice(ruta_csv) if desde_byte else None)
+        if indice is None:
+            return None
+        ruta_tmp = ruta_indice + ".tmp"
+        with open(ruta_tmp, 'w', encoding='utf-8') as f:
+            json.dump(indice, f, ensure_ascii=False, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(ruta_tmp, ruta_indice)
+        return indice
+    except Exception as e:
+        print(f"ADVERTENCIA: No se pudo escribir el índice de tiempo de {ruta_csv} ({e}).")
+        if os.path.exists(ruta_indice):
+            os.remove(ruta_indice)
+        return None
+
+def cargar_indice_tiempo(ruta_csv):
+    """
+    Índice vigente del CSV; si falta o no coincide con el tamaño del archivo
+    (p. ej. una carga se cortó) se reconstruye y se guarda.
+    """
+    indice = _leer_indice(ruta_csv)
+    if (indice and indice.get('version') == VERSION_INDICE
+            and indice.get('bytes') == os.path.getsize(ruta_csv)):
+        return indice
+    print(f"   Construyendo índice de tiempo de {ruta_csv} (solo esta vez)...")
+    return actualizar_indice_tiempo(ruta_csv)
+
+# =================================================================
+# Recorte de un rango
+# =================================================================
+
+def normalizar_limite(texto, final=False):
+    """
+    'YYYY-MM-DD[ HH:MM[:SS]]' o 'DD/MM/YYYY[ HH:MM]' -> 'YYYY-MM-DD HH:MM:SS'.
+    Sin hora, el límite final incluye el día completo. None si no es una fecha.
+    """
+    s = str(texto).strip()
+    if len(s) == 10 and s[2] == '/' and s[5] == '/':
+        s = f"{s[6:]}-{s[3:5]}-{s[:2]}"
+    if len(s) == 10 and s[4] == '-' and s[7] == '-':
+        return s + (' 23:59:59' if final else ' 00:00:00')
+    if len(s) == 16 and s[4] == '-' and s[7] == '-':
+        return s + (':59' if final else ':00')
+    return normalizar_momento(s)
+
+def _tramos(indice, dia_desde, dia_hasta, identificador):
+    """(inicio, fin) de los bloques del rango, unidos cuando son contiguos."""
+    tramos = []
+    for dia, inicio, fin, ids in indice['bloques']:
+        if (dia_desde or dia_hasta) and not dia:
+            continue
+        if (dia_desde and dia < dia_desde) or (dia_hasta and dia > dia_hasta):
+            continue
+        if identificador is not None and identificador not in ids:
+            continue
+        if tramos and tramos[-1][1] == inicio:
+            tramos[-1][1] = fin
+        else:
+            tramos.append([inicio, fin])
+    return tramos
+
+def _filtro_de_filas(cabecera, desde, hasta, identificador):
+    """Función fila -> bool con el rango exacto (FechaHora_Original) y el identificador."""
+    cabecera = list(cabecera)
+    idx_fecha = cabecera.index('FechaHora_Original')
+    idx_ids = [cabecera.index(col) for col in (obtener_columna_identificador(cabecera), 'Pasillo_est')
+               if col in cabecera]
+
+    def aceptar(fila):
+        if len(fila) < len(cabecera):
+            return False
+        if identificador is not None and not any(fila[i] == identificador for i in idx_ids):
+            return False
+        if desde or hasta:
+            momento = normalizar_momento(fila[idx_fecha])
+            if momento is None or (desde and momento < desde) or (hasta and momento > hasta):
+                return False
+        return True
+    return aceptar
+
+def _recortar_indexado(ruta_csv, indice, desde, hasta, identificador, estadisticas):
+    # Un identificador que no está en el índice puede ser un Pasillo_est (P007):
+    # entonces se eligen bloques solo por fecha y se filtra fila por fila
+    ids_indexados = {i for bloque in indice['bloques'] for i in bloque[3]}
+    id_bloques = identificador if identificador in ids_indexados else None
+    tramos = _tramos(indice, desde and desde[:10], hasta and hasta[:10], id_bloques)
+    aceptar = _filtro_de_filas(indice['cabecera'], desde, hasta, identificador)
+    estadisticas['tramos'] = len(tramos)
+    estadisticas['bytes_leidos'] = sum(fin - inicio for inicio, fin in tramos)
+
+    yield list(indice['cabecera'])
+    if not tramos:
+        return
+    with open(ruta_csv, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+        for inicio, fin in tramos:
+            texto = mapa[inicio:fin].decode('utf-8')
+            for fila in csv.reader(io.StringIO(texto, newline=''), delimiter=';'):
+                if aceptar(fila):
+                    yield fila
+
+def _carpetas_del_rango(ruta, desde, hasta):
+    """Partes de una salida particionada cuyas carpetas Anio=/Mes= caen en el rango."""
+    mes_desde = desde[:7] if desde else None
+    mes_hasta = hasta[:7] if hasta else None
+    partes = []
+    for carpeta, subcarpetas, archivos in os.walk(ruta):
+        subcarpetas[:] = sorted(s for s in subcarpetas if not s.startswith('_tmp_'))
+        nombre_mes = os.path.basename(carpeta)
+        nombre_anio = os.path.basename(os.path.dirname(carpeta))
+        if not (nombre_anio.startswith('Anio=') and nombre_mes.startswith('Mes=')):
+            continue
+        mes = f"{nombre_anio[5:]}-{nombre_mes[4:]}"
+        if (mes_desde or mes_hasta) and mes.startswith('0000'):
+            continue
+        if (mes_desde and mes < mes_desde) or (mes_hasta and mes > mes_hasta):
+            continue
+        partes.extend(os.path.join(carpeta, a) for a in sorted(archivos)
+                      if a.startswith('part-') and a.endswith('.csv'))
+    return partes
+
+def recortar_salida(ruta, desde=None, hasta=None, identificador=None, estadisticas=None):
+    """
+    Generador: cabecera y filas de una salida consolidada (CSV, .gz o carpeta
+    particionada) dentro del rango [desde, hasta] ('YYYY-MM-DD HH:MM:SS') y,
+    si se indica, de ese identificador (Pasillo/Sistema/Modulo o Pasillo_est).
+    """
+    estadisticas = {} if estadisticas is None else estadisticas
+    if os.path.isdir(ruta):
+        partes = _carpetas_del_rango(ruta, desde, hasta)
+        estadisticas['tramos'] = len(partes)
+        estadisticas['bytes_leidos'] = sum(os.path.getsize(p) for p in partes)
+        cabecera_emitida = False
+        for parte in partes:
+            with open(parte, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.reader(f, delimiter=';')
+                cabecera = next(reader, None)
+                if cabecera is None:
+                    continue
+                if not cabecera_emitida:
+                    yield cabecera
+                    cabecera_emitida = True
+                aceptar = _filtro_de_filas(cabecera, desde, hasta, identificador)
+                yield from (fila for fila in reader if aceptar(fila))
+        return
+
+    with open(ruta, 'rb') as f:
+        comprimido = f.read(2) == b'\x1f\x8b'
+    indice = None if comprimido else cargar_indice_tiempo(ruta)
+    if indice is not None:
+        yield from _recortar_indexado(ruta, indice, desde, hasta, identificador, estadisticas)
+        return
+
+    # Sin índice (gzip o cabecera no indexable): se recorre completo
+    estadisticas['tramos'] = 1
+    estadisticas['bytes_leidos'] = os.path.getsize(ruta)
+    abrir = gzip.open if comprimido else open
+    with abrir(ruta, 'rt', newline='', encoding='utf-8') as f:
+        reader = csv.reader(f, delimiter=';')
+        cabecera = next(reader, None)
+        if cabecera is None:
+            return
+        yield cabecera
+        aceptar = _filtro_de_filas(cabecera, desde, hasta, identificador)
+        yield from (fila for fila in reader if aceptar(fila))
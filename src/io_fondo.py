@@ -0,0 +1,63 @@
+# src/io_fondo.py
+"""
+Cola acotada de E/S en segundo plano para el proceso principal.
+
+El archivado de los Excel (mover a Archive, que en otro volumen o en un share
+de red es copiar + borrar) y la escritura de los CSV consolidados se ejecutan
+en hilos mientras el proceso principal sigue leyendo y transformando el libro
+siguiente. Es E/S: los hilos pasan casi todo el tiempo fuera del GIL.
+
+La cola es acotada: con 'max_pendientes' tareas sin terminar, encolar()
+espera a que se libere un lugar, así la E/S atrasada frena al productor en
+lugar de acumular trabajo en memoria. Con hilos=0 cada tarea se ejecuta en el
+acto (comportamiento sincrónico de antes).
+
+Los errores no se pierden: cada tarea devuelve un Future y quien la encoló
+revisa su resultado (future.result() relanza la excepción del hilo).
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+def crear_cola_io(hilos=2, max_pendientes=16):
+    """Cola de E/S con 'hilos' hilos y como máximo 'max_pendientes' tareas sin terminar."""
+    return {
+        'executor': ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='etl-io') if hilos > 0 else None,
+        'cupos': threading.BoundedSemaphore(max(max_pendientes, 1)),
+    }
+
+def encolar(cola, funcion, *args):
+    """
+    Ejecuta funcion(*args) en segundo plano. Bloquea mientras la cola esté llena.
+
+    Returns:
+        Future: Con el resultado de la función (o su excepción).
+    """
+    if cola['executor'] is None:
+        futuro = Future()
+        try:
+            futuro.set_result(funcion(*args))
+        except Exception as e:
+            futuro.set_exception(e)
+        return futuro
+
+    cola['cupos'].acquire()
+    try:
+        futuro = cola['executor'].submit(funcion, *args)
+    except Exception:
+        cola['cupos'].release()
+        raise
+    futuro.add_done_callback(lambda _: cola['cupos'].release())
+    return futuro
+
+def resultado_o_error(futuro, descripcion):
+    """Espera la tarea; si falló, informa el error y devuelve None."""
+    try:
+        return futuro.result()
+    except Exception as e:
+        print(f"ERROR en E/S de fondo ({descripcion}): {e}")
+        return None
+
+def cerrar_cola_io(cola):
+    """Espera todas las tareas encoladas y libera los hilos."""
+    if cola['executor'] is not None:
+        cola['executor'].shutdown(wait=True)
@@ -0,0 +1,288 @@
+# src/kpi.py
+"""
+KPI diarios por identificador (Pasillo_est / Sistema) con estado incremental.
+
+Por grupo se guarda un archivo de estado JSON pequeño con agregados
+combinables por (sensor, día), que cada corrida actualiza solo con las
+lecturas nuevas:
+  - lecturas, suma, suma de cuadrados, mínimo y máximo de la variable
+    principal (Temp_Ambiente en sensores, Presion_Gas en presión);
+  - un histograma de resolución fija (RESOLUCION_HISTOGRAMA) para el p95: se
+    combina sumando cuentas y el error del percentil es de media resolución;
+  - segundos observados, fuera de tolerancia (|Desvio_Relativo| mayor que la
+    tolerancia) y con Salida_DEFR activa (ciclo de descongelamiento).
+
+El estado se lleva por sensor (el identificador crudo: Pasillo o Sistema),
+no por Pasillo_est: varios sensores comparten código estandarizado (los
+"Pasillo 18 RS 1..4" son todos P018) y sus lecturas se intercalan. Cada
+lectura vale el tiempo hasta la siguiente de su sensor, con tope en el hueco
+máximo. Por eso el estado guarda, por sensor, la marca de agua (última lectura
+contada) y esa última lectura pendiente, que se cierra con la primera lectura
+de la corrida siguiente: actualizar en varias corridas da lo mismo que
+calcular todo de una vez.
+
+La tabla de KPI se rearma desde los estados (una fila por Pasillo_est o
+Sistema y día, sumando los agregados de sus sensores), así su costo depende
+de los días, no de las lecturas acumuladas.
+"""
+import os
+import json
+import math
+from datetime import datetime
+from src.config import obtener_campos_numericos, obtener_columna_identificador
+from src.agregacion import a_numero
+from src.orden import MEMORIA_ORDEN_MB_DEFECTO, ordenar_filas
+from src.transform import normalizar_momento
+
+VERSION_ESTADO_KPI = 2
+NOMBRE_KPI_DEFECTO = "kpi_diario.csv"
+CARPETA_ESTADO_KPI = "_kpi"
+TOLERANCIA_DESVIO_DEFECTO = 2.0
+HUECO_MAXIMO_MIN_DEFECTO = 10.0
+RESOLUCION_HISTOGRAMA = 0.1
+PERCENTIL_KPI = 0.95
+# Valores de Salida_DEFR que cuentan como descongelamiento activo
+ESTADOS_ACTIVOS = ('on', 'conectado', 'encendido', '1', 'true')
+
+COLUMNAS_KPI = [
+    'Grupo', 'Identificador', 'Fecha', 'Variable', 'Lecturas', 'Promedio', 'Minimo', 'Maximo',
+    'Desvio_Estandar', 'P95', 'Min_Observados', 'Min_Fuera_Tolerancia', 'Pct_Fuera_Tolerancia',
+    'Min_Descongelamiento', 'Pct_Descongelamiento',
+]
+# Tipos de la tabla de KPI con destino SQLite (el resto, TEXT)
+TIPOS_SQLITE_KPI = dict({'Lecturas': 'INTEGER'}, **{c: 'REAL' for c in COLUMNAS_KPI[5:]})
+
+def ruta_estado_kpi(carpeta_estado, nombre_proceso):
+    """Archivo de estado de un grupo."""
+    return os.path.join(carpeta_estado, f"{nombre_proceso}.json")
+
+def variable_kpi(cabecera):
+    """
+    Variable principal de una cabecera de lecturas crudas (el primer campo
+    numérico), o None si el esquema no tiene KPI (compresores) o la salida no
+    es de lecturas (agregada o por cambios de estado).
+    """
+    cabecera = list(cabecera or ())
+    if 'Lecturas' in cabecera or 'FechaHora_Original' not in cabecera:
+        return None
+    if not obtener_columna_identificador(cabecera):
+        return None
+    numericos = [c for c in obtener_campos_numericos(cabecera) if c in cabecera]
+    return numericos[0] if numericos else None
+
+def _columna_agrupador(cabecera):
+    """Columna por la que se agrupan los sensores en la tabla de KPI."""
+    return 'Pasillo_est' if 'Pasillo_est' in cabecera else obtener_columna_identificador(cabecera)
+
+def estado_nuevo(parametros):
+    """Estado vacío para 'parametros' ({'tolerancia', 'hueco_maximo_min'})."""
+    return {'version': VERSION_ESTADO_KPI, 'parametros': dict(parametros, resolucion=RESOLUCION_HISTOGRAMA),
+            'variable': None, 'identificadores': {}, 'dias': {}}
+
+def cargar_estado_kpi(ruta, parametros):
+    """
+    Lee el estado de un grupo. None si no existe, no se puede leer o se armó
+    con otros parámetros (hay que reconstruirlo).
+    """
+    if not os.path.exists(ruta):
+        return None
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            estado = json.load(f)
+    except Exception as e:
+        print(f"ADVERTENCIA: Estado de KPI ilegible ({e}). Se reconstruye.")
+        return None
+    if (estado.get('version') != VERSION_ESTADO_KPI
+            or estado.get('parametros') != dict(parametros, resolucion=RESOLUCION_HISTOGRAMA)):
+        print(f"ADVERTENCIA: El estado de KPI {ruta} se armó con otra versión o parámetros. Se reconstruye.")
+        return None
+    return estado
+
+def guardar_estado_kpi(ruta, estado):
+    """Escribe el estado de forma atómica (temporal + reemplazo)."""
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    ruta_tmp = ruta + ".tmp"
+    with open(ruta_tmp, 'w', encoding='utf-8') as f:
+        json.dump(dict(estado, actualizado=datetime.now().isoformat(timespec='seconds')),
+                  f, ensure_ascii=False, separators=(',', ':'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(ruta_tmp, ruta)
+
+def leer_estados_kpi(carpeta_estado):
+    """{grupo: estado} de todos los estados de la carpeta (los ilegibles se omiten)."""
+    estados = {}
+    if not os.path.isdir(carpeta_estado):
+        return estados
+    for nombre in sorted(os.listdir(carpeta_estado)):
+        if not nombre.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(carpeta_estado, nombre), 'r', encoding='utf-8') as f:
+                estados[nombre[:-5]] = json.load(f)
+        except Exception as e:
+            print(f"ADVERTENCIA: Estado de KPI {nombre} ilegible ({e}). Se omite.")
+    return estados
+
+def _dia_vacio():
+    return {'n': 0, 'suma': 0.0, 'suma_cuadrados': 0.0, 'min': None, 'max': None, 'histograma': {},
+            'seg_observados': 0.0, 'seg_con_desvio': 0.0, 'seg_fuera': 0.0,
+            'seg_con_defr': 0.0, 'seg_defr': 0.0}
+
+def _sumar_duracion(dia, segundos, fuera, defr):
+    dia['seg_observados'] += segundos
+    if fuera is not None:
+        dia['seg_con_desvio'] += segundos
+        if fuera:
+            dia['seg_fuera'] += segundos
+    if defr is not None:
+        dia['seg_con_defr'] += segundos
+        if defr:
+            dia['seg_defr'] += segundos
+
+def actualizar_estado_kpi(estado, filas, memoria_mb=MEMORIA_ORDEN_MB_DEFECTO, carpeta_temporal=None,
+                          estadisticas=None):
+    """
+    Suma al estado las lecturas de 'filas' (cabecera y luego filas crudas)
+    posteriores a la marca de agua de su sensor. Las lecturas se recorren
+    ordenadas por (sensor, momento) con el orden externo (src/orden.py); las
+    repetidas y las ya contadas se descartan.
+
+    Returns:
+        bool: False si el esquema no tiene KPI (el estado no cambia).
+    """
+    estadisticas = {} if estadisticas is None else estadisticas
+    for clave in ('lecturas', 'nuevas', 'descartadas', 'sin_fecha'):
+        estadisticas.setdefault(clave, 0)
+    cabecera = next(filas, None)
+    variable = variable_kpi(cabecera)
+    if variable is None or (estado['variable'] and estado['variable'] != variable):
+        return False
+    estado['variable'] = variable
+    cabecera = list(cabecera)
+    idx_id = cabecera.index(obtener_columna_identificador(cabecera))
+    idx_agrupador = cabecera.index(_columna_agrupador(cabecera))
+    idx_fecha = cabecera.index('FechaHora_Original')
+    idx_valor = cabecera.index(variable)
+    idx_desvio = cabecera.index('Desvio_Relativo') if 'Desvio_Relativo' in cabecera else None
+    idx_defr = cabecera.index('Salida_DEFR') if 'Salida_DEFR' in cabecera else None
+    tolerancia = float(estado['parametros']['tolerancia'])
+    hueco_maximo = float(estado['parametros']['hueco_maximo_min']) * 60
+    resolucion = estado['parametros']['resolucion']
+    identificadores, dias = estado['identificadores'], estado['dias']
+
+    def clave(fila):
+        return (str(fila[idx_id] or ''), normalizar_momento(fila[idx_fecha]) or '')
+
+    actual_id, info, dias_id = None, None, None
+    for fila in ordenar_filas(cabecera, filas, memoria_mb, carpeta_temporal, clave=clave):
+        estadisticas['lecturas'] += 1
+        identificador, momento = clave(fila)
+        if not identificador or not momento:
+            estadisticas['sin_fecha'] += 1
+            continue
+        if identificador != actual_id:
+            actual_id = identificador
+            info = identificadores.setdefault(identificador, {'marca': '', 'pendiente': None, 'agrupador': None})
+            # Sensores sin código estandarizado quedan con su propio nombre
+            info['agrupador'] = str(fila[idx_agrupador] or '') or info['agrupador'] or identificador
+            dias_id = dias.setdefault(identificador, {})
+        if momento <= info['marca']:
+            estadisticas['descartadas'] += 1
+            continue
+        estadisticas['nuevas'] += 1
+        info['marca'] = momento
+        instante = datetime.fromisoformat(momento)
+        dia_lectura = momento[:10]
+
+        # La lectura anterior vale hasta esta (con tope en el hueco máximo)
+        pendiente = info['pendiente']
+        if pendiente is not None:
+            segundos = min((instante - datetime.fromisoformat(pendiente[0])).total_seconds(), hueco_maximo)
+            _sumar_duracion(dias_id.setdefault(pendiente[0][:10], _dia_vacio()), segundos,
+                            pendiente[1], pendiente[2])
+
+        desvio = a_numero(fila[idx_desvio]) if idx_desvio is not None else None
+        defr = fila[idx_defr] if idx_defr is not None else None
+        info['pendiente'] = [momento,
+                             None if desvio is None else abs(desvio) > tolerancia,
+                             None if defr in (None, '') else str(defr).strip().lower() in ESTADOS_ACTIVOS]
+
+        valor = a_numero(fila[idx_valor])
+        if valor is None:
+            continue
+        dia = dias_id.setdefault(dia_lectura, _dia_vacio())
+        dia['n'] += 1
+        dia['suma'] += valor
+        dia['suma_cuadrados'] += valor * valor
+        if dia['min'] is None or valor < dia['min']:
+            dia['min'] = valor
+        if dia['max'] is None or valor > dia['max']:
+            dia['max'] = valor
+        caja = str(round(valor / resolucion))
+        dia['histograma'][caja] = dia['histograma'].get(caja, 0) + 1
+    return True
+
+def percentil_histograma(histograma, n, resolucion, percentil=PERCENTIL_KPI):
+    """Percentil (método del rango más cercano) de un histograma {caja: cuenta}."""
+    if not n:
+        return None
+    objetivo = max(math.ceil(percentil * n), 1)
+    acumulado = 0
+    for caja in sorted(histograma, key=int):
+        acumulado += histograma[caja]
+        if acumulado >= objetivo:
+            return round(int(caja) * resolucion, 4)
+    return None
+
+def _minutos(segundos):
+    return round(segundos / 60, 2)
+
+def _porcentaje(parte, total):
+    return round(100 * parte / total, 2) if total else None
+
+def _sumar_dia(total, dia):
+    """Acumula en 'total' los agregados de otro sensor para el mismo día."""
+    for clave in ('n', 'suma', 'suma_cuadrados', 'seg_observados', 'seg_con_desvio', 'seg_fuera',
+                  'seg_con_defr', 'seg_defr'):
+        total[clave] += dia[clave]
+    for clave, elegir in (('min', min), ('max', max)):
+        if dia[clave] is not None:
+            total[clave] = dia[clave] if total[clave] is None else elegir(total[clave], dia[clave])
+    for caja, cuenta in dia['histograma'].items():
+        total['histograma'][caja] = total['histograma'].get(caja, 0) + cuenta
+
+def dias_por_agrupador(estado):
+    """{agrupador: {día: agregados}} sumando los sensores de cada Pasillo_est / Sistema."""
+    agrupados = {}
+    for sensor, dias in estado['dias'].items():
+        agrupador = (estado['identificadores'].get(sensor) or {}).get('agrupador') or sensor
+        destino = agrupados.setdefault(agrupador, {})
+        for dia_texto, dia in dias.items():
+            _sumar_dia(destino.setdefault(dia_texto, _dia_vacio()), dia)
+    return agrupados
+
+def filas_kpi(estados):
+    """Cabecera y filas de la tabla de KPI (una por grupo, Pasillo_est / Sistema y día)."""
+    yield list(COLUMNAS_KPI)
+    for grupo, estado in sorted(estados.items()):
+        resolucion = estado['parametros']['resolucion']
+        agrupados = dias_por_agrupador(estado)
+        for identificador in sorted(agrupados):
+            for dia_texto, dia in sorted(agrupados[identificador].items()):
+                n = dia['n']
+                promedio = dia['suma'] / n if n else None
+                desvio = math.sqrt(max(dia['suma_cuadrados'] / n - promedio * promedio, 0.0)) if n else None
+                yield [grupo, identificador, dia_texto, estado['variable'], n,
+                       None if promedio is None else round(promedio, 4), dia['min'], dia['max'],
+                       None if desvio is None else round(desvio, 4),
+                       percentil_histograma(dia['histograma'], n, resolucion),
+                       _minutos(dia['seg_observados']), _minutos(dia['seg_fuera']),
+                       _porcentaje(dia['seg_fuera'], dia['seg_con_desvio']),
+                       _minutos(dia['seg_defr']), _porcentaje(dia['seg_defr'], dia['seg_con_defr'])]
+
+def resumen_kpi(estadisticas):
+    """Línea de consola de la actualización del estado de KPI."""
+    return (f"KPI diarios ({estadisticas.get('origen', 'shards')}): {estadisticas.get('nuevas', 0)} lecturas "
+            f"nuevas de {estadisticas.get('lecturas', 0)}; ya contadas: {estadisticas.get('descartadas', 0)}, "
+            f"sin fecha: {estadisticas.get('sin_fecha', 0)}")
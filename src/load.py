@@ -1,43 +1,652 @@
 # src/load.py
+import io
 import os
+import itertools
 import csv
+import gzip
+import json
+import time
+import hashlib
+from contextlib import contextmanager
 from datetime import datetime
+from src.config import obtener_columna_identificador, obtener_campos_numericos
+from src.transform import normalizar_momento
+from src.agregacion import a_numero, agregar_intervalos, esquema_agregado, resumen_agregacion
+from src.transiciones import comprimir_transiciones, esquema_transiciones, resumen_transiciones
+from src.orden import ordenar_filas, fusionar_ordenadas, resumen_orden
+from src.indice_tiempo import actualizar_indice_tiempo
 
-def guardar_datos_transformados(data_rows, output_folder, file_name="sitrad_consolidado.csv"):
+# Búfer de escritura por defecto (el share de exportación es lento: pocas
+# escrituras grandes rinden más que muchas pequeñas)
+BUFFER_ESCRITURA_DEFECTO = 8 * 1024 * 1024
+COMPRESIONES_SALIDA = (None, 'gzip')
+
+def nombre_archivo_salida(file_name, compresion=None):
+    """Nombre final del CSV: con gzip se agrega la extensión .gz."""
+    if compresion == 'gzip' and not file_name.endswith('.gz'):
+        return file_name + '.gz'
+    return file_name
+
+@contextmanager
+def abrir_salida_csv(ruta, anexar=False, compresion=None, nivel_gzip=6,
+                     tamano_buffer=BUFFER_ESCRITURA_DEFECTO):
+    """
+    Abre un archivo de texto para escribir CSV (opcionalmente gzip) con un
+    búfer grande. Al salir hace flush + fsync: cuando el bloque termina, los
+    datos ya están en disco. Anexar a un .gz agrega un miembro gzip nuevo
+    (formato válido: los lectores gzip concatenan los miembros).
+    """
+    crudo = open(ruta, 'ab' if anexar else 'wb', buffering=tamano_buffer)
+    try:
+        if compresion == 'gzip':
+            nombre_interno = os.path.basename(ruta)
+            for sufijo in ('.tmp', '.gz'):
+                if nombre_interno.endswith(sufijo):
+                    nombre_interno = nombre_interno[:-len(sufijo)]
+            comprimido = gzip.GzipFile(filename=nombre_interno, mode='wb', fileobj=crudo,
+                                       compresslevel=nivel_gzip, mtime=0)
+        else:
+            comprimido = None
+        texto = io.TextIOWrapper(comprimido or crudo, encoding='utf-8', newline='',
+                                 write_through=False)
+        try:
+            yield texto
+        finally:
+            texto.flush()
+            texto.detach()
+            if comprimido is not None:
+                comprimido.close()
+        crudo.flush()
+        os.fsync(crudo.fileno())
+    finally:
+        crudo.close()
+
+def abrir_lectura_csv(ruta):
+    """Abre un CSV de salida para leerlo, esté o no comprimido con gzip."""
+    with open(ruta, 'rb') as f:
+        es_gzip = f.read(2) == b'\x1f\x8b'
+    if es_gzip:
+        return gzip.open(ruta, 'rt', newline='', encoding='utf-8')
+    return open(ruta, 'r', newline='', encoding='utf-8')
+
+def leer_salida_consolidada(ruta):
+    """
+    Generador: cabecera y luego filas (como texto) de una salida ya escrita, sea
+    un CSV (comprimido o no) o una carpeta particionada Anio=YYYY/Mes=MM/part-*.csv
+    (se recorre en orden de fecha y se emite una sola cabecera).
+    """
+    if os.path.isfile(ruta):
+        with abrir_lectura_csv(ruta) as f:
+            yield from csv.reader(f, delimiter=';')
+        return
+    cabecera_emitida = False
+    for carpeta, subcarpetas, archivos in os.walk(ruta):
+        subcarpetas[:] = sorted(s for s in subcarpetas if not s.startswith('_tmp_'))
+        for nombre in sorted(a for a in archivos if a.startswith('part-') and a.endswith('.csv')):
+            with open(os.path.join(carpeta, nombre), 'r', newline='', encoding='utf-8') as f:
+                reader = csv.reader(f, delimiter=';')
+                cabecera = next(reader, None)
+                if cabecera is None:
+                    continue
+                if not cabecera_emitida:
+                    yield cabecera
+                    cabecera_emitida = True
+                yield from reader
+
+def formateador_decimales(decimales):
+    """
+    Función que da formato fijo a los números (p. ej. 2 -> '12.30'); None = repr
+    de Python. Acepta float o su texto, que es como llegan las filas leídas de
+    los shards; lo que no es un número queda igual.
+    """
+    if decimales is None:
+        return None
+    plantilla = f"%.{int(decimales)}f"
+    def _formato(v):
+        if v.__class__ is float:
+            return plantilla % v
+        numero = a_numero(v) if v.__class__ is str else None
+        return v if numero is None else plantilla % numero
+    return _formato
+
+def _contar_filas(filas, estadisticas, clave):
+    """Deja pasar las filas sumándolas en estadisticas[clave]."""
+    for fila in filas:
+        estadisticas[clave] += 1
+        yield fila
+
+def _formatear_numericos(filas, idx_numericos, formato):
+    """Aplica 'formato' a las columnas numéricas de cada fila."""
+    for fila in filas:
+        for i in idx_numericos:
+            fila[i] = formato(fila[i])
+        yield fila
+
+# Bytes del final del CSV confirmado que se guardan (como hash) en el índice
+BYTES_FIRMA_COLA = 4096
+
+def ruta_indice_incremental(output_filepath):
+    """Archivo lateral con las marcas de agua del CSV consolidado."""
+    return output_filepath + ".marcas.json"
+
+def firma_cola(ruta, tamano):
+    """Hash de los últimos BYTES_FIRMA_COLA bytes de 'ruta' hasta 'tamano' (identifica el CSV confirmado)."""
+    with open(ruta, 'rb') as f:
+        f.seek(max(tamano - BYTES_FIRMA_COLA, 0))
+        return hashlib.sha1(f.read(min(tamano, BYTES_FIRMA_COLA))).hexdigest()
+
+def borrar_indice_incremental(output_filepath):
+    """Quita el índice de marcas: tras reescribir el CSV completo ya no lo describe."""
+    try:
+        os.remove(ruta_indice_incremental(output_filepath))
+    except FileNotFoundError:
+        pass
+
+def reconstruir_marcas(output_filepath, idx_id, idx_fecha):
+    """
+    Recorre UNA vez un CSV consolidado existente (sin índice) y devuelve la
+    marca de agua por identificador: el mayor momento ya cargado.
+    """
+    marcas = {}
+    with abrir_lectura_csv(output_filepath) as f:
+        reader = csv.reader(f, delimiter=';')
+        next(reader, None)  # cabecera
+        for fila in reader:
+            if len(fila) <= max(idx_id, idx_fecha) or not fila[idx_id]:
+                continue
+            momento = normalizar_momento(fila[idx_fecha])
+            if momento and momento > marcas.get(fila[idx_id], ''):
+                marcas[fila[idx_id]] = momento
+    return marcas
+
+def cargar_marcas(output_filepath, cabecera):
     """
-    Guarda la lista de listas de datos procesados en un archivo CSV.
-    
+    Lee (o reconstruye si falta) el índice incremental de un CSV consolidado.
+
+    Returns:
+        dict: {identificador: 'YYYY-MM-DD HH:MM:SS'}, o None si el CSV existente
+              no tiene la misma cabecera (no se puede anexar).
+    """
+    if not os.path.exists(output_filepath):
+        return {}
+
+    with abrir_lectura_csv(output_filepath) as f:
+        cabecera_existente = next(csv.reader(f, delimiter=';'), None)
+    if cabecera_existente is not None and cabecera_existente != [str(c) for c in cabecera]:
+        print(f"ERROR: La cabecera de {output_filepath} no coincide con el esquema actual. "
+              "No se puede anexar en modo incremental.")
+        return None
+
+    ruta_indice = ruta_indice_incremental(output_filepath)
+    if os.path.exists(ruta_indice):
+        try:
+            with open(ruta_indice, 'r', encoding='utf-8') as f:
+                indice = json.load(f)
+            confirmados = indice.get('bytes')
+            tamano = os.path.getsize(output_filepath)
+            # El índice describe este CSV solo si el final de lo confirmado no cambió
+            propio = (confirmados is not None and confirmados <= tamano
+                      and indice.get('cola') == firma_cola(output_filepath, confirmados))
+            if propio and tamano == confirmados:
+                return indice.get('marcas', {})
+            if propio and indice.get('anexando'):
+                # Esta misma carga se cortó después de anexar filas y antes de
+                # confirmarlas en el índice: se descarta esa cola sin confirmar.
+                print(f"   RECUPERACIÓN: Se descartan {tamano - confirmados} bytes de una carga "
+                      f"interrumpida en {output_filepath}.")
+                os.truncate(output_filepath, confirmados)
+                return indice.get('marcas', {})
+            # Cualquier otro cambio (p. ej. una carga completa que reescribió el
+            # CSV) no se recorta nunca: las marcas se reconstruyen desde el CSV
+            print("ADVERTENCIA: El CSV cambió desde la última carga incremental. Se reconstruye su índice.")
+        except Exception as e:
+            print(f"ADVERTENCIA: Índice incremental ilegible ({e}). Se reconstruye desde el CSV.")
+
+    print(f"   Construyendo índice incremental desde {output_filepath} (solo esta vez)...")
+    idx_id, idx_fecha = _indices_clave(cabecera)
+    if 'FechaHora_Fin' in cabecera:
+        # Salida por cambios de estado: la última lectura de cada tramo
+        idx_fecha = list(cabecera).index('FechaHora_Fin')
+    return reconstruir_marcas(output_filepath, idx_id, idx_fecha)
+
+def guardar_marcas(output_filepath, marcas, ordenado=False, ruta_csv=None, anexando=False):
+    """
+    Escribe el índice incremental de forma atómica (temporal + reemplazo) junto
+    con el tamaño confirmado del CSV y el hash de su final, y si el CSV quedó
+    ordenado (src/orden.py). 'ruta_csv' = archivo con el contenido que tendrá
+    el CSV si todavía no se reemplazó (por defecto, el actual).
+
+    Con anexando=True se guarda ANTES de anexar: si la carga se corta, la
+    siguiente recorta solo lo que quedó después de ese tamaño confirmado.
+    """
+    ruta_csv = output_filepath if ruta_csv is None else ruta_csv
+    tamano = os.path.getsize(ruta_csv)
+    ruta_indice = ruta_indice_incremental(output_filepath)
+    ruta_tmp = ruta_indice + ".tmp"
+    with open(ruta_tmp, 'w', encoding='utf-8') as f:
+        json.dump({'actualizado': datetime.now().isoformat(timespec='seconds'),
+                   'bytes': tamano,
+                   'cola': firma_cola(ruta_csv, tamano),
+                   'anexando': anexando,
+                   'ordenado': ordenado,
+                   'marcas': marcas}, f, ensure_ascii=False, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(ruta_tmp, ruta_indice)
+
+def salida_ordenada(output_filepath):
+    """True si el índice registra que el CSV consolidado está ordenado (y su tamaño coincide)."""
+    try:
+        with open(ruta_indice_incremental(output_filepath), 'r', encoding='utf-8') as f:
+            indice = json.load(f)
+        return bool(indice.get('ordenado')) and indice.get('bytes') == os.path.getsize(output_filepath)
+    except (OSError, ValueError):
+        return False
+
+def _indices_clave(cabecera):
+    """Posiciones de la columna identificador y de FechaHora_Original en la cabecera."""
+    cabecera = list(cabecera)
+    return (cabecera.index(obtener_columna_identificador(cabecera)),
+            cabecera.index('FechaHora_Original'))
+
+def filtrar_filas_nuevas(filas, cabecera, marcas, estadisticas):
+    """
+    Deja pasar solo las filas posteriores a la marca de agua de su identificador
+    y descarta las repetidas dentro de la misma corrida (exportes solapados).
+    Actualiza 'marcas' con lo aceptado y cuenta los descartes en 'estadisticas'.
+    Las filas sin fecha válida no tienen clave y siempre pasan.
+    """
+    idx_id, idx_fecha = _indices_clave(cabecera)
+    # Las marcas de corridas anteriores quedan fijas durante la corrida, así el
+    # resultado no depende del orden en que llegan los archivos.
+    marcas_previas = dict(marcas)
+    vistas = set()
+
+    for fila in filas:
+        identificador = fila[idx_id]
+        momento = normalizar_momento(fila[idx_fecha])
+        if momento is not None and identificador:
+            clave = (identificador, momento)
+            if momento <= marcas_previas.get(identificador, '') or clave in vistas:
+                estadisticas['descartadas'] += 1
+                continue
+            vistas.add(clave)
+            if momento > marcas.get(identificador, ''):
+                marcas[identificador] = momento
+        yield fila
+
+def guardar_datos_transformados(data_rows, output_folder, file_name="sitrad_consolidado.csv",
+                                incremental=False, compresion=None, nivel_gzip=6,
+                                tamano_buffer=BUFFER_ESCRITURA_DEFECTO, decimales=None,
+                                agregar=False, transiciones=None, orden=None, indice_tiempo=False):
+    """
+    Guarda los datos procesados en un archivo CSV, escribiendo las filas a medida
+    que llegan (no se necesita tener todo el lote en memoria).
+
+    El archivo se escribe primero como '<nombre>.tmp', se fuerza a disco y se
+    renombra sobre el definitivo: quien lo lea (Power BI) nunca ve un archivo
+    a medio escribir.
+
     Args:
-        data_rows (list of list): Datos procesados listos para ser guardados. La primera 
-                                   fila debe contener las cabeceras.
+        data_rows (iterable of list): Datos procesados listos para ser guardados (lista
+                                       o generador). La primera fila debe contener
+                                       las cabeceras.
         output_folder (str): Carpeta donde se guardará el archivo.
         file_name (str): Nombre del archivo CSV de salida.
-    """
-    if not data_rows or len(data_rows) <= 1:
-        print("ADVERTENCIA: No hay datos de filas para guardar.")
-        return
+        incremental (bool): Si es True, anexa al CSV existente solo las filas
+                            nuevas según su índice de marcas de agua
+                            (<archivo>.marcas.json) en lugar de reescribirlo.
+        compresion (str): None o 'gzip' (se agrega '.gz' al nombre).
+        nivel_gzip (int): Nivel de compresión gzip (1 = rápido ... 9 = más chico).
+        tamano_buffer (int): Bytes del búfer de escritura.
+        decimales (int): Si se indica, los campos numéricos se escriben con ese
+                         número fijo de decimales; si no, con repr de Python.
+        agregar (bool): Si es True y el esquema tiene campos numéricos, se
+                        escribe un resumen por intervalo de 10 minutos
+                        (src/agregacion.py) en lugar de cada lectura.
+        transiciones (dict): Si se indica ({'memoria_mb', 'carpeta_temporal'},
+                             como 'orden') y el esquema es solo de estados, se
+                             escribe una fila por cambio de estado
+                             (src/transiciones.py) en lugar de cada lectura.
+        orden (dict): Si se indica ({'memoria_mb', 'carpeta_temporal'}), las
+                      filas se escriben ordenadas por Llave_Comun, identificador
+                      y FechaHora_Original con un orden externo (src/orden.py).
+                      En modo incremental el lote nuevo se ordena y se fusiona
+                      con el CSV existente, que se reescribe ordenado.
+        indice_tiempo (bool): Mantener <archivo>.indice.json (días e
+                              identificadores -> bytes, src/indice_tiempo.py)
+                              para recortar rangos sin leer todo el CSV. Solo
+                              sin compresión.
 
+    Returns:
+        int: Filas de datos nuevas escritas (sin contar la cabecera), o None si
+             hubo un error al escribir.
+    """
+    filas = iter(data_rows)
+    cabecera = next(filas, None)
+    file_name = nombre_archivo_salida(file_name, compresion)
     output_filepath = os.path.join(output_folder, file_name)
+    cabecera_agregada = esquema_agregado(cabecera) if agregar and cabecera is not None else None
+    cabecera_transiciones = esquema_transiciones(cabecera) if transiciones and cabecera is not None else None
+
+    marcas = None
+    estadisticas = {'descartadas': 0}
+    if incremental and cabecera is not None:
+        marcas = cargar_marcas(output_filepath, cabecera_agregada or cabecera_transiciones or cabecera)
+        if marcas is None:
+            return None
+        marcas_confirmadas = dict(marcas)
+        # Las marcas se aplican a las lecturas crudas, antes de agregar: un
+        # intervalo partido entre dos corridas no repite lecturas.
+        filas = filtrar_filas_nuevas(filas, cabecera, marcas, estadisticas)
+
+    estadisticas_agregacion = {}
+    if cabecera_agregada:
+        cabecera, filas = agregar_intervalos(cabecera, filas, estadisticas_agregacion)
+    estadisticas_transiciones = {}
+    if cabecera_transiciones:
+        cabecera, filas = comprimir_transiciones(cabecera, filas, estadisticas_transiciones,
+                                                 transiciones['memoria_mb'], transiciones['carpeta_temporal'])
+
+    # Formato fijo de decimales solo en las columnas numéricas del esquema (antes
+    # de ordenar: los runs del orden externo guardan las filas como texto)
+    formato = formateador_decimales(decimales)
+    campos_numericos = obtener_campos_numericos(cabecera) if formato and cabecera is not None else ()
+    idx_numericos = [i for i, col in enumerate(cabecera or ()) if col in campos_numericos]
+    if idx_numericos:
+        filas = _formatear_numericos(filas, idx_numericos, formato)
+
+    anexar = incremental and os.path.exists(output_filepath)
+    # Con orden, anexar no lo mantendría: el CSV existente se fusiona con el lote nuevo
+    fusionar = anexar and orden is not None
+    existente_ordenado = fusionar and salida_ordenada(output_filepath)
+    estadisticas_orden = {}
+    if orden and cabecera is not None and (not fusionar or existente_ordenado):
+        filas = ordenar_filas(cabecera, filas, orden['memoria_mb'], orden['carpeta_temporal'],
+                              estadisticas_orden)
+
+    primera_fila = next(filas, None) if cabecera is not None else None
+
+    if primera_fila is None:
+        if estadisticas['descartadas']:
+            print(f"Sin filas nuevas: {estadisticas['descartadas']} filas ya cargadas fueron descartadas.")
+        else:
+            print("ADVERTENCIA: No hay datos de filas para guardar.")
+        return 0
+
+    filas = itertools.chain((primera_fila,), filas)
+    if fusionar:
+        existentes = leer_salida_consolidada(output_filepath)
+        next(existentes, None)  # cabecera
+        estadisticas['existentes'] = 0
+        existentes = _contar_filas(existentes, estadisticas, 'existentes')
+        if existente_ordenado:
+            filas = fusionar_ordenadas(cabecera, existentes, filas)
+        else:
+            # Primera vez ordenado: se ordena todo el contenido (existente + nuevo)
+            filas = ordenar_filas(cabecera, itertools.chain(existentes, filas), orden['memoria_mb'],
+                                  orden['carpeta_temporal'], estadisticas_orden)
+        anexar = False
+
+    ruta_escritura = output_filepath if anexar else output_filepath + ".tmp"
+    tamano_inicial = os.path.getsize(output_filepath) if anexar else 0
+    total_filas = 0
 
     try:
         # Asegurar que la carpeta de salida exista
         os.makedirs(output_folder, exist_ok=True)
-        
+        if anexar:
+            # Lo que quede después de este tamaño es de esta carga hasta confirmarlo
+            guardar_marcas(output_filepath, marcas_confirmadas, anexando=True)
+        inicio = time.perf_counter()
+
         # La primera fila es la cabecera; el resto son los datos.
-        
-        with open(output_filepath, 'w', newline='', encoding='utf-8') as f:
+
+        with abrir_salida_csv(ruta_escritura, anexar, compresion, nivel_gzip, tamano_buffer) as f:
             # Usar punto y coma como separador, como es común en archivos de datos.
-            writer = csv.writer(f, delimiter=';') 
-            
-            # Escribir la cabecera (data_rows[0])
-            writer.writerow(data_rows[0])
-            
-            # Escribir las filas de datos (data_rows[1:])
-            writer.writerows(data_rows[1:])
-            
+            writer = csv.writer(f, delimiter=';')
+
+            # Escribir la cabecera (al anexar ya está en el archivo)
+            if not anexar:
+                writer.writerow(cabecera)
+
+            # Escribir las filas de datos conforme las produce el generador
+            for fila in filas:
+                writer.writerow(fila)
+                total_filas += 1
+
+        if fusionar:
+            # El índice se guarda ANTES de reemplazar: si la corrida se corta en
+            # medio, el CSV anterior no coincide con el tamaño registrado y las
+            # marcas se reconstruyen desde él (nunca se recorta un CSV fusionado)
+            total_filas -= estadisticas['existentes']
+            guardar_marcas(output_filepath, marcas, ordenado=True, ruta_csv=ruta_escritura)
+            os.replace(ruta_escritura, output_filepath)
+        else:
+            if not anexar:
+                if not incremental:
+                    # Una carga completa deja el índice sin validez: la próxima
+                    # incremental reconstruye las marcas desde el CSV nuevo
+                    borrar_indice_incremental(output_filepath)
+                os.replace(ruta_escritura, output_filepath)
+            if incremental:
+                # El índice solo avanza cuando las filas ya están en disco
+                guardar_marcas(output_filepath, marcas, ordenado=orden is not None)
+
+        if indice_tiempo and compresion is None:
+            # Al anexar solo se recorre lo nuevo
+            actualizar_indice_tiempo(output_filepath, tamano_inicial)
+
+        segundos = max(time.perf_counter() - inicio, 1e-9)
+        bytes_escritos = os.path.getsize(output_filepath) - tamano_inicial
         print(f"\n--- CARGA EXITOSA ---")
         print(f"Datos guardados en: {output_filepath}")
-        print(f"Filas de datos totales escritas: {len(data_rows) - 1}")
+        print(f"Filas de datos totales escritas: {total_filas}")
+        # El tiempo incluye producir las filas (el CSV se escribe en streaming)
+        print(f"Tamaño en disco: {bytes_escritos / 1048576:.2f} MB escritos en {segundos:.1f} s "
+              f"({bytes_escritos / 1048576 / segundos:.1f} MB/s de punta a punta)")
+        if incremental:
+            print(f"Filas duplicadas descartadas: {estadisticas['descartadas']}")
+        if cabecera_agregada:
+            print(resumen_agregacion(estadisticas_agregacion))
+        if cabecera_transiciones:
+            print(resumen_transiciones(estadisticas_transiciones))
+        if estadisticas_orden:
+            print(resumen_orden(estadisticas_orden))
+        if fusionar:
+            print(f"Fusionado con las {estadisticas['existentes']} filas existentes "
+                  f"({'ya ordenadas' if existente_ordenado else 'ordenadas por primera vez'}).")
+
+    except Exception as e:
+        print(f"ERROR al guardar el archivo CSV: {e}")
+        if not anexar and os.path.exists(ruta_escritura):
+            os.remove(ruta_escritura)
+        return None
+
+    return total_filas
+
+# =================================================================
+# Salida particionada por fecha: <carpeta>/Anio=YYYY/Mes=MM/part-*.csv
+# =================================================================
+
+PARTICION_SIN_FECHA = ('Anio=0000', 'Mes=00')
+MAX_PARTICIONES_ABIERTAS = 64
+
+def carpeta_particion(anio, mes):
+    """('Anio=YYYY', 'Mes=MM') para una fila; filas sin fecha van a Anio=0000/Mes=00."""
+    try:
+        return f"Anio={int(anio):04d}", f"Mes={int(mes):02d}"
+    except (TypeError, ValueError):
+        return PARTICION_SIN_FECHA
+
+def _clave_fila(fila, idx_id, idx_fecha):
+    """Clave natural (identificador, momento); sin fecha, la fila completa como texto."""
+    momento = normalizar_momento(fila[idx_fecha])
+    if momento is not None and fila[idx_id] not in (None, ''):
+        return fila[idx_id], momento
+    return tuple('' if v is None else str(v) for v in fila)
+
+def _filas_de_particion(carpeta, parts_previos, ruta_nuevas, idx_id, idx_fecha, cuenta):
+    """
+    Generador: las filas que ya tenía la partición y luego las nuevas que no
+    estén repetidas (misma clave natural); suma las nuevas en cuenta['agregadas'].
+    """
+    vistas = set()
+    for nombre in parts_previos:
+        with open(os.path.join(carpeta, nombre), 'r', newline='', encoding='utf-8') as fp:
+            reader = csv.reader(fp, delimiter=';')
+            next(reader, None)
+            for fila in reader:
+                vistas.add(_clave_fila(fila, idx_id, idx_fecha))
+                yield fila
+
+    with open(ruta_nuevas, 'r', newline='', encoding='utf-8') as fp:
+        for fila in csv.reader(fp, delimiter=';'):
+            clave = _clave_fila(fila, idx_id, idx_fecha)
+            if clave in vistas:
+                continue
+            vistas.add(clave)
+            cuenta['agregadas'] += 1
+            yield fila
+
+def _reescribir_particion(carpeta, cabecera, ruta_nuevas, nombre_part, idx_id, idx_fecha, orden=None):
+    """
+    Reescribe UNA partición como un único part: primero las filas que ya tenía
+    y luego las nuevas que no estén repetidas (misma clave natural); con
+    'orden' (ver guardar_datos_transformados) la partición completa queda
+    ordenada. El part nuevo se escribe en temporal, se hace fsync y se
+    renombra; recién entonces se borran los parts anteriores. Si no hay nada
+    nuevo no se toca.
+
+    Returns:
+        int: Filas nuevas agregadas a la partición.
+    """
+    parts_previos = sorted(f for f in os.listdir(carpeta) if f.startswith('part-') and f.endswith('.csv'))
+    ruta_part = os.path.join(carpeta, nombre_part)
+    ruta_tmp = ruta_part + ".tmp"
+    cuenta = {'agregadas': 0}
+    filas = _filas_de_particion(carpeta, parts_previos, ruta_nuevas, idx_id, idx_fecha, cuenta)
+    if orden:
+        # Un mes por partición: se reordena completa (acotada en memoria igual)
+        filas = ordenar_filas(cabecera, filas, orden['memoria_mb'], orden['carpeta_temporal'])
+
+    with open(ruta_tmp, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(cabecera)
+        writer.writerows(filas)
+        f.flush()
+        os.fsync(f.fileno())
+
+    agregadas = cuenta['agregadas']
+    if not agregadas and parts_previos:
+        # Nada nuevo: la partición queda intacta (no cambia para Power BI)
+        os.remove(ruta_tmp)
+        return 0
+
+    os.replace(ruta_tmp, ruta_part)
+    for nombre in parts_previos:
+        if nombre != nombre_part:
+            os.remove(os.path.join(carpeta, nombre))
+    return agregadas
+
+def guardar_particionado(data_rows, output_folder, agregar=False, transiciones=None, orden=None):
+    """
+    Guarda los datos en particiones por fecha dentro de 'output_folder'
+    (Export/<PROCESO>/Anio=YYYY/Mes=MM/part-*.csv) usando Anio y Mes ya
+    calculados por la transformación. Solo se reescriben las particiones que
+    reciben filas en esta corrida; el resto no se toca. Las filas repetidas
+    (mismo identificador y FechaHora_Original) no se duplican en la partición.
+
+    Args:
+        data_rows (iterable of list): Cabecera primero y luego las filas.
+        output_folder (str): Carpeta del proceso (se crea si no existe).
+        agregar (bool): Resumir por intervalo de 10 minutos antes de particionar
+                        (ver guardar_datos_transformados).
+        transiciones (dict): Una fila por cambio de estado en los esquemas solo
+                             de estados (ver guardar_datos_transformados).
+        orden (dict): Dejar cada partición reescrita ordenada por Llave_Comun,
+                      identificador y FechaHora_Original (src/orden.py).
+
+    Returns:
+        int: Filas nuevas escritas, o None si hubo un error al escribir.
+    """
+    filas = iter(data_rows)
+    cabecera = next(filas, None)
+    if cabecera is None:
+        print("ADVERTENCIA: No hay datos de filas para guardar.")
+        return 0
+
+    estadisticas_agregacion = {}
+    if agregar:
+        cabecera, filas = agregar_intervalos(cabecera, filas, estadisticas_agregacion)
+    estadisticas_transiciones = {}
+    if transiciones:
+        cabecera, filas = comprimir_transiciones(cabecera, filas, estadisticas_transiciones,
+                                                 transiciones['memoria_mb'], transiciones['carpeta_temporal'])
+
+    cabecera = list(cabecera)
+    idx_anio, idx_mes = cabecera.index('Anio'), cabecera.index('Mes')
+    idx_id, idx_fecha = _indices_clave(cabecera)
+    carpeta_tmp = os.path.join(output_folder, f"_tmp_{os.getpid()}")
+    nombre_part = f"part-{datetime.now():%Y%m%d%H%M%S}-{os.getpid()}.csv"
+
+    # 1. Repartir las filas nuevas en un archivo temporal por partición
+    abiertos = {}
+    tocadas = set()
+    total_recibidas = 0
+    try:
+        os.makedirs(carpeta_tmp, exist_ok=True)
+        for fila in filas:
+            particion = carpeta_particion(fila[idx_anio], fila[idx_mes])
+            destino = abiertos.get(particion)
+            if destino is None:
+                if len(abiertos) >= MAX_PARTICIONES_ABIERTAS:
+                    for f, _ in abiertos.values():
+                        f.close()
+                    abiertos.clear()
+                f = open(os.path.join(carpeta_tmp, "_".join(particion) + ".csv"), 'a',
+                         newline='', encoding='utf-8')
+                destino = abiertos[particion] = (f, csv.writer(f, delimiter=';'))
+                tocadas.add(particion)
+            destino[1].writerow(fila)
+            total_recibidas += 1
+        for f, _ in abiertos.values():
+            f.close()
+        abiertos.clear()
+
+        if not total_recibidas:
+            print("ADVERTENCIA: No hay datos de filas para guardar.")
+            return 0
+
+        # 2. Reescribir solo las particiones tocadas
+        total_nuevas = 0
+        reescritas = 0
+        for particion in sorted(tocadas):
+            carpeta = os.path.join(output_folder, *particion)
+            os.makedirs(carpeta, exist_ok=True)
+            nuevas = _reescribir_particion(
+                carpeta, cabecera, os.path.join(carpeta_tmp, "_".join(particion) + ".csv"),
+                nombre_part, idx_id, idx_fecha, orden)
+            total_nuevas += nuevas
+            reescritas += 1 if nuevas else 0
+
+        print(f"\n--- CARGA EXITOSA (PARTICIONADA) ---")
+        print(f"Datos guardados en: {output_folder}")
+        print(f"Particiones reescritas: {reescritas} de {len(tocadas)} con datos de esta corrida")
+        print(f"Filas nuevas escritas: {total_nuevas} (repetidas omitidas: {total_recibidas - total_nuevas})")
+        if estadisticas_agregacion:
+            print(resumen_agregacion(estadisticas_agregacion))
+        if estadisticas_transiciones:
+            print(resumen_transiciones(estadisticas_transiciones))
+        return total_nuevas
 
     except Exception as e:
-        print(f"ERROR al guardar el archivo CSV: {e}")
\ No newline at end of file
+        print(f"ERROR al guardar la salida particionada: {e}")
+        return None
+    finally:
+        for f, _ in abiertos.values():
+            f.close()
+        if os.path.isdir(carpeta_tmp):
+            for nombre in os.listdir(carpeta_tmp):
+                os.remove(os.path.join(carpeta_tmp, nombre))
+            os.rmdir(carpeta_tmp)
@@ -0,0 +1,197 @@
+# src/metricas.py
+"""
+Instrumentación de la corrida: tiempos por etapa (extracción, transformación,
+shard, archivado y carga), filas de entrada/salida, bytes escritos y memoria,
+por archivo y por grupo. Al final se escribe un reporte JSON + CSV por corrida
+y, en modo perfil, los perfiles cProfile combinados de todos los procesos.
+"""
+import os
+import sys
+import csv
+import json
+import time
+import pstats
+import cProfile
+import tracemalloc
+
+try:
+    import resource  # No existe en Windows: ahí el pico de RSS se reporta vacío
+except ImportError:
+    resource = None
+
+# Columnas de los CSV del reporte (el JSON lleva todo)
+COLUMNAS_REPORTE_ARCHIVOS = [
+    'grupo', 'archivo', 'estado', 'desde_cache', 'seg_hash', 'seg_extraer', 'seg_transformar',
+    'seg_shard', 'seg_archivar', 'filas_leidas', 'filas_transformadas', 'bytes_shard',
+    'rss_max_mb', 'pico_traza_mb', 'pid'
+]
+COLUMNAS_REPORTE_GRUPOS = [
+    'grupo', 'salida', 'archivos', 'ok', 'desde_cache', 'saltados', 'fallos', 'pendientes',
+    'seg_total', 'seg_extraer', 'seg_transformar', 'seg_shard', 'seg_archivar', 'seg_carga',
+    'filas_leidas', 'filas_transformadas', 'filas_entrada_carga', 'filas_escritas',
+    'filas_omitidas_carga', 'bytes_escritos', 'rss_max_mb'
+]
+ETAPAS_ARCHIVO = ('seg_hash', 'seg_extraer', 'seg_transformar', 'seg_shard', 'seg_archivar')
+
+def pico_rss_mb():
+    """Máximo de memoria residente del proceso hasta ahora (None si no se puede medir)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB; macOS en bytes
+    return round(pico / (1048576 if sys.platform == 'darwin' else 1024), 1)
+
+def cronometrar_filas(filas, medicion, clave_segundos, clave_filas, contar=None):
+    """
+    Envuelve un iterable de filas y acumula en medicion[clave_segundos] el
+    tiempo pasado DENTRO del iterable (incluye lo que hagan sus propias fuentes)
+    y en medicion[clave_filas] las filas que entregó. Se registra al agotarse o
+    al cerrarse el generador. Con 'contar', cada elemento vale contar(elemento)
+    filas (p. ej. lotes columnares).
+    """
+    reloj = time.perf_counter
+    filas = iter(filas)
+    segundos = 0.0
+    total = 0
+    try:
+        while True:
+            inicio = reloj()
+            try:
+                fila = next(filas)
+            except StopIteration:
+                segundos += reloj() - inicio
+                return
+            segundos += reloj() - inicio
+            total += 1 if contar is None else contar(fila)
+            yield fila
+    finally:
+        medicion[clave_segundos] = medicion.get(clave_segundos, 0.0) + segundos
+        medicion[clave_filas] = medicion.get(clave_filas, 0) + total
+
+def iniciar_traza_memoria():
+    """
+    Arranca tracemalloc (o reinicia su pico si ya estaba activo, p. ej. en el
+    proceso principal en modo perfil). Devuelve True si hay que detenerlo al final.
+    """
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        return False
+    tracemalloc.start()
+    return True
+
+def pico_traza_mb(detener):
+    pico = tracemalloc.get_traced_memory()[1]
+    if detener:
+        tracemalloc.stop()
+    return round(pico / 1048576, 2)
+
+def bytes_escritos_desde(ruta, inicio, tamano_previo=None):
+    """
+    Bytes de salida escritos desde 'inicio' (time.time()). Con 'tamano_previo'
+    (anexión incremental) es lo que creció el archivo; si no, la suma de los
+    archivos bajo 'ruta' modificados desde 'inicio' (reescritura completa o
+    particiones).
+    """
+    if not os.path.exists(ruta):
+        return 0
+    if tamano_previo is not None and os.path.isfile(ruta):
+        return max(os.path.getsize(ruta) - tamano_previo, 0)
+    if os.path.isfile(ruta):
+        return os.path.getsize(ruta) if os.path.getmtime(ruta) >= inicio else 0
+    total = 0
+    for carpeta, _, archivos in os.walk(ruta):
+        for nombre in archivos:
+            ruta_archivo = os.path.join(carpeta, nombre)
+            if os.path.getmtime(ruta_archivo) >= inicio:
+                total += os.path.getsize(ruta_archivo)
+    return total
+
+def resumir_grupo(grupo, medicion_grupo, archivos):
+    """Suma las mediciones de los archivos del grupo en la medición del grupo."""
+    resumen = {'grupo': grupo, 'archivos': len(archivos), 'ok': 0, 'desde_cache': 0,
+               'saltados': 0, 'fallos': 0, 'filas_leidas': 0, 'filas_transformadas': 0}
+    for etapa in ETAPAS_ARCHIVO:
+        resumen[etapa] = 0.0
+    for medicion in archivos:
+        estado = medicion.get('estado')
+        if estado == 'OK':
+            resumen['ok'] += 1
+            resumen['desde_cache'] += 1 if medicion.get('desde_cache') else 0
+        elif estado == 'SALTADO':
+            resumen['saltados'] += 1
+        else:
+            resumen['fallos'] += 1
+        resumen['filas_leidas'] += medicion.get('filas_leidas', 0)
+        resumen['filas_transformadas'] += medicion.get('filas_transformadas', 0)
+        for etapa in ETAPAS_ARCHIVO:
+            resumen[etapa] += medicion.get(etapa, 0.0)
+    resumen.update(medicion_grupo)
+    return redondear(resumen)
+
+def redondear(medicion):
+    return {clave: round(valor, 4) if isinstance(valor, float) else valor
+            for clave, valor in medicion.items()}
+
+def escribir_reporte(carpeta, sello, reporte):
+    """
+    Escribe reporte_<sello>.json (completo) y reporte_<sello>_archivos.csv /
+    reporte_<sello>_grupos.csv (una fila por archivo / por grupo, separador ';').
+
+    Returns:
+        str: Ruta del JSON, o None si no se pudo escribir.
+    """
+    try:
+        os.makedirs(carpeta, exist_ok=True)
+        ruta_json = os.path.join(carpeta, f"reporte_{sello}.json")
+        with open(ruta_json, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False)
+
+        for nombre, columnas, filas in (('archivos', COLUMNAS_REPORTE_ARCHIVOS, reporte['archivos']),
+                                        ('grupos', COLUMNAS_REPORTE_GRUPOS, reporte['grupos'])):
+            with open(os.path.join(carpeta, f"reporte_{sello}_{nombre}.csv"), 'w',
+                      newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=columnas, delimiter=';', extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(filas)
+        return ruta_json
+    except Exception as e:
+        print(f"ERROR al escribir el reporte de la corrida: {e}")
+        return None
+
+# =================================================================
+# Modo perfil (cProfile)
+# =================================================================
+
+def iniciar_perfil():
+    perfil = cProfile.Profile()
+    perfil.enable()
+    return perfil
+
+def guardar_perfil(perfil, ruta):
+    perfil.disable()
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    perfil.dump_stats(ruta)
+
+def combinar_perfiles(rutas, ruta_destino, limite=40):
+    """
+    Une los .prof de la corrida (proceso principal y workers) en 'ruta_destino'
+    (.prof, se abre con pstats o snakeviz) y deja al lado un .txt con las
+    funciones más costosas por tiempo propio y por tiempo acumulado. Los
+    parciales se borran.
+    """
+    rutas = [r for r in rutas if os.path.exists(r)]
+    if not rutas:
+        return None
+    estadisticas = pstats.Stats(*rutas)
+    estadisticas.dump_stats(ruta_destino)
+
+    with open(os.path.splitext(ruta_destino)[0] + ".txt", 'w', encoding='utf-8') as f:
+        estadisticas.stream = f
+        for orden in ('tottime', 'cumulative'):
+            f.write(f"===== Top {limite} por {orden} =====\n")
+            estadisticas.sort_stats(orden).print_stats(limite)
+
+    for ruta in rutas:
+        if ruta != ruta_destino:
+            os.remove(ruta)
+    return ruta_destino
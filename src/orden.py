@@ -0,0 +1,164 @@
+# src/orden.py
+"""
+Orden externo de las salidas consolidadas por (Llave_Comun, identificador,
+FechaHora_Original).
+
+Un grupo puede pesar varios GB, así que no se ordena en memoria: las filas se
+juntan en tandas que entran en el presupuesto de memoria, cada tanda se ordena
+y se vuelca a un archivo temporal (run) y al final los runs se fusionan con
+heapq.merge. Si hay más de MAX_RUNS_POR_FUSION runs se fusionan por pasadas.
+Si todo entra en una tanda no se escribe nada a disco.
+
+Los runs guardan la clave ya calculada delante de la fila: la fusión no vuelve
+a normalizar fechas. El orden es estable: a igual clave, las filas salen en el
+orden en que llegaron (y en fusionar_ordenadas, primero las existentes).
+"""
+import os
+import csv
+import sys
+import heapq
+import shutil
+import tempfile
+from operator import itemgetter
+from src.config import obtener_columna_identificador
+from src.transform import normalizar_momento
+
+MEMORIA_ORDEN_MB_DEFECTO = 256
+MAX_RUNS_POR_FUSION = 64
+# Filas con las que se estima cuánta memoria ocupa cada fila
+FILAS_MUESTRA = 1000
+MIN_FILAS_POR_RUN = 1000
+
+_primero = itemgetter(0)
+
+def _texto(valor):
+    if valor.__class__ is str:
+        return valor
+    return '' if valor is None else str(valor)
+
+def funcion_clave(cabecera):
+    """
+    Función fila -> clave de orden (Llave_Comun, identificador, momento), todo
+    como texto comparable. Las filas sin fecha quedan primero.
+    """
+    cabecera = list(cabecera)
+    idx_llave = cabecera.index('Llave_Comun')
+    idx_id = cabecera.index(obtener_columna_identificador(cabecera))
+    idx_fecha = cabecera.index('FechaHora_Original')
+
+    def clave(fila):
+        return (_texto(fila[idx_llave]), _texto(fila[idx_id]),
+                normalizar_momento(fila[idx_fecha]) or '')
+    return clave
+
+def _bytes_por_fila(muestra):
+    """Estimación de memoria de una entrada (clave, fila) del búfer."""
+    total = 0
+    for clave, fila in muestra:
+        total += (sys.getsizeof(fila) + sum(sys.getsizeof(v) for v in fila)
+                  + sys.getsizeof(clave) + sum(sys.getsizeof(v) for v in clave) + 64)
+    return total / max(len(muestra), 1)
+
+def _volcar_run(carpeta, numero, entradas):
+    """Escribe un run (clave + fila por línea) y devuelve su ruta."""
+    ruta = os.path.join(carpeta, f"run_{numero:05d}.csv")
+    with open(ruta, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f, delimiter=';').writerows(clave + tuple(fila) for clave, fila in entradas)
+    return ruta
+
+def _leer_run(ruta, ancho_clave):
+    """Generador de (clave, fila) de un run."""
+    with open(ruta, 'r', newline='', encoding='utf-8') as f:
+        for registro in csv.reader(f, delimiter=';'):
+            yield tuple(registro[:ancho_clave]), registro[ancho_clave:]
+
+def _fusionar_runs(carpeta, runs, ancho_clave, estadisticas):
+    """Reduce la lista de runs por pasadas hasta que se puedan fusionar de una vez."""
+    numero = len(runs)
+    while len(runs) > MAX_RUNS_POR_FUSION:
+        grupo, runs = runs[:MAX_RUNS_POR_FUSION], runs[MAX_RUNS_POR_FUSION:]
+        runs.append(_volcar_run(carpeta, numero,
+                                heapq.merge(*[_leer_run(r, ancho_clave) for r in grupo], key=_primero)))
+        numero += 1
+        estadisticas['pasadas_fusion'] = estadisticas.get('pasadas_fusion', 0) + 1
+        for ruta in grupo:
+            os.remove(ruta)
+    return runs
+
+def ordenar_filas(cabecera, filas, memoria_mb=MEMORIA_ORDEN_MB_DEFECTO, carpeta_temporal=None,
+                  estadisticas=None, clave=None):
+    """
+    Generador: las filas ordenadas por (Llave_Comun, identificador,
+    FechaHora_Original) sin tener en memoria más de 'memoria_mb' (aprox.).
+
+    Args:
+        cabecera (list): Cabecera de las filas (no se emite).
+        filas (iterable of list): Filas a ordenar.
+        memoria_mb (float): Presupuesto de memoria del búfer de cada tanda.
+        carpeta_temporal (str): Dónde crear los runs (se borran al terminar).
+                                None = carpeta temporal del sistema.
+        estadisticas (dict): Si se indica, recibe 'filas' y 'runs'.
+        clave (callable): Otra clave de orden (fila -> tupla de textos); por
+                          defecto la de funcion_clave.
+    """
+    estadisticas = {} if estadisticas is None else estadisticas
+    clave = clave or funcion_clave(cabecera)
+    presupuesto = max(float(memoria_mb), 1.0) * 1048576
+    filas_por_run = None
+    bufer = []
+    runs = []
+    carpeta = None
+    total = 0
+
+    try:
+        for fila in filas:
+            bufer.append((clave(fila), fila))
+            total += 1
+            if filas_por_run is None:
+                if len(bufer) < FILAS_MUESTRA:
+                    continue
+                filas_por_run = max(int(presupuesto // _bytes_por_fila(bufer)), MIN_FILAS_POR_RUN)
+            if len(bufer) >= filas_por_run:
+                if carpeta is None:
+                    if carpeta_temporal:
+                        os.makedirs(carpeta_temporal, exist_ok=True)
+                    carpeta = tempfile.mkdtemp(prefix='orden_', dir=carpeta_temporal)
+                    ancho_clave = len(bufer[0][0])
+                bufer.sort(key=_primero)
+                runs.append(_volcar_run(carpeta, len(runs), bufer))
+                bufer = []
+
+        estadisticas['filas'] = total
+        estadisticas['runs'] = len(runs) + (1 if runs and bufer else 0)
+        bufer.sort(key=_primero)
+        if not runs:
+            for _, fila in bufer:
+                yield fila
+            return
+
+        if bufer:
+            runs.append(_volcar_run(carpeta, len(runs), bufer))
+            bufer = []
+        runs = _fusionar_runs(carpeta, runs, ancho_clave, estadisticas)
+        for _, fila in heapq.merge(*[_leer_run(r, ancho_clave) for r in runs], key=_primero):
+            yield fila
+    finally:
+        if carpeta is not None:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+def fusionar_ordenadas(cabecera, existentes, nuevas):
+    """
+    Generador: fusiona dos flujos de filas ya ordenados (p. ej. el CSV
+    consolidado existente y el lote nuevo ordenado) en uno solo ordenado. A
+    igual clave salen primero las existentes.
+    """
+    clave = funcion_clave(cabecera)
+    for _, fila in heapq.merge(((clave(f), f) for f in existentes),
+                               ((clave(f), f) for f in nuevas), key=_primero):
+        yield fila
+
+def resumen_orden(estadisticas):
+    """Línea de consola del orden externo."""
+    runs = estadisticas.get('runs', 0)
+    detalle = f"{runs} runs en disco" if runs else "en memoria"
+    return f"Orden por Llave_Comun/identificador/fecha: {estadisticas.get('filas', 0)} filas ({detalle})"
@@ -0,0 +1,147 @@
+# src/preescaneo.py
+"""
+Preescaneo de la bandeja de entrada, antes de la extracción completa.
+
+De cada libro se leen solo la celda de identificación (B1) y la fila de
+cabeceras (src/xlsx_directo.leer_encabezado_xlsx) y se clasifica por 'tipo'
+de configuración y firma de cabecera. Se rechazan de entrada:
+  - DESCONOCIDO: B1 vacío o sin configuración.
+  - CABECERA_INCOMPATIBLE: faltan columnas de 'column_mapping' (sin esto, la
+    transformación las salta en silencio y la salida queda llena de nulos).
+  - OTRO_ESQUEMA: el esquema de salida no es el del resto del grupo (un libro
+    de presión en la carpeta de pasillos, por ejemplo).
+  - ILEGIBLE: no es un .xlsx válido.
+
+Los aceptados se procesan del más grande al más chico, para que los workers
+terminen parejos; la consolidación mantiene el orden original.
+"""
+import os
+import hashlib
+from collections import Counter
+from src.config import (CONFIGURACION_ARCHIVOS, obtener_celda_pasillo,
+                        obtener_configuracion_por_nombre_interno)
+from src.xlsx_directo import leer_encabezado_xlsx
+
+ESTADO_ACEPTADO = 'OK'
+ESTADOS_RECHAZO = ('DESCONOCIDO', 'CABECERA_INCOMPATIBLE', 'OTRO_ESQUEMA', 'ILEGIBLE')
+
+def firma_cabecera(headers):
+    """Huella corta de una fila de cabeceras (sin las celdas vacías del final)."""
+    headers = list(headers)
+    while headers and headers[-1] in (None, ''):
+        headers.pop()
+    texto = '\x1f'.join('' if h is None else str(h).strip() for h in headers)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()[:10]
+
+def _coordenadas(celda):
+    """'B1' -> (fila 1, columna 2)."""
+    letras = celda.rstrip('0123456789')
+    columna = 0
+    for letra in letras.upper():
+        columna = columna * 26 + (ord(letra) - 64)
+    return int(celda[len(letras):]), columna
+
+def _config_por_cabecera(headers):
+    """Tipo de la primera configuración cuyas columnas están todas en 'headers', o None."""
+    for config in CONFIGURACION_ARCHIVOS:
+        if all(col in headers for col in config['column_mapping']):
+            return config['tipo']
+    return None
+
+def clasificar_archivo(filepath, faltantes_tolerados=0):
+    """
+    Clasifica un libro leyendo solo B1 y su fila de cabeceras. Es una función
+    de módulo para poder ejecutarse en el pool de workers.
+
+    Returns:
+        dict: {'ruta', 'tamano', 'estado', 'tipo', 'nombre_interno', 'firma',
+               'esquema', 'motivo'}; 'esquema' es la tupla del esquema de salida.
+    """
+    clasificacion = {'ruta': filepath, 'tamano': 0, 'estado': ESTADO_ACEPTADO, 'tipo': None,
+                     'nombre_interno': None, 'firma': None, 'esquema': None, 'motivo': None}
+    try:
+        clasificacion['tamano'] = os.path.getsize(filepath)
+        fila_id, columna_id = _coordenadas(obtener_celda_pasillo(os.path.basename(filepath)))
+        # La fila de cabeceras depende de la configuración; se lee hasta la mayor posible
+        hasta = max([fila_id] + [c.get('data_start_row', 1) for c in CONFIGURACION_ARCHIVOS])
+        filas = leer_encabezado_xlsx(filepath, hasta)
+    except Exception as e:
+        clasificacion.update(estado='ILEGIBLE', motivo=str(e))
+        return clasificacion
+
+    fila = filas.get(fila_id, ())
+    nombre = fila[columna_id - 1] if len(fila) >= columna_id else None
+    clasificacion['nombre_interno'] = None if nombre is None else str(nombre).strip()
+    config = obtener_configuracion_por_nombre_interno(str(nombre)) if nombre else None
+    if not config:
+        clasificacion.update(estado='DESCONOCIDO',
+                             motivo=f"B1 = {nombre!r} no corresponde a ninguna configuración")
+        return clasificacion
+
+    # Mismas cabeceras que arma leer_archivo_excel
+    headers = [str(c).strip() if c is not None else f"Col_{i}"
+               for i, c in enumerate(filas.get(config.get('data_start_row', 1), ()))]
+    clasificacion.update(tipo=config['tipo'], firma=firma_cabecera(headers),
+                         esquema=tuple(config['output_schema']))
+    faltantes = [col for col in config['column_mapping'] if col not in headers]
+    fecha = next((col for col, destino in config['column_mapping'].items() if destino == 'FechaHora_Original'), None)
+    if faltantes and (len(faltantes) > faltantes_tolerados or fecha in faltantes):
+        motivo = f"faltan {len(faltantes)} columnas de {config['tipo']}: {', '.join(faltantes)}"
+        otro = _config_por_cabecera(headers)
+        if otro and otro != config['tipo']:
+            motivo += f" (la cabecera es de {otro})"
+        clasificacion.update(estado='CABECERA_INCOMPATIBLE', motivo=motivo)
+    return clasificacion
+
+def _rechazar_otros_esquemas(clasificaciones):
+    """Dentro de un grupo, rechaza los aceptados cuyo esquema no es el de la mayoría."""
+    esquemas = Counter(c['esquema'] for c in clasificaciones if c['estado'] == ESTADO_ACEPTADO)
+    if len(esquemas) < 2:
+        return
+    esquema_grupo = esquemas.most_common(1)[0][0]
+    tipo_grupo = '/'.join(sorted({c['tipo'] for c in clasificaciones if c['esquema'] == esquema_grupo}))
+    for c in clasificaciones:
+        if c['estado'] == ESTADO_ACEPTADO and c['esquema'] != esquema_grupo:
+            c.update(estado='OTRO_ESQUEMA',
+                     motivo=f"libro de {c['tipo']} en un grupo de {tipo_grupo}")
+
+def preescanear_trabajos(trabajos, executor=None, faltantes_tolerados=0):
+    """
+    Clasifica los archivos de todos los grupos de 'trabajos' (ver
+    run_etl.descubrir_trabajos), en el pool si hay executor.
+
+    Returns:
+        tuple: (trabajos, resumen). En los trabajos devueltos cada grupo
+               conserva solo sus archivos aceptados, del más grande al más
+               chico. 'resumen' = {'archivos', 'aceptados', 'firmas'
+               {'TIPO/firma': n}, 'rechazados' [{'grupo', 'archivo', 'estado',
+               'motivo'}]}.
+    """
+    rutas = [fp for _, _, _, archivos in trabajos for fp in archivos]
+    argumentos = [faltantes_tolerados] * len(rutas)
+    if executor is not None and rutas:
+        clasificaciones = list(executor.map(clasificar_archivo, rutas, argumentos,
+                                            chunksize=max(len(rutas) // 32, 1)))
+    else:
+        clasificaciones = list(map(clasificar_archivo, rutas, argumentos))
+    por_ruta = dict(zip(rutas, clasificaciones))
+
+    resumen = {'archivos': len(rutas), 'aceptados': 0, 'firmas': Counter(), 'rechazados': []}
+    nuevos_trabajos = []
+    for nombre_proceso, rutas_proceso, carpeta_shards, archivos in trabajos:
+        del_grupo = [por_ruta[fp] for fp in archivos]
+        _rechazar_otros_esquemas(del_grupo)
+        aceptados = []
+        for c in del_grupo:
+            if c['estado'] == ESTADO_ACEPTADO:
+                aceptados.append(c)
+                resumen['firmas'][f"{c['tipo']}/{c['firma']}"] += 1
+            else:
+                resumen['rechazados'].append({'grupo': nombre_proceso, 'archivo': os.path.basename(c['ruta']),
+                                              'estado': c['estado'], 'motivo': c['motivo']})
+        resumen['aceptados'] += len(aceptados)
+        # sorted es estable: a igual tamaño se respeta el orden original
+        aceptados = sorted(aceptados, key=lambda c: -c['tamano'])
+        nuevos_trabajos.append((nombre_proceso, rutas_proceso, carpeta_shards, [c['ruta'] for c in aceptados]))
+    resumen['firmas'] = dict(resumen['firmas'])
+    return nuevos_trabajos, resumen
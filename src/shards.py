@@ -0,0 +1,165 @@
+# src/shards.py
+import os
+import csv
+import json
+import hashlib
+from datetime import datetime
+from src.columnar import escribir_lote
+
+# Estados del ledger de cada grupo
+ESTADO_LISTO = 'listo'              # shard completo en disco, falta consolidarlo
+ESTADO_CONSOLIDADO = 'consolidado'  # sus filas ya están en el CSV de salida
+
+# Días que se conserva un shard ya consolidado (caché para re-depósitos y recargas
+# completas recientes); después se borra y en el ledger queda solo su hash
+RETENCION_SHARDS_DIAS_DEFECTO = 7
+
+def calcular_hash_archivo(filepath, tamano_bloque=1024 * 1024):
+    """SHA-256 del contenido del archivo (no depende del nombre ni de la fecha)."""
+    h = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+def ruta_shard(carpeta_shards, hash_archivo):
+    return os.path.join(carpeta_shards, f"{hash_archivo}.csv")
+
+def escribir_shard(ruta, cabecera, filas):
+    """
+    Escribe las filas transformadas de UN archivo como shard intermedio.
+    Se escribe en un temporal, se hace fsync y se renombra: si el shard existe,
+    está completo.
+
+    Returns:
+        int: Filas escritas. Con 0 filas no se crea el shard.
+    """
+    def _volcar(writer):
+        total_filas = 0
+        for fila in filas:
+            writer.writerow(fila)
+            total_filas += 1
+        return total_filas
+    return _escribir_shard(ruta, cabecera, _volcar)
+
+def escribir_shard_lotes(ruta, cabecera, lotes):
+    """
+    Como escribir_shard, pero desde lotes columnares (src/columnar.py): cada
+    columna se pasa a texto de una vez y las filas se escriben con writerows.
+    """
+    return _escribir_shard(ruta, cabecera, lambda writer: sum(escribir_lote(writer, lote) for lote in lotes))
+
+def _escribir_shard(ruta, cabecera, volcar):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    ruta_tmp = f"{ruta}.{os.getpid()}.tmp"
+    total_filas = 0
+    try:
+        with open(ruta_tmp, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(cabecera)
+            total_filas = volcar(writer)
+            f.flush()
+            os.fsync(f.fileno())
+        if total_filas:
+            os.replace(ruta_tmp, ruta)
+    finally:
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+    return total_filas
+
+def leer_shard(ruta):
+    """Generador: primero la cabecera y luego las filas del shard (como texto)."""
+    with open(ruta, 'r', newline='', encoding='utf-8') as f:
+        yield from csv.reader(f, delimiter=';')
+
+def ruta_ledger(carpeta_shards):
+    return os.path.join(carpeta_shards, "ledger.jsonl")
+
+def cargar_ledger(carpeta_shards):
+    """
+    Reproduce el ledger (una línea JSON por evento) y devuelve el último estado
+    de cada hash: {hash: {'estado': ..., 'archivo': ..., 'filas': ...}}.
+    Una última línea cortada por una caída se ignora.
+    """
+    ledger = {}
+    ruta = ruta_ledger(carpeta_shards)
+    if not os.path.exists(ruta):
+        return ledger
+    with open(ruta, 'r', encoding='utf-8') as f:
+        for linea in f:
+            try:
+                evento = json.loads(linea)
+            except ValueError:
+                continue
+            ledger.setdefault(evento['hash'], {}).update(evento)
+    return ledger
+
+def registrar_en_ledger(carpeta_shards, eventos):
+    """Anexa eventos al ledger y los fuerza a disco antes de seguir."""
+    if not eventos:
+        return
+    os.makedirs(carpeta_shards, exist_ok=True)
+    momento = datetime.now().isoformat(timespec='seconds')
+    with open(ruta_ledger(carpeta_shards), 'a', encoding='utf-8') as f:
+        for evento in eventos:
+            f.write(json.dumps(dict(evento, momento=momento), ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def shards_pendientes(carpeta_shards, ledger):
+    """Hashes en estado 'listo' (de una corrida que se cortó) cuyo shard sigue en disco."""
+    pendientes = []
+    for hash_archivo, entrada in ledger.items():
+        if entrada.get('estado') != ESTADO_LISTO:
+            continue
+        if os.path.exists(ruta_shard(carpeta_shards, hash_archivo)):
+            pendientes.append(hash_archivo)
+        else:
+            print(f"   ADVERTENCIA: Falta el shard de {entrada.get('archivo')} ({hash_archivo[:12]}).")
+    return pendientes
+
+def purgar_shards_consolidados(carpeta_shards, dias_retencion, ahora=None):
+    """
+    Borra los shards consolidados hace más de 'dias_retencion' días (0 = todos)
+    y compacta el ledger a un evento por hash. El hash queda en el ledger: si
+    el mismo contenido vuelve a llegar, se extrae de nuevo y las marcas de agua
+    de la carga incremental descartan lo ya cargado. Los shards 'listo' no se
+    tocan.
+
+    Returns:
+        dict: {'shards_purgados', 'bytes_liberados'}.
+    """
+    resultado = {'shards_purgados': 0, 'bytes_liberados': 0}
+    ledger = cargar_ledger(carpeta_shards)
+    if not ledger:
+        return resultado
+    limite = (ahora or datetime.now()).timestamp() - dias_retencion * 86400
+    for hash_archivo, entrada in ledger.items():
+        if entrada.get('estado') != ESTADO_CONSOLIDADO:
+            continue
+        ruta = ruta_shard(carpeta_shards, hash_archivo)
+        if not os.path.exists(ruta):
+            continue
+        try:
+            consolidado = datetime.fromisoformat(entrada.get('momento', '')).timestamp()
+        except (TypeError, ValueError):
+            consolidado = os.path.getmtime(ruta)
+        if consolidado > limite:
+            continue
+        tamano = os.path.getsize(ruta)
+        os.remove(ruta)
+        resultado['shards_purgados'] += 1
+        resultado['bytes_liberados'] += tamano
+    _compactar_ledger(carpeta_shards, ledger)
+    return resultado
+
+def _compactar_ledger(carpeta_shards, ledger):
+    """Reescribe el ledger con el último estado de cada hash (temporal + reemplazo)."""
+    ruta = ruta_ledger(carpeta_shards)
+    ruta_tmp = ruta + ".tmp"
+    with open(ruta_tmp, 'w', encoding='utf-8') as f:
+        for hash_archivo, entrada in ledger.items():
+            f.write(json.dumps(dict(entrada, hash=hash_archivo), ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(ruta_tmp, ruta)
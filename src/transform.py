@@ -1,5 +1,9 @@
 # src/transform.py
-from datetime import datetime, timedelta
+import itertools
+from array import array
+from datetime import date, datetime, timedelta
+from src.columnar import (columna_constante, columna_diccionario, columna_entera, columna_numerica,
+                          filas_de_lote)
 
 def redondear_hora_10min(dt):
     """Redondea al intervalo de 10 min más cercano."""
@@ -31,6 +35,49 @@ def generar_llave_comun(anio, mes, dia, hora_10min):
     # Asegurar dos dígitos para mes y día
     return f"{anio}{int(mes):02d}{int(dia):02d}{hora_limpia}"
 
+# Formatos de Llave_Comun (ambos enteros):
+#   - 'yyyymmddhhmm': 202601160010, legible (por defecto).
+#   - 'minutos': minutos desde 1970-01-01 hasta el intervalo, 29.475.370 para el
+#     mismo ejemplo. Más corta en el CSV y consecutiva cada 10 minutos.
+# Las lecturas de 23:55 a 23:59 redondean a las 00:00. En 'yyyymmddhhmm' se
+# conserva la llave histórica (las 00:00 del MISMO día, igual que Hora_10min);
+# en 'minutos' la llave es la del intervalo real: las 00:00 del día siguiente.
+FORMATOS_LLAVE = ('yyyymmddhhmm', 'minutos')
+FORMATO_LLAVE_DEFECTO = 'yyyymmddhhmm'
+_ORDINAL_EPOCA = date(1970, 1, 1).toordinal()
+# Una llave yyyymmddhhmm tiene 12 dígitos; en minutos no llega a 10 antes del año 20000
+_LIMITE_LLAVE_MINUTOS = 10 ** 10
+
+def llave_en_minutos(anio, mes, dia, hora_10min):
+    """Llave_Comun en formato 'minutos' (entero), o None si falta algún valor."""
+    if any(v is None for v in [anio, mes, dia, hora_10min]):
+        return None
+    horas, minutos = str(hora_10min).split(':')
+    return ((date(int(anio), int(mes), int(dia)).toordinal() - _ORDINAL_EPOCA) * 1440
+            + int(horas) * 60 + int(minutos))
+
+def formato_de_llave(llave):
+    """Formato (de FORMATOS_LLAVE) de una Llave_Comun ya escrita, por su cantidad de dígitos."""
+    return FORMATO_LLAVE_DEFECTO if len(str(llave).strip()) >= 12 else 'minutos'
+
+def fecha_de_llave(llave):
+    """
+    (date, minuto del día) de una Llave_Comun en cualquiera de los dos
+    formatos (entero o texto); None si no es una llave.
+    """
+    try:
+        llave = int(llave)
+    except (TypeError, ValueError):
+        return None
+    try:
+        if llave < _LIMITE_LLAVE_MINUTOS:
+            dias, minuto = divmod(llave, 1440)
+            return date.fromordinal(_ORDINAL_EPOCA + dias), minuto
+        dia, hhmm = divmod(llave, 10000)
+        return date(dia // 10000, dia // 100 % 100, dia % 100), hhmm // 100 * 60 + hhmm % 100
+    except ValueError:
+        return None
+
 def estandarizar_codigo_pasillo(nombre_original):
     """
     Transforma el nombre del pasillo en un código estandarizado (P001, P010, etc).
@@ -64,7 +111,26 @@ def estandarizar_codigo_pasillo(nombre_original):
     # Caso por defecto (Muelles, Túneles o no reconocidos): Se devuelve el nombre original
     return nombre_original
 
-def limpiar_y_estandarizar(original_headers, data_rows, config):
+# Planes de transformación ya compilados, compartidos entre archivos del mismo
+# tipo. Clave: (tipo, cabeceras, nombre_identificador).
+_PLANES_COMPILADOS = {}
+
+def compilar_plan_transformacion(original_headers, config):
+    """
+    Precalcula todo lo que no depende de la fila: posiciones origen -> destino,
+    índices de fecha/llave/numéricos y una fila plantilla con el identificador y
+    Pasillo_est ya puestos. Se guarda en caché por (tipo, cabeceras, identificador).
+
+    Returns:
+        dict: El plan, o None si la configuración apunta a una columna destino
+              inexistente.
+    """
+    nombre_identificador = config.get('nombre_identificador')
+    clave = (config.get('tipo'), tuple(original_headers), nombre_identificador)
+    plan = _PLANES_COMPILADOS.get(clave)
+    if plan is not None:
+        return plan
+
     # 1. Obtener Esquema
     SCHEMA_COLUMNS = config['output_schema']
     SCHEMA_INDICES = {col: i for i, col in enumerate(SCHEMA_COLUMNS)}
@@ -83,93 +149,322 @@ def limpiar_y_estandarizar(original_headers, data_rows, config):
              print(f"Error Config: Columna destino '{standard_col_name}' no existe.")
              return None
 
-    id_col_name = config.get('id_column_name')
-    id_standard_idx = SCHEMA_INDICES.get(id_col_name)
-    nombre_identificador = config.get('nombre_identificador')
-    
+    # Fila plantilla: identificador y código estandarizado son constantes por archivo
+    plantilla = [None] * len(SCHEMA_COLUMNS)
+
+    id_standard_idx = SCHEMA_INDICES.get(config.get('id_column_name'))
+    if id_standard_idx is not None:
+        plantilla[id_standard_idx] = nombre_identificador
+
     # Pre-calcular el código estandarizado si corresponde (solo para Sensores)
-    codigo_estandarizado = None
     if 'Pasillo_est' in SCHEMA_INDICES:
         codigo_estandarizado = estandarizar_codigo_pasillo(nombre_identificador)
+        if codigo_estandarizado:
+            plantilla[SCHEMA_INDICES['Pasillo_est']] = codigo_estandarizado
 
-    processed_rows = []
-    
-    for row in data_rows:
-        standard_row = [None] * len(SCHEMA_COLUMNS)
-        
-        # Insertar Identificador
-        if id_standard_idx is not None:
-            standard_row[id_standard_idx] = nombre_identificador
-            
-        # Insertar Código Estandarizado (si existe la columna en el esquema)
-        if codigo_estandarizado and 'Pasillo_est' in SCHEMA_INDICES:
-            standard_row[SCHEMA_INDICES['Pasillo_est']] = codigo_estandarizado
-
-        # Copiar datos
-        for original_idx, standard_idx in idx_map.items():
-            if original_idx < len(row):
-                val = row[original_idx]
-                if val is not None and not (isinstance(val, str) and val.strip() == ''):
-                    standard_row[standard_idx] = val
-        
-        # --- FECHAS Y LLAVE COMÚN ---
-        idx_fecha_orig = SCHEMA_INDICES.get('FechaHora_Original')
-        
-        anio, mes, dia, hora10 = None, None, None, None
-        
-        if idx_fecha_orig is not None:
-            val_fecha = standard_row[idx_fecha_orig]
-            dt_obj = None
-            if val_fecha:
-                try:
-                    if isinstance(val_fecha, datetime):
-                        dt_obj = val_fecha
-                    elif isinstance(val_fecha, str):
-                        str_fecha = val_fecha.strip()
-                        try: dt_obj = datetime.strptime(str_fecha, '%d/%m/%Y %H:%M')
-                        except ValueError:
-                            try: dt_obj = datetime.strptime(str_fecha, '%d/%m/%Y %H:%M:%S')
-                            except ValueError: 
-                                try: dt_obj = datetime.strptime(str_fecha, '%Y-%m-%d %H:%M:%S')
-                                except ValueError: pass
-                    
-                    if dt_obj:
-                        anio = dt_obj.year
-                        mes = dt_obj.month
-                        dia = dt_obj.day
-                        hora10 = redondear_hora_10min(dt_obj)
-                        
-                        # Asignar a columnas
-                        if 'Anio' in SCHEMA_INDICES: standard_row[SCHEMA_INDICES['Anio']] = anio
-                        if 'Mes' in SCHEMA_INDICES: standard_row[SCHEMA_INDICES['Mes']] = mes
-                        if 'Dia' in SCHEMA_INDICES: standard_row[SCHEMA_INDICES['Dia']] = dia
-                        if 'Hora_10min' in SCHEMA_INDICES: standard_row[SCHEMA_INDICES['Hora_10min']] = hora10
-                        
-                except Exception:
-                    pass
-
-        # --- GENERAR LLAVE COMÚN ---
-        # Se genera solo si tenemos los datos de fecha completos
-        if 'Llave_Comun' in SCHEMA_INDICES:
-            llave = generar_llave_comun(anio, mes, dia, hora10)
-            standard_row[SCHEMA_INDICES['Llave_Comun']] = llave
-
-        # --- CONVERSIÓN NUMÉRICA ---
-        numeric_fields = config.get('numeric_fields', [])
-        for col_name in numeric_fields:
-            idx = SCHEMA_INDICES.get(col_name)
+    copias = tuple(idx_map.items())
+    plan = {
+        'schema_columns': SCHEMA_COLUMNS,
+        'plantilla': plantilla,
+        'copias': copias,
+        # Si la fila es más larga que esto, no hace falta revisar límites al copiar
+        'min_largo_fila': max((orig for orig, _ in copias), default=-1) + 1,
+        'idx_fecha': SCHEMA_INDICES.get('FechaHora_Original'),
+        'idx_anio': SCHEMA_INDICES.get('Anio'),
+        'idx_mes': SCHEMA_INDICES.get('Mes'),
+        'idx_dia': SCHEMA_INDICES.get('Dia'),
+        'idx_hora10': SCHEMA_INDICES.get('Hora_10min'),
+        'idx_llave': SCHEMA_INDICES.get('Llave_Comun'),
+        'idx_numericos': tuple(SCHEMA_INDICES[col] for col in config.get('numeric_fields', [])
+                               if col in SCHEMA_INDICES),
+    }
+    _PLANES_COMPILADOS[clave] = plan
+    return plan
+
+# Formatos de texto aceptados para FechaHora_Original, en orden de prueba.
+# En los tres la fecha ocupa los 10 primeros caracteres y 'HH:MM' las
+# posiciones 11-16, lo que permite una ruta rápida por cortes de texto.
+FORMATOS_FECHA = ('%d/%m/%Y %H:%M', '%d/%m/%Y %H:%M:%S', '%Y-%m-%d %H:%M:%S')
+_FORMATOS_DIA = ('%d/%m/%Y', '%d/%m/%Y', '%Y-%m-%d')
+_LARGOS_FECHA = (16, 19, 19)
+
+# (Hora_10min, HHMM como entero, minuto del intervalo) de cada minuto del día: la
+# parte de la llave en cada formato. Calculado una sola vez con
+# redondear_hora_10min, por índice hora*60+minuto y por texto 'HH:MM'. El
+# minuto del intervalo de 23:55 a 23:59 es 1440 (las 00:00 del día siguiente).
+_HORA10_POR_MINUTO = []
+for _minuto in range(24 * 60):
+    _hora10 = redondear_hora_10min(datetime(2000, 1, 1, _minuto // 60, _minuto % 60))
+    _HORA10_POR_MINUTO.append((_hora10, int(_hora10.replace(':', '')), (_minuto + 5) // 10 * 10))
+_HORA10_POR_MINUTO = tuple(_HORA10_POR_MINUTO)
+_HORA10_POR_TEXTO = {f"{m // 60:02d}:{m % 60:02d}": v for m, v in enumerate(_HORA10_POR_MINUTO)}
+# Segundos válidos de los formatos con ':SS' (los mismos que acepta strptime)
+_SEGUNDOS_TEXTO = frozenset(f"{segundo:02d}" for segundo in range(60))
+del _minuto, _hora10
+
+# Memo por día de (Anio, Mes, Dia, YYYYMMDD0000, minutos hasta el día): la parte
+# de la llave en cada formato de FORMATOS_LLAVE. Uno por formato
+# de texto (clave = los 10 caracteres de la fecha) y uno para celdas datetime
+# (clave = (año, mes, día)). Se vacían al llegar al límite para acotar memoria.
+LIMITE_CACHE_DIAS = 10_000
+_CACHE_DIAS_TEXTO = tuple({} for _ in FORMATOS_FECHA)
+_CACHE_DIAS_DATETIME = {}
+
+def _convertir_fecha(val_fecha):
+    """Devuelve un datetime a partir de la celda de fecha, o None."""
+    if isinstance(val_fecha, datetime):
+        return val_fecha
+    if isinstance(val_fecha, str):
+        str_fecha = val_fecha.strip()
+        for formato in FORMATOS_FECHA:
+            try: return datetime.strptime(str_fecha, formato)
+            except ValueError: pass
+    return None
+
+def detectar_formato_fecha(str_fecha):
+    """Índice en FORMATOS_FECHA del primer formato que interpreta el texto, o None."""
+    for i, formato in enumerate(FORMATOS_FECHA):
+        try:
+            datetime.strptime(str_fecha, formato)
+            return i
+        except ValueError:
+            pass
+    return None
+
+def campos_de_tiempo(dt, formato_llave=FORMATO_LLAVE_DEFECTO):
+    """(Anio, Mes, Dia, Hora_10min, Llave_Comun como entero) de un datetime (ruta lenta)."""
+    hora10 = redondear_hora_10min(dt)
+    if formato_llave == 'minutos':
+        minuto = _HORA10_POR_MINUTO[dt.hour * 60 + dt.minute][2]
+        return dt.year, dt.month, dt.day, hora10, llave_en_minutos(dt.year, dt.month, dt.day, '00:00') + minuto
+    return dt.year, dt.month, dt.day, hora10, int(generar_llave_comun(dt.year, dt.month, dt.day, hora10))
+
+def _registrar_dia(cache, clave, anio, mes, dia):
+    if len(cache) >= LIMITE_CACHE_DIAS:
+        cache.clear()
+    # Llave_Comun = YYYYMMDD * 10000 + HHMM (igual que el texto de generar_llave_comun)
+    # o minutos hasta el día + minuto del día (llave_en_minutos), sin pasar por texto
+    info = (anio, mes, dia, (anio * 10000 + mes * 100 + dia) * 10000,
+            (date(anio, mes, dia).toordinal() - _ORDINAL_EPOCA) * 1440)
+    cache[clave] = info
+    return info
+
+def _dia_desde_texto(cache, texto_dia, formato_dia):
+    """Memo por día para fechas en texto; False si el texto no es una fecha válida."""
+    try:
+        d = datetime.strptime(texto_dia, formato_dia)
+    except ValueError:
+        return False
+    return _registrar_dia(cache, texto_dia, d.year, d.month, d.day)
+
+def _tiempo_desde_datetime(dt, pos_llave=0):
+    clave_dia = (dt.year, dt.month, dt.day)
+    info = _CACHE_DIAS_DATETIME.get(clave_dia)
+    if info is None:
+        info = _registrar_dia(_CACHE_DIAS_DATETIME, clave_dia, *clave_dia)
+    hora = _HORA10_POR_MINUTO[dt.hour * 60 + dt.minute]
+    return info[0], info[1], info[2], hora[0], info[3 + pos_llave] + hora[1 + pos_llave]
+
+def normalizar_momento(val_fecha):
+    """
+    Texto 'YYYY-MM-DD HH:MM:SS' (comparable como string) de un valor de
+    FechaHora_Original, sea datetime o texto en cualquiera de FORMATOS_FECHA
+    (incluido lo que ya se escribió en un CSV). None si no es una fecha.
+    """
+    if isinstance(val_fecha, datetime):
+        return str(val_fecha)[:19]
+    if not isinstance(val_fecha, str):
+        return None
+    s = val_fecha.strip()
+    if len(s) in (16, 19) and s[2] == '/' and s[5] == '/':
+        momento = f"{s[6:10]}-{s[3:5]}-{s[:2]}{s[10:]}"
+        return momento if len(s) == 19 else momento + ':00'
+    if len(s) >= 19 and s[4] == '-' and s[7] == '-':
+        return s[:19]
+    dt_obj = _convertir_fecha(s)
+    return str(dt_obj)[:19] if dt_obj else None
+
+# Filas por lote columnar (src/columnar.py)
+TAMANO_LOTE = 4096
+
+def transformar_en_lotes(original_headers, data_rows, config, tamano_lote=TAMANO_LOTE,
+                         formato_llave=FORMATO_LLAVE_DEFECTO):
+    """
+    Estandariza las filas de un archivo al esquema de salida de su configuración,
+    en lotes columnares de hasta 'tamano_lote' filas (src/columnar.py).
+
+    'data_rows' puede ser cualquier iterable (p. ej. el generador de
+    leer_archivo_excel) y se consume de a un lote. 'formato_llave' es uno de
+    FORMATOS_LLAVE.
+
+    Returns:
+        tuple: (generador_de_lotes, SCHEMA_COLUMNS), o None si la configuración
+               apunta a una columna destino inexistente.
+    """
+    plan = compilar_plan_transformacion(original_headers, config)
+    if plan is None:
+        return None
+    return _aplicar_plan(plan, data_rows, tamano_lote, formato_llave), plan['schema_columns']
+
+def limpiar_y_estandarizar(original_headers, data_rows, config, formato_llave=FORMATO_LLAVE_DEFECTO):
+    """
+    Igual que transformar_en_lotes pero entrega una fila (lista) por lectura,
+    con Llave_Comun como texto.
+
+    Returns:
+        tuple: (generador_de_filas, SCHEMA_COLUMNS), o None si la configuración
+               apunta a una columna destino inexistente.
+    """
+    resultado = transformar_en_lotes(original_headers, data_rows, config, formato_llave=formato_llave)
+    if resultado is None:
+        return None
+    lotes, schema = resultado
+    idx_llave = compilar_plan_transformacion(original_headers, config)['idx_llave']
+    llave_texto = () if idx_llave is None else (idx_llave,)
+    return (fila for lote in lotes for fila in filas_de_lote(lote, llave_texto)), schema
+
+def _aplicar_plan(plan, data_rows, tamano_lote, formato_llave=FORMATO_LLAVE_DEFECTO):
+    """Parte las filas en lotes y transforma cada lote columna por columna."""
+    # Formato de fecha del archivo (se detecta con el primer texto): se conserva entre lotes.
+    # 'pos_llave' elige la parte de la llave en los memos de día y de hora.
+    estado_fecha = {'largo': None, 'formato_dia': None, 'cache': None,
+                    'pos_llave': FORMATOS_LLAVE.index(formato_llave)}
+    filas = iter(data_rows)
+    while True:
+        lote = list(itertools.islice(filas, tamano_lote))
+        if not lote:
+            return
+        yield _transformar_lote(plan, lote, estado_fecha)
+
+def _numeros_de_columna(valores):
+    """Conversión numérica de una columna: float o None (los textos admiten coma decimal)."""
+    salida = []
+    agregar = salida.append
+    for val in valores:
+        if val is None:
+            agregar(None)
+        elif isinstance(val, (int, float)):
+            agregar(float(val))
+        elif isinstance(val, str):
+            clean = val.strip().replace(',', '.')
+            try:
+                agregar(float(clean) if clean and clean.lower() != 'nan' else None)
+            except ValueError:
+                agregar(None)
+        else:
+            agregar(val)  # Otro tipo (p. ej. una fecha): se deja como está
+    return salida
+
+def _transformar_lote(plan, filas, estado_fecha):
+    n = len(filas)
+    plantilla = plan['plantilla']
+    idx_fecha = plan['idx_fecha']
+    idx_numericos = plan['idx_numericos']
+
+    # Columnas sin origen en el archivo: constantes de la plantilla (identificador, Pasillo_est)
+    columnas = [columna_constante(valor) for valor in plantilla]
+
+    # Copiar datos: una lista por columna destino, con los vacíos como None
+    datos = {}
+    completa = min(map(len, filas)) >= plan['min_largo_fila']
+    for original_idx, standard_idx in plan['copias']:
+        if completa:
+            valores = [None if val.__class__ is str and not val.strip() else val
+                       for val in [fila[original_idx] for fila in filas]]
+        else:
+            valores = [fila[original_idx] if original_idx < len(fila) else None for fila in filas]
+            valores = [None if val.__class__ is str and not val.strip() else val for val in valores]
+        previos = datos.get(standard_idx)
+        if previos is not None:
+            valores = [p if val is None else val for p, val in zip(previos, valores)]
+        elif plantilla[standard_idx] is not None:
+            valores = [plantilla[standard_idx] if val is None else val for val in valores]
+        datos[standard_idx] = valores
+
+    for standard_idx, valores in datos.items():
+        if standard_idx == idx_fecha:
+            columnas[standard_idx] = ('objetos', valores)
+        elif standard_idx in idx_numericos:
+            # --- CONVERSIÓN NUMÉRICA ---
+            columnas[standard_idx] = columna_numerica(_numeros_de_columna(valores))
+        else:
+            # Estados y textos repetidos: diccionario por lote
+            columnas[standard_idx] = columna_diccionario(valores)
+
+    # --- FECHAS Y LLAVE COMÚN ---
+    # Se genera solo si tenemos los datos de fecha completos (0 = vacío)
+    fechas = datos.get(idx_fecha) if idx_fecha is not None else None
+    if fechas is not None:
+        anios, meses, dias = array('H', bytes(2 * n)), array('B', bytes(n)), array('B', bytes(n))
+        llaves = array('Q', bytes(8 * n))
+        horas = [None] * n
+        _campos_de_tiempo_columna(fechas, estado_fecha, anios, meses, dias, horas, llaves)
+        for idx, columna in ((plan['idx_anio'], columna_entera(anios)),
+                             (plan['idx_mes'], columna_entera(meses)),
+                             (plan['idx_dia'], columna_entera(dias)),
+                             (plan['idx_hora10'], columna_diccionario(horas)),
+                             (plan['idx_llave'], columna_entera(llaves))):
             if idx is not None:
-                val = standard_row[idx]
-                if val is not None:
-                    try:
-                        if isinstance(val, (int, float)):
-                            standard_row[idx] = float(val)
-                        elif isinstance(val, str):
-                            clean = val.strip().replace(',', '.')
-                            standard_row[idx] = float(clean) if clean and clean.lower() != 'nan' else None
-                    except ValueError:
-                        standard_row[idx] = None
-
-        processed_rows.append(standard_row)
-
-    return (processed_rows, SCHEMA_COLUMNS) if processed_rows else None
\ No newline at end of file
+                columnas[idx] = columna
+    elif plan['idx_llave'] is not None:
+        columnas[plan['idx_llave']] = columna_constante(None)
+
+    return {'filas': n, 'columnas': columnas}
+
+def _campos_de_tiempo_columna(fechas, estado, anios, meses, dias, horas, llaves):
+    """
+    Llena Anio/Mes/Dia/Hora_10min/Llave_Comun de cada posición con fecha válida.
+
+    Formato de fecha del archivo: se detecta con el primer texto y luego las
+    fechas de ese largo se resuelven con dos búsquedas (día y 'HH:MM') sin
+    llamar a strptime; los segundos, si el formato los tiene, se validan
+    igual. Lo que no encaje va por la ruta lenta de siempre, así que un texto
+    inválido se descarta igual por las dos rutas.
+    """
+    largo_fecha = estado['largo']
+    formato_dia = estado['formato_dia']
+    cache_dias = estado['cache']
+    pos_llave = estado['pos_llave']
+    formato_llave = FORMATOS_LLAVE[pos_llave]
+
+    for i, val_fecha in enumerate(fechas):
+        if not val_fecha:
+            continue
+        campos = None
+        try:
+            if isinstance(val_fecha, datetime):
+                campos = _tiempo_desde_datetime(val_fecha, pos_llave)
+            elif isinstance(val_fecha, str):
+                str_fecha = val_fecha.strip()
+                if largo_fecha is None:
+                    indice = detectar_formato_fecha(str_fecha)
+                    if indice is not None:
+                        largo_fecha = _LARGOS_FECHA[indice]
+                        formato_dia = _FORMATOS_DIA[indice]
+                        cache_dias = _CACHE_DIAS_TEXTO[indice]
+
+                if (len(str_fecha) == largo_fecha and str_fecha[10] == ' '
+                        and (largo_fecha == 16 or (str_fecha[16] == ':' and str_fecha[17:] in _SEGUNDOS_TEXTO))):
+                    hora = _HORA10_POR_TEXTO.get(str_fecha[11:16])
+                    if hora is not None:
+                        texto_dia = str_fecha[:10]
+                        info = cache_dias.get(texto_dia)
+                        if info is None:
+                            info = _dia_desde_texto(cache_dias, texto_dia, formato_dia)
+                        if info:
+                            campos = (info[0], info[1], info[2], hora[0],
+                                      info[3 + pos_llave] + hora[1 + pos_llave])
+
+                if campos is None:
+                    dt_obj = _convertir_fecha(str_fecha)
+                    if dt_obj:
+                        campos = campos_de_tiempo(dt_obj, formato_llave)
+        except Exception:
+            campos = None
+
+        if campos:
+            anios[i], meses[i], dias[i], horas[i], llaves[i] = campos
+
+    estado['largo'] = largo_fecha
+    estado['formato_dia'] = formato_dia
+    estado['cache'] = cache_dias
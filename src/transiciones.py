@@ -0,0 +1,195 @@
+# src/transiciones.py
+"""
+Salida por cambios de estado (run-length) para los esquemas solo de estados,
+es decir, las configuraciones sin campos numéricos (compresores).
+
+En lugar de una fila por lectura con los mismos "Conectado"/"Desconectado",
+se escribe una fila por tramo de lecturas consecutivas con idénticos estados
+de un mismo identificador (Modulo):
+  - Llave_Comun, Anio..Hora_10min, FechaHora_Original: primera lectura del tramo
+  - Llave_Comun_Fin, FechaHora_Fin: última lectura del tramo
+  - Duracion_Min: minutos hasta la lectura que cambió el estado (el último tramo
+    de cada identificador, hasta su última lectura)
+  - Lecturas: cantidad de lecturas del tramo
+  - las columnas de estado
+
+Las lecturas de un identificador tienen que llegar en orden de tiempo: se
+ordenan con el orden externo (src/orden.py) por (identificador, momento) y no
+por Llave_Comun, porque la Llave redondea al intervalo más cercano y 23:55
+queda como 00:00 del mismo día (no es monótona en el tiempo). El orden deja
+juntas las lecturas repetidas de exportes solapados (se cuentan una vez).
+
+expandir_transiciones reconstruye la serie con el esquema original, una fila
+por intervalo de 10 minutos cubierto por cada tramo, con las mismas llaves que
+calcula la transformación (lo que usa la tabla unificada).
+"""
+from datetime import datetime, timedelta
+from src.config import obtener_campos_numericos, obtener_columna_identificador
+from src.transform import FORMATO_LLAVE_DEFECTO, campos_de_tiempo, formato_de_llave, normalizar_momento
+from src.orden import MEMORIA_ORDEN_MB_DEFECTO, ordenar_filas
+
+COLUMNAS_DEL_INICIO = ['Anio', 'Mes', 'Dia', 'Hora_10min']
+COLUMNAS_DEL_TRAMO = ['Llave_Comun_Fin', 'FechaHora_Fin', 'Duracion_Min', 'Lecturas']
+
+def _columnas(cabecera):
+    """(identificador, columnas del inicio, estados) de una cabecera cruda, o None si no aplica."""
+    if 'Llave_Comun_Fin' in cabecera or 'Lecturas' in cabecera:
+        return None  # Ya es una salida derivada
+    id_col = obtener_columna_identificador(cabecera)
+    if (obtener_campos_numericos(cabecera) or not id_col
+            or 'Llave_Comun' not in cabecera or 'FechaHora_Original' not in cabecera):
+        return None
+    inicio = [c for c in COLUMNAS_DEL_INICIO if c in cabecera]
+    fijas = ['Llave_Comun', id_col] + inicio + ['FechaHora_Original']
+    estados = [c for c in cabecera if c not in fijas]
+    if not estados:
+        return None
+    return id_col, inicio, estados
+
+def esquema_transiciones(cabecera):
+    """
+    Cabecera de la salida por cambios de estado para una cabecera de filas
+    crudas, o None si el esquema tiene campos numéricos y no se comprime.
+    """
+    columnas = _columnas(list(cabecera))
+    if columnas is None:
+        return None
+    id_col, inicio, estados = columnas
+    return ['Llave_Comun', id_col] + inicio + ['FechaHora_Original'] + COLUMNAS_DEL_TRAMO + estados
+
+def es_salida_transiciones(cabecera):
+    """True si la cabecera es de una salida por cambios de estado."""
+    return 'Llave_Comun_Fin' in cabecera and 'FechaHora_Fin' in cabecera
+
+def _minutos(desde, hasta):
+    return round((datetime.fromisoformat(hasta) - datetime.fromisoformat(desde)).total_seconds() / 60, 2)
+
+def comprimir_transiciones(cabecera, filas, estadisticas=None, memoria_mb=MEMORIA_ORDEN_MB_DEFECTO,
+                           carpeta_temporal=None):
+    """
+    Comprime 'filas' (crudas, con 'cabecera') en tramos de estados constantes.
+    'memoria_mb' y 'carpeta_temporal' son los del orden externo previo.
+
+    Returns:
+        tuple: (cabecera_transiciones, generador_de_filas). Si el esquema no se
+               comprime, devuelve (cabecera, filas) sin cambios.
+    """
+    cabecera = list(cabecera)
+    salida = esquema_transiciones(cabecera)
+    if salida is None:
+        return cabecera, filas
+    if estadisticas is None:
+        estadisticas = {}
+    idx_id = cabecera.index(_columnas(cabecera)[0])
+    idx_fecha = cabecera.index('FechaHora_Original')
+
+    def clave(fila):
+        identificador = fila[idx_id]
+        return ('' if identificador is None else str(identificador),
+                normalizar_momento(fila[idx_fecha]) or '')
+
+    filas = ordenar_filas(cabecera, filas, memoria_mb, carpeta_temporal, clave=clave)
+    return salida, _comprimir(cabecera, filas, estadisticas)
+
+def _comprimir(cabecera, filas, estadisticas):
+    id_col, inicio, estados = _columnas(cabecera)
+    idx_llave, idx_id = cabecera.index('Llave_Comun'), cabecera.index(id_col)
+    idx_inicio = [cabecera.index(c) for c in inicio]
+    idx_fecha = cabecera.index('FechaHora_Original')
+    idx_estados = [cabecera.index(c) for c in estados]
+
+    for clave in ('lecturas', 'repetidas', 'sin_fecha', 'tramos'):
+        estadisticas.setdefault(clave, 0)
+
+    # Tramo abierto por identificador: [fila_inicio, momento_inicio, llave_fin,
+    #                                   fecha_fin, momento_fin, lecturas, estados]
+    abiertos = {}
+
+    def _fila_de(tramo, momento_cambio):
+        fila_inicio, momento_inicio, llave_fin, fecha_fin, momento_fin, lecturas, valores = tramo
+        estadisticas['tramos'] += 1
+        return fila_inicio + [llave_fin, fecha_fin, _minutos(momento_inicio, momento_cambio or momento_fin),
+                              lecturas] + list(valores)
+
+    for fila in filas:
+        estadisticas['lecturas'] += 1
+        llave = fila[idx_llave]
+        momento = normalizar_momento(fila[idx_fecha])
+        if llave is None or llave == '' or momento is None:
+            estadisticas['sin_fecha'] += 1
+            continue
+
+        identificador = fila[idx_id]
+        valores = tuple(fila[i] for i in idx_estados)
+        tramo = abiertos.get(identificador)
+        if tramo is not None:
+            if momento <= tramo[4]:
+                estadisticas['repetidas'] += 1
+                continue
+            if valores == tramo[6]:
+                tramo[2], tramo[3], tramo[4] = llave, fila[idx_fecha], momento
+                tramo[5] += 1
+                continue
+            yield _fila_de(tramo, momento)
+
+        abiertos[identificador] = [
+            [llave, identificador] + [fila[i] for i in idx_inicio] + [fila[idx_fecha]],
+            momento, llave, fila[idx_fecha], momento, 1, valores]
+
+    for tramo in abiertos.values():
+        yield _fila_de(tramo, None)
+
+def resumen_transiciones(estadisticas):
+    """Línea de consola con el efecto de la compresión por cambios de estado."""
+    lecturas, tramos = estadisticas.get('lecturas', 0), estadisticas.get('tramos', 0)
+    factor = f" (x{lecturas / tramos:.1f} menos filas)" if tramos else ""
+    return (f"Cambios de estado: {lecturas} lecturas -> {tramos} tramos{factor}; "
+            f"repetidas: {estadisticas.get('repetidas', 0)}, sin fecha: {estadisticas.get('sin_fecha', 0)}")
+
+def expandir_transiciones(cabecera, filas):
+    """
+    Reconstruye la serie de una salida por cambios de estado con el esquema
+    original: una fila por intervalo de 10 minutos desde la primera hasta la
+    última lectura de cada tramo. FechaHora_Original es el último momento del
+    tramo dentro de ese intervalo, así en un intervalo con cambio de estado el
+    tramo siguiente queda como último valor.
+
+    Returns:
+        tuple: (cabecera_original, generador_de_filas).
+    """
+    cabecera = list(cabecera)
+    id_col = obtener_columna_identificador(cabecera)
+    fin_fijas = cabecera.index('Llave_Comun_Fin')
+    estados = cabecera[fin_fijas + len(COLUMNAS_DEL_TRAMO):]
+    inicio = [c for c in COLUMNAS_DEL_INICIO if c in cabecera]
+    original = ['Llave_Comun', id_col] + inicio + ['FechaHora_Original'] + estados
+    return original, _expandir(cabecera, filas, id_col, inicio, estados)
+
+def _expandir(cabecera, filas, id_col, inicio, estados):
+    idx_id = cabecera.index(id_col)
+    idx_fecha, idx_fecha_fin = cabecera.index('FechaHora_Original'), cabecera.index('FechaHora_Fin')
+    idx_estados = [cabecera.index(c) for c in estados]
+    posiciones = [COLUMNAS_DEL_INICIO.index(c) for c in inicio]
+    idx_llave = cabecera.index('Llave_Comun')
+    formato_llave = None
+
+    for fila in filas:
+        if formato_llave is None and fila[idx_llave] not in (None, ''):
+            # Las llaves nuevas van en el formato en que se escribió la salida
+            formato_llave = formato_de_llave(fila[idx_llave])
+        momento_inicio = normalizar_momento(fila[idx_fecha])
+        momento_fin = normalizar_momento(fila[idx_fecha_fin])
+        if momento_inicio is None or momento_fin is None:
+            continue
+        fin = datetime.fromisoformat(momento_fin)
+        actual = datetime.fromisoformat(momento_inicio)
+        valores = [fila[i] for i in idx_estados]
+        while actual <= fin:
+            # Intervalo de la transformación: de xx:x5:00 a xx:x4:59 (redondeo al más cercano)
+            *campos, llave = campos_de_tiempo(actual, formato_llave or FORMATO_LLAVE_DEFECTO)
+            fin_intervalo = (actual.replace(second=0, microsecond=0)
+                             + timedelta(minutes=(4 - actual.minute % 10) % 10, seconds=59))
+            ultimo = min(fin, fin_intervalo)
+            yield ([str(llave), fila[idx_id]] + [campos[p] for p in posiciones]
+                   + [str(ultimo)] + valores)
+            actual = fin_intervalo + timedelta(seconds=1)
@@ -0,0 +1,225 @@
+# src/union.py
+"""
+Tabla de hechos unificada: une las salidas de sensores, presión y compresores
+por Llave_Comun (intervalo de 10 minutos) en un solo CSV ancho para Power BI.
+
+Es un hash join que no carga ningún grupo completo en memoria:
+  1. Presión y compresores se leen en streaming y se reducen a UNA entrada por
+     (Sistema / Modulo, Llave_Comun): promedio de los campos numéricos y último
+     valor de los estados de ese sistema o módulo. Con un intervalo cada 10
+     minutos son ~52.000 entradas por año y por sistema o módulo.
+  2. Las filas de sensores (el lado grande) se recorren en streaming y cada una
+     recibe las columnas de presión y compresores de su Llave_Comun (vacías si
+     ese intervalo no tiene lecturas).
+
+Nunca se promedian valores de sistemas distintos ni se mezclan estados de
+módulos distintos: con un solo sistema (o módulo) las columnas conservan su
+nombre; con varios, cada uno tiene las suyas con su nombre como sufijo
+(Presion_Gas_<Sistema>, G1_Comp1_Estado_<Modulo>, ...).
+"""
+import re
+from src.config import COLUMNAS_UNION_COMPRESORES, COLUMNAS_UNION_PRESION, obtener_campos_numericos
+from src.transform import normalizar_momento
+from src.agregacion import a_numero
+from src.load import leer_salida_consolidada
+from src.carga_sqlite import leer_tabla_sqlite
+from src.transiciones import es_salida_transiciones, expandir_transiciones
+
+# Columna que identifica el papel de cada salida en la unión
+ROLES_UNION = (
+    ('sensores', 'Pasillo_est'),
+    ('presion', 'Sistema'),
+    ('compresores', 'Modulo'),
+)
+COLUMNAS_UNION_POR_ROL = {
+    'presion': COLUMNAS_UNION_PRESION,
+    'compresores': COLUMNAS_UNION_COMPRESORES,
+}
+
+def rol_de_cabecera(cabecera):
+    """'sensores', 'presion', 'compresores' o None según las columnas de la salida."""
+    if not cabecera or 'Llave_Comun' not in cabecera:
+        return None
+    for rol, columna in ROLES_UNION:
+        if columna in cabecera:
+            return rol
+    return None
+
+def _plan_lado(cabecera, columnas_union):
+    """
+    (índice_origen, índice_peso, numérico) por columna destino. Si la salida
+    está agregada (src/agregacion.py) el campo se toma de <campo>_prom y se
+    pondera con <campo>_n. Una columna ausente queda vacía.
+    """
+    campos = obtener_campos_numericos(cabecera)
+    plan = []
+    for origen in columnas_union.values():
+        if origen in cabecera:
+            plan.append((cabecera.index(origen), None, origen in campos))
+        elif f"{origen}_prom" in cabecera:
+            peso = f"{origen}_n"
+            plan.append((cabecera.index(f"{origen}_prom"),
+                         cabecera.index(peso) if peso in cabecera else None, True))
+        else:
+            plan.append((None, None, False))
+    return plan
+
+def reducir_por_llave(cabecera, filas, columnas_union, tabla, id_col):
+    """
+    Acumula en 'tabla' ({identificador: {Llave_Comun: entrada}}) las filas de
+    una salida de presión o compresores; 'id_col' es Sistema o Modulo. Se
+    puede llamar varias veces sobre la misma tabla (p. ej. dos grupos de
+    presión). Ver valores_por_llave.
+    """
+    cabecera = list(cabecera)
+    plan = _plan_lado(cabecera, columnas_union)
+    idx_llave = cabecera.index('Llave_Comun')
+    idx_id = cabecera.index(id_col) if id_col in cabecera else None
+    idx_fecha = cabecera.index('FechaHora_Original') if 'FechaHora_Original' in cabecera else None
+    largo = len(cabecera)
+    numericas = [(j, i, peso) for j, (i, peso, numerico) in enumerate(plan) if numerico]
+    estados = [(j, i) for j, (i, _, numerico) in enumerate(plan) if not numerico and i is not None]
+
+    for fila in filas:
+        if len(fila) < largo or not fila[idx_llave]:
+            continue
+        momento = (normalizar_momento(fila[idx_fecha]) if idx_fecha is not None else None) or ''
+        del_id = tabla.setdefault(fila[idx_id] if idx_id is not None else '', {})
+        entrada = del_id.get(fila[idx_llave])
+        if entrada is None:
+            # [último momento, últimos valores, sumas, pesos]
+            entrada = del_id[fila[idx_llave]] = ['', [None] * len(plan), [0.0] * len(plan), [0.0] * len(plan)]
+        if momento >= entrada[0]:
+            entrada[0] = momento
+            for j, i in estados:
+                entrada[1][j] = fila[i]
+        for j, i, idx_peso in numericas:
+            valor = a_numero(fila[i])
+            peso = 1.0 if idx_peso is None else a_numero(fila[idx_peso])
+            if valor is None or not peso:
+                continue
+            entrada[2][j] += valor * peso
+            entrada[3][j] += peso
+
+def _sufijo(identificador):
+    """Sufijo de columna de un Sistema / Modulo (solo letras, dígitos y '_')."""
+    return re.sub(r'\W+', '_', str(identificador)).strip('_') or 'SIN_ID'
+
+def valores_por_llave(tabla, columnas_union, id_col):
+    """
+    Convierte la tabla acumulada en (columnas destino, {Llave_Comun: tupla}).
+    Con un solo identificador las columnas son las de 'columnas_union'; con
+    varios, las de cada uno con su sufijo (sin la columna del identificador,
+    que ya está en el nombre) y vacías en las llaves en que ese no tiene lecturas.
+    """
+    identificadores = sorted(tabla, key=str)
+    if len(identificadores) <= 1:
+        columnas = list(columnas_union)
+        posiciones = list(range(len(columnas)))
+    else:
+        posiciones = [j for j, origen in enumerate(columnas_union.values()) if origen != id_col]
+        columnas = [f"{list(columnas_union)[j]}_{_sufijo(identificador)}"
+                    for identificador in identificadores for j in posiciones]
+    vacio = (None,) * len(posiciones)
+    por_id = []
+    for identificador in identificadores:
+        por_id.append({llave: tuple(round(sumas[j] / pesos[j], 4) if pesos[j] else ultimos[j]
+                                    for j in posiciones)
+                       for llave, (_, ultimos, sumas, pesos) in tabla[identificador].items()})
+    llaves = set().union(*por_id) if por_id else set()
+    valores = {llave: sum((valores_id.get(llave, vacio) for valores_id in por_id), ())
+               for llave in llaves}
+    return columnas, valores
+
+def unir_filas(cabecera, filas, lados, estadisticas):
+    """
+    Completa cada fila de sensores con los valores de cada lado de su
+    Llave_Comun. 'lados' es una lista de (rol, {Llave_Comun: tupla}, ancho).
+    """
+    idx_llave = list(cabecera).index('Llave_Comun')
+    for fila in filas:
+        llave = fila[idx_llave] if len(fila) > idx_llave else None
+        estadisticas['filas'] += 1
+        for rol, valores, ancho in lados:
+            encontrados = valores.get(llave) if llave else None
+            if encontrados is None:
+                fila.extend([None] * ancho)
+            else:
+                fila.extend(encontrados)
+                estadisticas[f"con_{rol}"] += 1
+        yield fila
+
+def _leer_salida(ruta):
+    """Cabecera y filas de una salida: ruta de CSV/carpeta o (ruta_db, tabla) de SQLite."""
+    if isinstance(ruta, tuple):
+        return leer_tabla_sqlite(*ruta)
+    return leer_salida_consolidada(ruta)
+
+def filas_tabla_unificada(salidas, estadisticas):
+    """
+    Genera la cabecera y las filas de la tabla unificada a partir de
+    'salidas' ({nombre_proceso: ruta de su CSV o carpeta particionada, o
+    (ruta_db, tabla) con destino SQLite}).
+    Primero reduce presión y compresores y después recorre los sensores.
+    Una salida de sensores con otra cabecera que la primera se omite.
+    """
+    tablas = {rol: {} for rol in COLUMNAS_UNION_POR_ROL}
+    columna_de_rol = dict(ROLES_UNION)
+    sensores = []
+    for nombre_proceso, ruta in salidas.items():
+        filas = _leer_salida(ruta)
+        try:
+            cabecera = next(filas, None)
+            rol = rol_de_cabecera(cabecera)
+            if rol == 'sensores':
+                sensores.append((nombre_proceso, ruta, cabecera))
+            elif rol in tablas:
+                cabecera_lado, filas_lado = cabecera, filas
+                if es_salida_transiciones(cabecera):
+                    # Salida por cambios de estado: se vuelve a un valor por intervalo
+                    cabecera_lado, filas_lado = expandir_transiciones(cabecera, filas)
+                reducir_por_llave(cabecera_lado, filas_lado, COLUMNAS_UNION_POR_ROL[rol], tablas[rol],
+                                  columna_de_rol[rol])
+            else:
+                print(f"   ADVERTENCIA: {nombre_proceso} no es una salida de sensores, presión ni "
+                      "compresores. No se incluye en la tabla unificada.")
+        finally:
+            filas.close()
+
+    lados, columnas_lados = [], []
+    for rol in list(tablas):
+        estadisticas[f"identificadores_{rol}"] = len(tablas[rol])
+        columnas, valores = valores_por_llave(tablas.pop(rol), COLUMNAS_UNION_POR_ROL[rol], columna_de_rol[rol])
+        estadisticas[f"llaves_{rol}"] = len(valores)
+        estadisticas[f"con_{rol}"] = 0
+        lados.append((rol, valores, len(columnas)))
+        columnas_lados.extend(columnas)
+    estadisticas['filas'] = 0
+    if not sensores:
+        print("   ADVERTENCIA: No hay salidas de sensores para la tabla unificada.")
+        return
+
+    cabecera = sensores[0][2]
+    yield list(cabecera) + columnas_lados
+
+    for nombre_proceso, ruta, cabecera_grupo in sensores:
+        if cabecera_grupo != cabecera:
+            print(f"   ADVERTENCIA: La cabecera de {nombre_proceso} no coincide con la de "
+                  f"{sensores[0][0]}. No se incluye en la tabla unificada.")
+            continue
+        filas = _leer_salida(ruta)
+        try:
+            next(filas, None)
+            yield from unir_filas(cabecera, filas, lados, estadisticas)
+        finally:
+            filas.close()
+
+def resumen_union(estadisticas):
+    """Línea de consola con la cobertura de la unión."""
+    filas = estadisticas.get('filas', 0)
+    partes = []
+    for rol in COLUMNAS_UNION_POR_ROL:
+        con = estadisticas.get(f"con_{rol}", 0)
+        porcentaje = f" ({100 * con / filas:.1f} %)" if filas else ""
+        partes.append(f"con {rol}: {con}{porcentaje} de {estadisticas.get(f'llaves_{rol}', 0)} intervalos")
+    return f"Tabla unificada: {filas} filas de sensores; " + "; ".join(partes)
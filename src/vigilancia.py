@@ -0,0 +1,89 @@
+# src/vigilancia.py
+"""
+Detección de archivos listos para el modo servicio (run_etl.py --vigilar).
+
+Se sondean las carpetas INPUT con os.scandir (tamaño y fecha de modificación
+salen del mismo listado, sin abrir los archivos). Un Excel está listo cuando:
+  - no es un bloqueo de Excel (~$...),
+  - su tamaño y fecha no cambiaron durante 'segundos_estable' segundos, y
+  - el .xlsx está completo (el zip tiene su directorio central al final), lo que
+    descarta copias a medias aunque la copia se haya pausado.
+"""
+import os
+import time
+import zipfile
+from src.extract import es_archivo_por_procesar
+
+def escanear_carpeta(carpeta):
+    """{ruta: (tamano, mtime)} de los Excel por procesar de la carpeta."""
+    firmas = {}
+    try:
+        with os.scandir(carpeta) as entradas:
+            for entrada in entradas:
+                if not es_archivo_por_procesar(entrada.name):
+                    continue
+                try:
+                    info = entrada.stat()
+                except OSError:
+                    continue  # Se borró o movió entre el listado y el stat
+                if entrada.is_file():
+                    firmas[entrada.path] = (info.st_size, info.st_mtime)
+    except OSError as e:
+        print(f"ADVERTENCIA: No se pudo leer la carpeta {carpeta}: {e}")
+    return firmas
+
+def actualizar_seguimiento(seguimiento, firmas, ahora=None):
+    """
+    Actualiza 'seguimiento' ({ruta: {'firma', 'estable_desde', 'visto'}}) con un
+    nuevo escaneo. Si la firma cambió, el reloj de estabilidad vuelve a cero.
+    Los archivos que desaparecieron dejan de seguirse.
+    """
+    ahora = time.time() if ahora is None else ahora
+    for ruta in list(seguimiento):
+        if ruta not in firmas:
+            del seguimiento[ruta]
+    for ruta, firma in firmas.items():
+        estado = seguimiento.get(ruta)
+        if estado is None:
+            seguimiento[ruta] = {'firma': firma, 'estable_desde': ahora, 'visto': ahora}
+        elif estado['firma'] != firma:
+            estado['firma'] = firma
+            estado['estable_desde'] = ahora
+            estado.pop('avisado', None)
+
+def xlsx_completo(ruta):
+    """True si el archivo se puede abrir y es un zip íntegro (copia terminada)."""
+    try:
+        with open(ruta, 'rb'):
+            pass
+        return zipfile.is_zipfile(ruta)
+    except OSError:
+        return False  # En Windows, un archivo que aún se está copiando está bloqueado
+
+def archivos_listos(seguimiento, segundos_estable, ahora=None):
+    """
+    Rutas estables y completas, en el orden en que aparecieron. Un archivo ya
+    entregado no se vuelve a entregar mientras no cambie (p. ej. uno SALTADO
+    que quedó en la carpeta de entrada).
+    """
+    ahora = time.time() if ahora is None else ahora
+    listos = []
+    for ruta, estado in sorted(seguimiento.items(), key=lambda par: (par[1]['visto'], par[0])):
+        if estado.get('entregado') == estado['firma']:
+            continue
+        estable = ahora - estado['estable_desde']
+        if estable < segundos_estable:
+            continue
+        if xlsx_completo(ruta):
+            listos.append(ruta)
+        elif estable >= 10 * segundos_estable and not estado.get('avisado'):
+            estado['avisado'] = True
+            print(f"ADVERTENCIA: {os.path.basename(ruta)} no cambia hace {estable:.0f} s pero no es "
+                  f"un .xlsx completo (¿copia interrumpida?). Se espera a que se reemplace.")
+    return listos
+
+def marcar_entregados(seguimiento, rutas):
+    """Recuerda la firma con la que se entregó cada archivo al ETL."""
+    for ruta in rutas:
+        if ruta in seguimiento:
+            seguimiento[ruta]['entregado'] = seguimiento[ruta]['firma']
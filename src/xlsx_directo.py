@@ -0,0 +1,305 @@
+# src/xlsx_directo.py
+"""
+Lector mínimo de .xlsx con la librería estándar (zipfile + iterparse).
+
+Pensado para los exportes Sitrad de una sola hoja: entrega tuplas de valores
+por fila, igual que openpyxl con read_only=True, data_only=True y
+values_only=True, pero sin crear objetos de celda. Las reglas de fechas
+(estilos de fecha, época 1900/1904, redondeo a milisegundos) replican las de
+openpyxl para que ambos lectores den los mismos valores.
+"""
+import re
+import zipfile
+import posixpath
+from datetime import datetime, time, timedelta
+from xml.etree.ElementTree import iterparse
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL_DOC = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_REL_PKG = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+TAG_ROW = f"{{{NS_MAIN}}}row"
+TAG_C = f"{{{NS_MAIN}}}c"
+TAG_V = f"{{{NS_MAIN}}}v"
+TAG_IS = f"{{{NS_MAIN}}}is"
+TAG_T = f"{{{NS_MAIN}}}t"
+TAG_R = f"{{{NS_MAIN}}}r"
+TAG_SI = f"{{{NS_MAIN}}}si"
+TAG_DIMENSION = f"{{{NS_MAIN}}}dimension"
+TAG_SHEET_DATA = f"{{{NS_MAIN}}}sheetData"
+
+EPOCA_WINDOWS = datetime(1899, 12, 30)
+EPOCA_MAC_1904 = datetime(1904, 1, 1)
+SEGUNDOS_POR_DIA = 86400
+
+# Formatos numéricos integrados que openpyxl reconoce como fecha / duración
+FORMATOS_FECHA_INTEGRADOS = {14, 15, 16, 17, 18, 19, 20, 21, 22, 45, 46, 47}
+FORMATOS_DURACION_INTEGRADOS = {46}
+
+# Mismas expresiones que openpyxl.styles.numbers para formatos personalizados
+_RE_LITERALES = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+_RE_FECHA = re.compile(r"(?<![_\\])[dmhysDMHYS]")
+_RE_DURACION = re.compile(r'\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?', re.I)
+
+def es_formato_fecha(codigo):
+    if codigo is None:
+        return False
+    return _RE_FECHA.search(_RE_LITERALES.sub("", codigo.split(";")[0])) is not None
+
+def es_formato_duracion(codigo):
+    if codigo is None:
+        return False
+    return _RE_DURACION.search(codigo.split(";")[0]) is not None
+
+def desde_serial_excel(valor, epoca=EPOCA_WINDOWS, duracion=False):
+    """Serial de Excel -> datetime/time/timedelta (misma regla que openpyxl.from_excel)."""
+    if duracion:
+        td = timedelta(days=valor)
+        if td.microseconds:
+            td = timedelta(seconds=td.total_seconds() // 1, microseconds=round(td.microseconds, -3))
+        return td
+
+    dia, fraccion = divmod(valor, 1)
+    diff = timedelta(milliseconds=round(fraccion * SEGUNDOS_POR_DIA * 1000))
+    if 0 <= valor < 1 and diff.days == 0:
+        minutos, segundos = divmod(diff.seconds, 60)
+        horas, minutos = divmod(minutos, 60)
+        return time(horas, minutos, segundos, diff.microseconds)
+    if 0 < valor < 60 and epoca == EPOCA_WINDOWS:
+        dia += 1
+    return epoca + timedelta(days=dia) + diff
+
+def _texto_de(elemento):
+    """Texto de un <si>/<is>: <t> directo más los <t> de cada tramo <r> (sin fonética)."""
+    partes = []
+    t = elemento.find(TAG_T)
+    if t is not None and t.text:
+        partes.append(t.text)
+    for tramo in elemento.findall(TAG_R):
+        t = tramo.find(TAG_T)
+        if t is not None and t.text:
+            partes.append(t.text)
+    return "".join(partes)
+
+def _leer_relaciones(zf, ruta):
+    """{Id: ruta_destino_absoluta} y {Type: ruta} de un archivo .rels."""
+    por_id, por_tipo = {}, {}
+    if ruta not in zf.namelist():
+        return por_id, por_tipo
+    base = posixpath.dirname(posixpath.dirname(ruta))
+    with zf.open(ruta) as f:
+        for _, elem in iterparse(f):
+            if elem.tag == f"{{{NS_REL_PKG}}}Relationship":
+                destino = elem.get('Target', '')
+                destino = destino.lstrip('/') if destino.startswith('/') else posixpath.normpath(posixpath.join(base, destino))
+                por_id[elem.get('Id')] = destino
+                por_tipo[elem.get('Type', '').rsplit('/', 1)[-1]] = destino
+    return por_id, por_tipo
+
+def _leer_libro(zf):
+    """Ruta de la hoja activa, ruta de sharedStrings, ruta de styles y época."""
+    _, raiz = _leer_relaciones(zf, "_rels/.rels")
+    ruta_libro = raiz.get('officeDocument', "xl/workbook.xml")
+    rels_id, rels_tipo = _leer_relaciones(
+        zf, posixpath.join(posixpath.dirname(ruta_libro), "_rels", posixpath.basename(ruta_libro) + ".rels"))
+
+    hojas, pestana_activa, epoca = [], 0, EPOCA_WINDOWS
+    with zf.open(ruta_libro) as f:
+        for _, elem in iterparse(f):
+            etiqueta = elem.tag.rsplit('}', 1)[-1]
+            if etiqueta == 'sheet':
+                hojas.append(rels_id.get(elem.get(f"{{{NS_REL_DOC}}}id")))
+            elif etiqueta == 'workbookView' and elem.get('activeTab'):
+                pestana_activa = int(elem.get('activeTab'))
+            elif etiqueta == 'workbookPr' and elem.get('date1904') in ('1', 'true'):
+                epoca = EPOCA_MAC_1904
+
+    hoja = hojas[pestana_activa] if pestana_activa < len(hojas) else (hojas[0] if hojas else None)
+    return hoja, rels_tipo.get('sharedStrings'), rels_tipo.get('styles'), epoca
+
+def _leer_textos_compartidos(zf, ruta):
+    textos = []
+    if not ruta or ruta not in zf.namelist():
+        return textos
+    with zf.open(ruta) as f:
+        for _, elem in iterparse(f):
+            if elem.tag == TAG_SI:
+                textos.append(_texto_de(elem).replace('x005F_', ''))
+                elem.clear()
+    return textos
+
+def _leer_estilos_fecha(zf, ruta):
+    """Índices de estilo (atributo s de la celda) que son fecha y los que son duración."""
+    fechas, duraciones = set(), set()
+    if not ruta or ruta not in zf.namelist():
+        return fechas, duraciones
+    personalizados, en_cell_xfs, indice = {}, False, 0
+    with zf.open(ruta) as f:
+        for evento, elem in iterparse(f, events=('start', 'end')):
+            etiqueta = elem.tag.rsplit('}', 1)[-1]
+            if evento == 'start':
+                if etiqueta == 'cellXfs':
+                    en_cell_xfs = True
+                elif etiqueta == 'xf' and en_cell_xfs:
+                    num_fmt = int(elem.get('numFmtId', 0))
+                    if num_fmt in personalizados:
+                        codigo = personalizados[num_fmt]
+                        es_fecha, es_duracion = es_formato_fecha(codigo), es_formato_duracion(codigo)
+                    else:
+                        es_fecha = num_fmt in FORMATOS_FECHA_INTEGRADOS
+                        es_duracion = num_fmt in FORMATOS_DURACION_INTEGRADOS
+                    if es_fecha:
+                        fechas.add(indice)
+                    if es_duracion:
+                        duraciones.add(indice)
+                    indice += 1
+            elif etiqueta == 'numFmt':
+                personalizados[int(elem.get('numFmtId'))] = elem.get('formatCode')
+            elif etiqueta == 'cellXfs':
+                en_cell_xfs = False
+    return fechas, duraciones
+
+def _indice_columna(letras, _cache={}):
+    indice = _cache.get(letras)
+    if indice is None:
+        indice = 0
+        for letra in letras:
+            indice = indice * 26 + (ord(letra) - 64)
+        _cache[letras] = indice
+    return indice
+
+def _ancho_dimension(ref):
+    """Última columna del rango <dimension ref="A1:K200">, o None."""
+    if not ref:
+        return None
+    fin = ref.split(':')[-1].rstrip('0123456789')
+    return _indice_columna(fin) if fin.isalpha() else None
+
+def iterar_filas_xlsx(filepath):
+    """
+    Genera (numero_fila, tupla_de_valores) por cada <row> de la hoja activa.
+    Las filas tienen el ancho de la dimensión de la hoja (como openpyxl) y las
+    celdas ausentes son None. Las filas que no existen en el XML no se generan.
+    El archivo se cierra al agotarse el generador o al llamar a close().
+    """
+    with zipfile.ZipFile(filepath) as zf:
+        ruta_hoja, ruta_textos, ruta_estilos, epoca = _leer_libro(zf)
+        textos = _leer_textos_compartidos(zf, ruta_textos)
+        estilos_fecha, estilos_duracion = _leer_estilos_fecha(zf, ruta_estilos)
+
+        ancho = None
+        contenedor = None
+        numero_fila = 0
+        with zf.open(ruta_hoja) as f:
+            for evento, elem in iterparse(f, events=('start', 'end')):
+                if evento == 'start':
+                    if elem.tag == TAG_SHEET_DATA:
+                        contenedor = elem
+                    continue
+                if elem.tag == TAG_DIMENSION:
+                    ancho = _ancho_dimension(elem.get('ref'))
+                    continue
+                if elem.tag != TAG_ROW:
+                    continue
+
+                numero_fila = int(elem.get('r') or numero_fila + 1)
+                celdas = []
+                columna = 0
+                for c in elem.iter(TAG_C):
+                    ref = c.get('r')
+                    columna = _indice_columna(ref.rstrip('0123456789')) if ref else columna + 1
+                    tipo = c.get('t', 'n')
+
+                    if tipo == 'inlineStr':
+                        nodo = c.find(TAG_IS)
+                        valor = _texto_de(nodo) if nodo is not None else None
+                    else:
+                        valor = c.findtext(TAG_V) or None
+                        if valor is not None:
+                            if tipo == 'n':
+                                valor = float(valor) if ('.' in valor or 'E' in valor or 'e' in valor) else int(valor)
+                                estilo = int(c.get('s', 0))
+                                if estilo in estilos_fecha:
+                                    try:
+                                        valor = desde_serial_excel(valor, epoca, estilo in estilos_duracion)
+                                    except (OverflowError, ValueError):
+                                        valor = "#VALUE!"
+                            elif tipo == 's':
+                                valor = textos[int(valor)]
+                            elif tipo == 'b':
+                                valor = bool(int(valor))
+                            elif tipo == 'd':
+                                valor = datetime.fromisoformat(valor.rstrip('Z'))
+                    celdas.append((columna, valor))
+
+                ancho_fila = ancho or (celdas[-1][0] if celdas else 0)
+                fila = [None] * ancho_fila
+                for columna, valor in celdas:
+                    if columna <= ancho_fila:
+                        fila[columna - 1] = valor
+
+                # La fila ya se consumió: se libera para que la memoria no crezca
+                if contenedor is not None:
+                    contenedor.clear()
+                else:
+                    elem.clear()
+                yield numero_fila, tuple(fila)
+
+def _textos_hasta(zf, ruta, indice_maximo):
+    """Los primeros textos compartidos, hasta 'indice_maximo' inclusive (no lee el resto)."""
+    textos = []
+    if indice_maximo < 0 or not ruta or ruta not in zf.namelist():
+        return textos
+    with zf.open(ruta) as f:
+        for _, elem in iterparse(f):
+            if elem.tag == TAG_SI:
+                textos.append(_texto_de(elem).replace('x005F_', ''))
+                elem.clear()
+                if len(textos) > indice_maximo:
+                    break
+    return textos
+
+def leer_encabezado_xlsx(filepath, hasta_fila):
+    """
+    Filas 1..hasta_fila de la hoja activa como {numero_fila: tupla}, leyendo
+    solo el comienzo de la hoja y de los textos compartidos (para identificar
+    un libro sin abrirlo completo). Los números quedan como en el XML: no se
+    aplican los estilos de fecha.
+    """
+    with zipfile.ZipFile(filepath) as zf:
+        ruta_hoja, ruta_textos, _, _ = _leer_libro(zf)
+        crudas = {}
+        numero_fila = 0
+        with zf.open(ruta_hoja) as f:
+            for _, elem in iterparse(f):
+                if elem.tag != TAG_ROW:
+                    continue
+                numero_fila = int(elem.get('r') or numero_fila + 1)
+                if numero_fila > hasta_fila:
+                    break
+                celdas = []
+                columna = 0
+                for c in elem.iter(TAG_C):
+                    ref = c.get('r')
+                    columna = _indice_columna(ref.rstrip('0123456789')) if ref else columna + 1
+                    tipo = c.get('t', 'n')
+                    if tipo == 'inlineStr':
+                        nodo = c.find(TAG_IS)
+                        celdas.append((columna, 'str', _texto_de(nodo) if nodo is not None else None))
+                    else:
+                        celdas.append((columna, tipo, c.findtext(TAG_V) or None))
+                crudas[numero_fila] = celdas
+                elem.clear()
+
+        indices = [int(v) for celdas in crudas.values() for _, tipo, v in celdas if tipo == 's' and v is not None]
+        textos = _textos_hasta(zf, ruta_textos, max(indices, default=-1))
+
+    filas = {}
+    for numero_fila, celdas in crudas.items():
+        fila = [None] * (celdas[-1][0] if celdas else 0)
+        for columna, tipo, valor in celdas:
+            if valor is not None and tipo == 's':
+                valor = textos[int(valor)] if int(valor) < len(textos) else None
+            fila[columna - 1] = valor
+        filas[numero_fila] = tuple(fila)
+    return filas
@@ -0,0 +1,75 @@
+# tests/conftest.py
+"""
+Utilidades comunes de las pruebas: una bandeja Sitrad sintética chica
+(benchmarks/generar_sitrad.py) con su config.json y la corrida de run_etl.main
+sobre ella.
+"""
+import os
+import csv
+import json
+import shutil
+import contextlib
+import io
+import pytest
+import run_etl
+from benchmarks.generar_sitrad import generar_bandeja
+
+FILAS_POR_LIBRO = 300
+GRUPOS = {
+    'PASILLOS': 'consol_pasillos.csv',
+    'PRESION': 'consol_presion.csv',
+    'COMPRESORES': 'consol_compresores.csv',
+}
+
+def escribir_config(carpeta, **extra):
+    """config.json con rutas absolutas dentro de 'carpeta' más las claves de 'extra'."""
+    config = {
+        'RUTAS_PROCESO': {grupo: {'INPUT': os.path.join(carpeta, 'Import', grupo), 'OUTPUT_NAME': nombre}
+                          for grupo, nombre in GRUPOS.items()},
+        'CARPETA_DESTINO_GENERAL': os.path.join(carpeta, 'Export'),
+        'CARPETA_ARCHIVADOS_GENERAL': os.path.join(carpeta, 'Archive'),
+    }
+    config.update(extra)
+    ruta = os.path.join(carpeta, 'config.json')
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+    return ruta
+
+def correr_etl(carpeta, *argumentos):
+    """
+    Ejecuta run_etl.main con el config.json de 'carpeta' sin mostrar la salida,
+    y devuelve lo que imprimió.
+    """
+    salida = io.StringIO()
+    with contextlib.redirect_stdout(salida):
+        run_etl.main(['--config', os.path.join(carpeta, 'config.json')] + list(argumentos))
+    return salida.getvalue()
+
+def leer_csv(ruta):
+    with open(ruta, 'r', newline='', encoding='utf-8') as f:
+        return list(csv.reader(f, delimiter=';'))
+
+def devolver_archivados(carpeta):
+    """Vuelve a poner en Import los Excel que la corrida archivó."""
+    for grupo in GRUPOS:
+        archivados = os.path.join(carpeta, 'Archive', grupo)
+        if not os.path.isdir(archivados):
+            continue
+        for raiz, _, archivos in os.walk(archivados):
+            for nombre in archivos:
+                if nombre.endswith('.xlsx'):
+                    shutil.move(os.path.join(raiz, nombre), os.path.join(carpeta, 'Import', grupo, nombre))
+
+@pytest.fixture(scope='session')
+def libros(tmp_path_factory):
+    """Libros generados una sola vez por sesión (se copian a cada prueba)."""
+    carpeta = tmp_path_factory.mktemp('libros')
+    generar_bandeja(str(carpeta), filas=FILAS_POR_LIBRO, archivos=2, semilla=7)
+    return carpeta
+
+@pytest.fixture
+def bandeja(libros, tmp_path):
+    """Carpeta con Import/<GRUPO>/*.xlsx y un config.json por defecto."""
+    shutil.copytree(os.path.join(libros, 'Import'), os.path.join(tmp_path, 'Import'))
+    escribir_config(str(tmp_path))
+    return str(tmp_path)
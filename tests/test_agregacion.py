@@ -0,0 +1,38 @@
+# tests/test_agregacion.py
+"""Agregación por 10 minutos y la llave de 23:55-23:59 en cada formato de Llave_Comun."""
+from datetime import datetime
+from src.config import CONFIGURACION_ARCHIVOS
+from src.agregacion import agregar_intervalos
+from src.transform import campos_de_tiempo, fecha_de_llave
+
+def _lectura(cabecera, momento, temperatura, formato_llave):
+    fila = [''] * len(cabecera)
+    anio, mes, dia, hora, llave = campos_de_tiempo(momento, formato_llave)
+    for columna, valor in (('Llave_Comun', llave), ('Pasillo', 'Pasillo 3'), ('Pasillo_est', 'P003'),
+                           ('Anio', anio), ('Mes', mes), ('Dia', dia), ('Hora_10min', hora),
+                           ('FechaHora_Original', momento.strftime('%Y-%m-%d %H:%M:%S')),
+                           ('Temp_Ambiente', temperatura)):
+        fila[cabecera.index(columna)] = valor
+    return fila
+
+def _agregadas(formato_llave):
+    cabecera = list(next(c for c in CONFIGURACION_ARCHIVOS if c['tipo'] == 'SENSOR_1')['output_schema'])
+    filas = [_lectura(cabecera, datetime(2026, 1, 2, 0, 2), '-20.0', formato_llave),
+             _lectura(cabecera, datetime(2026, 1, 2, 12, 0), '-19.0', formato_llave),
+             _lectura(cabecera, datetime(2026, 1, 2, 23, 59, 20), '-10.0', formato_llave)]
+    salida, agregadas = agregar_intervalos(cabecera, iter(filas))
+    return [dict(zip(salida, fila)) for fila in agregadas]
+
+def test_una_fila_por_llave_con_la_llave_historica():
+    agregadas = _agregadas('yyyymmddhhmm')
+    assert len(agregadas) == len({(f['Llave_Comun'], f['Pasillo']) for f in agregadas}) == 2
+    medianoche = next(f for f in agregadas if f['Llave_Comun'] == 202601020000)
+    assert medianoche['Lecturas'] == 2
+    assert medianoche['Temp_Ambiente_prom'] == -15.0
+
+def test_llave_en_minutos_lleva_23_55_al_dia_siguiente():
+    agregadas = _agregadas('minutos')
+    assert len(agregadas) == len({(f['Llave_Comun'], f['Pasillo']) for f in agregadas}) == 3
+    por_llave = {fecha_de_llave(f['Llave_Comun']): f for f in agregadas}
+    assert por_llave[(datetime(2026, 1, 2).date(), 0)]['Temp_Ambiente_prom'] == -20.0
+    assert por_llave[(datetime(2026, 1, 3).date(), 0)]['Temp_Ambiente_prom'] == -10.0
@@ -0,0 +1,30 @@
+# tests/test_decimales.py
+"""DECIMALES_SALIDA llega al CSV consolidado (las filas se leen de los shards como texto)."""
+import os
+import re
+from src.config import obtener_campos_numericos
+from src.load import formateador_decimales
+from tests.conftest import GRUPOS, correr_etl, escribir_config, leer_csv
+
+def test_formateador_acepta_texto_y_float():
+    formato = formateador_decimales(2)
+    assert formato(-21.5) == '-21.50'
+    assert formato('-18.0') == '-18.00'
+    assert formato('') == ''
+    assert formato('ON') == 'ON'
+
+def test_decimales_en_csv_consolidado(bandeja):
+    escribir_config(bandeja, DECIMALES_SALIDA=2)
+    correr_etl(bandeja)
+    dos_decimales = re.compile(r'^-?\d+\.\d{2}$')
+    revisados = 0
+    for nombre in GRUPOS.values():
+        filas = leer_csv(os.path.join(bandeja, 'Export', nombre))
+        cabecera = filas[0]
+        idx = [i for i, col in enumerate(cabecera) if col in obtener_campos_numericos(cabecera)]
+        for fila in filas[1:]:
+            for i in idx:
+                if fila[i]:
+                    assert dos_decimales.match(fila[i]), (nombre, cabecera[i], fila[i])
+                    revisados += 1
+    assert revisados
@@ -0,0 +1,25 @@
+# tests/test_extract.py
+"""Lectura de los Excel con los dos lectores."""
+from openpyxl import load_workbook
+from benchmarks.generar_sitrad import generar_libro
+from src.config import CONFIGURACION_ARCHIVOS
+from src.extract import LECTORES_EXCEL, leer_archivo_excel
+
+def test_fila_vacia_en_medio_no_corta_la_lectura(tmp_path):
+    config = next(c for c in CONFIGURACION_ARCHIVOS if c['tipo'] == 'SENSOR_1')
+    ruta = str(tmp_path / 'pasillo.xlsx')
+    generar_libro(ruta, config, config['nombres_internos'][0], 50)
+
+    # Un hueco de dos filas a mitad de los datos y celdas con formato pero sin valor al final
+    libro = load_workbook(ruta)
+    hoja = libro.active
+    hoja.insert_rows(config.get('data_start_row', 1) + 21, amount=2)
+    hoja.cell(row=hoja.max_row + 5, column=1).number_format = 'dd/mm/yyyy'
+    libro.save(ruta)
+
+    leidas = {}
+    for lector in LECTORES_EXCEL:
+        headers, filas, _ = leer_archivo_excel(ruta, lector=lector)
+        leidas[lector] = (headers, list(filas))
+    assert len(leidas['openpyxl'][1]) == 50
+    assert leidas['directo'] == leidas['openpyxl']
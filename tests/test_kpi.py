@@ -0,0 +1,61 @@
+# tests/test_kpi.py
+"""Estado de KPI con varios sensores que comparten Pasillo_est."""
+from src.config import CONFIGURACION_ARCHIVOS
+from src.kpi import actualizar_estado_kpi, estado_nuevo, filas_kpi
+
+PARAMETROS = {'tolerancia': 2.0, 'hueco_maximo_min': 10.0}
+
+def _cabecera_sensores():
+    return list(next(c for c in CONFIGURACION_ARCHIVOS if c['tipo'] == 'SENSOR_1')['output_schema'])
+
+def _lectura(cabecera, pasillo, momento, temperatura, desvio):
+    fila = [''] * len(cabecera)
+    for columna, valor in (('Pasillo', pasillo), ('Pasillo_est', 'P018'), ('FechaHora_Original', momento),
+                           ('Temp_Ambiente', temperatura), ('Desvio_Relativo', desvio)):
+        fila[cabecera.index(columna)] = valor
+    return fila
+
+def _lecturas_intercaladas(cabecera, minutos):
+    """Lecturas de dos sensores de P018 en los mismos minutos."""
+    filas = []
+    for minuto in minutos:
+        momento = f"2026-01-05 08:{minuto:02d}:00"
+        filas.append(_lectura(cabecera, 'Pasillo 18 RS 1', momento, '-20.0', '0.5'))
+        filas.append(_lectura(cabecera, 'Pasillo 18 RS 2', momento, '-18.0', '3.0'))
+    return filas
+
+def _tabla(estado):
+    filas = filas_kpi({'PASILLOS': estado})
+    cabecera = next(filas)
+    return [dict(zip(cabecera, fila)) for fila in filas]
+
+def test_sensores_de_un_mismo_pasillo_est_no_se_descartan():
+    cabecera = _cabecera_sensores()
+    estado = estado_nuevo(PARAMETROS)
+    estadisticas = {}
+    actualizar_estado_kpi(estado, iter([cabecera] + _lecturas_intercaladas(cabecera, range(5))),
+                          estadisticas=estadisticas)
+    assert estadisticas['nuevas'] == 10
+    assert estadisticas['descartadas'] == 0
+
+    (fila,) = _tabla(estado)
+    assert fila['Identificador'] == 'P018'
+    assert fila['Lecturas'] == 10
+    assert fila['Promedio'] == -19.0
+    # 4 intervalos de 1 minuto por sensor (la última lectura queda pendiente)
+    assert fila['Min_Observados'] == 8.0
+    assert fila['Min_Fuera_Tolerancia'] == 4.0
+
+def test_actualizar_en_dos_corridas_da_lo_mismo():
+    cabecera = _cabecera_sensores()
+    todo = estado_nuevo(PARAMETROS)
+    actualizar_estado_kpi(todo, iter([cabecera] + _lecturas_intercaladas(cabecera, range(10))))
+
+    partes = estado_nuevo(PARAMETROS)
+    actualizar_estado_kpi(partes, iter([cabecera] + _lecturas_intercaladas(cabecera, range(5))))
+    estadisticas = {}
+    # La segunda corrida repite el último minuto de la primera
+    actualizar_estado_kpi(partes, iter([cabecera] + _lecturas_intercaladas(cabecera, range(4, 10))),
+                          estadisticas=estadisticas)
+    assert estadisticas['descartadas'] == 2
+    assert _tabla(partes) == _tabla(todo)
@@ -0,0 +1,146 @@
+# tests/test_regresion.py
+"""
+Regresiones de la corrida completa: salida por defecto igual a la del código
+original, reproceso incremental sin duplicados y retoma desde el ledger de
+shards.
+
+tests/datos/linea_base/ tiene los CSV que escribe el run_etl.py del commit
+inicial (baseline) sobre los libros de preparar_linea_base. Se regeneran
+corriendo ese run_etl.py con el config.json de la carpeta como directorio de
+trabajo.
+"""
+import os
+import json
+import filecmp
+from datetime import datetime
+from benchmarks.generar_sitrad import generar_libro
+from src.config import CONFIGURACION_ARCHIVOS
+from src.load import guardar_marcas, ruta_indice_incremental
+from src.shards import ESTADO_LISTO, cargar_ledger, registrar_en_ledger
+from tests.conftest import GRUPOS, correr_etl, devolver_archivados
+
+CARPETA_LINEA_BASE = os.path.join(os.path.dirname(__file__), 'datos', 'linea_base')
+
+def preparar_linea_base(carpeta):
+    """
+    Un libro por configuración, cada uno en su propio grupo (así el orden en
+    que se listan los archivos no cambia la salida), y su config.json.
+    """
+    rutas = {}
+    for n, config in enumerate(CONFIGURACION_ARCHIVOS):
+        tipo = config['tipo']
+        generar_libro(os.path.join(carpeta, 'Import', tipo, f'{tipo.lower()}.xlsx'), config,
+                      config['nombres_internos'][0], 60, inicio=datetime(2026, 1, 1), semilla=n)
+        rutas[tipo] = {'INPUT': os.path.join(carpeta, 'Import', tipo), 'OUTPUT_NAME': f'consol_{tipo.lower()}.csv'}
+    with open(os.path.join(carpeta, 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump({'RUTAS_PROCESO': rutas,
+                   'CARPETA_DESTINO_GENERAL': os.path.join(carpeta, 'Export'),
+                   'CARPETA_ARCHIVADOS_GENERAL': os.path.join(carpeta, 'Archive')}, f)
+    return [r['OUTPUT_NAME'] for r in rutas.values()]
+
+def _salidas(carpeta):
+    return {nombre: open(os.path.join(carpeta, 'Export', nombre), 'rb').read() for nombre in GRUPOS.values()}
+
+def _cabecera_y_filas(contenido):
+    """Cabecera y filas ordenadas: los shards pendientes se consolidan en el orden del ledger."""
+    cabecera, *filas = contenido.splitlines()
+    return cabecera, sorted(filas)
+
+def test_salida_por_defecto_igual_a_linea_base(tmp_path):
+    carpeta = str(tmp_path)
+    nombres = preparar_linea_base(carpeta)
+    correr_etl(carpeta)
+    for nombre in nombres:
+        assert filecmp.cmp(os.path.join(carpeta, 'Export', nombre), os.path.join(CARPETA_LINEA_BASE, nombre),
+                           shallow=False), nombre
+
+def test_reproceso_incremental_no_agrega_filas(bandeja):
+    correr_etl(bandeja, '--incremental')
+    antes = _salidas(bandeja)
+
+    devolver_archivados(bandeja)
+    correr_etl(bandeja, '--incremental')
+    assert _salidas(bandeja) == antes
+
+def test_ledger_retoma_shards_pendientes(bandeja):
+    correr_etl(bandeja)
+    antes = _salidas(bandeja)
+
+    # Corte después de escribir los shards y antes de consolidar PASILLOS
+    carpeta_shards = os.path.join(bandeja, 'Archive', '_shards', 'PASILLOS')
+    ledger = cargar_ledger(carpeta_shards)
+    registrar_en_ledger(carpeta_shards, [{'hash': h, 'estado': ESTADO_LISTO, 'archivo': e.get('archivo')}
+                                         for h, e in ledger.items()])
+    os.remove(os.path.join(bandeja, 'Export', GRUPOS['PASILLOS']))
+
+    salida = correr_etl(bandeja)
+    assert salida.count('[PENDIENTE]') == len(ledger)
+    despues = _salidas(bandeja)
+    for nombre in GRUPOS.values():
+        assert _cabecera_y_filas(despues[nombre]) == _cabecera_y_filas(antes[nombre]), nombre
+    assert all(e['estado'] != ESTADO_LISTO for e in cargar_ledger(carpeta_shards).values())
+
+def test_shards_en_cache_no_reabren_el_excel(bandeja):
+    correr_etl(bandeja)
+    antes = _salidas(bandeja)
+
+    devolver_archivados(bandeja)
+    devueltos = sum(len(os.listdir(os.path.join(bandeja, 'Import', grupo))) for grupo in GRUPOS)
+    salida = correr_etl(bandeja)
+    assert '[OK]' not in salida
+    assert salida.count('[OK - CACHÉ]') == devueltos
+    assert _salidas(bandeja) == antes
+
+def _apartar(carpeta, sufijo):
+    """Saca de Import los libros cuyo nombre termina en 'sufijo' y devuelve cómo reponerlos."""
+    apartados = []
+    for grupo in GRUPOS:
+        for nombre in os.listdir(os.path.join(carpeta, 'Import', grupo)):
+            if nombre.endswith(sufijo):
+                origen = os.path.join(carpeta, 'Import', grupo, nombre)
+                os.rename(origen, origen + '.apartado')
+                apartados.append(origen)
+    return lambda: [os.rename(ruta + '.apartado', ruta) for ruta in apartados]
+
+def _libro_nuevo(carpeta, filas=40):
+    """Deposita en PASILLOS un libro con lecturas posteriores a las de la bandeja."""
+    config = next(c for c in CONFIGURACION_ARCHIVOS if c['tipo'] == 'SENSOR_1')
+    generar_libro(os.path.join(carpeta, 'Import', 'PASILLOS', 'nuevo.xlsx'), config,
+                  config['nombres_internos'][0], filas, inicio=datetime(2026, 3, 1), semilla=99)
+    return filas
+
+def test_incremental_despues_de_carga_completa_no_recorta(bandeja):
+    # Incremental con la mitad de los libros y completa con todos
+    reponer = _apartar(bandeja, '_001.xlsx')
+    correr_etl(bandeja, '--incremental')
+    reponer()
+    devolver_archivados(bandeja)
+    correr_etl(bandeja)
+    completa = _salidas(bandeja)[GRUPOS['PASILLOS']]
+
+    # La siguiente incremental anexa sobre lo que dejó la carga completa
+    nuevas = _libro_nuevo(bandeja)
+    salida = correr_etl(bandeja, '--incremental')
+    assert 'RECUPERACIÓN' not in salida
+    despues = _salidas(bandeja)[GRUPOS['PASILLOS']]
+    assert despues.startswith(completa)
+    assert len(despues.splitlines()) == len(completa.splitlines()) + nuevas
+
+def test_anexion_cortada_se_recorta(bandeja):
+    correr_etl(bandeja, '--incremental')
+    antes = _salidas(bandeja)[GRUPOS['PASILLOS']]
+
+    # Corte en medio de una anexión: índice marcado 'anexando' y media fila en el CSV
+    ruta = os.path.join(bandeja, 'Export', GRUPOS['PASILLOS'])
+    with open(ruta_indice_incremental(ruta), encoding='utf-8') as f:
+        marcas = json.load(f)['marcas']
+    guardar_marcas(ruta, marcas, anexando=True)
+    with open(ruta, 'ab') as f:
+        f.write(b'202601010000;Pasillo 1;P0')
+
+    nuevas = _libro_nuevo(bandeja)
+    salida = correr_etl(bandeja, '--incremental')
+    assert 'RECUPERACIÓN' in salida
+    despues = _salidas(bandeja)[GRUPOS['PASILLOS']]
+    assert despues.startswith(antes)
+    assert len(despues.splitlines()) == len(antes.splitlines()) + nuevas
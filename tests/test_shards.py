@@ -0,0 +1,43 @@
+# tests/test_shards.py
+"""Retención de shards consolidados."""
+import os
+from datetime import datetime, timedelta
+from src.shards import (ESTADO_CONSOLIDADO, ESTADO_LISTO, cargar_ledger, escribir_shard,
+                        purgar_shards_consolidados, registrar_en_ledger, ruta_ledger, ruta_shard)
+from tests.conftest import GRUPOS, correr_etl, devolver_archivados, escribir_config, leer_csv
+
+def _shard(carpeta, hash_archivo, estado):
+    escribir_shard(ruta_shard(carpeta, hash_archivo), ['Llave_Comun'], [['202601010000']])
+    registrar_en_ledger(carpeta, [{'hash': hash_archivo, 'estado': ESTADO_LISTO}])
+    if estado == ESTADO_CONSOLIDADO:
+        registrar_en_ledger(carpeta, [{'hash': hash_archivo, 'estado': ESTADO_CONSOLIDADO}])
+
+def test_purga_solo_consolidados_fuera_de_plazo(tmp_path):
+    carpeta = str(tmp_path)
+    _shard(carpeta, 'a' * 64, ESTADO_CONSOLIDADO)
+    _shard(carpeta, 'b' * 64, ESTADO_LISTO)
+
+    assert purgar_shards_consolidados(carpeta, 7)['shards_purgados'] == 0
+    resultado = purgar_shards_consolidados(carpeta, 7, ahora=datetime.now() + timedelta(days=8))
+    assert resultado['shards_purgados'] == 1
+    assert resultado['bytes_liberados'] > 0
+    assert not os.path.exists(ruta_shard(carpeta, 'a' * 64))
+    assert os.path.exists(ruta_shard(carpeta, 'b' * 64))
+
+    # El ledger queda compacto y conserva los dos hashes
+    with open(ruta_ledger(carpeta), encoding='utf-8') as f:
+        assert len(f.readlines()) == 2
+    ledger = cargar_ledger(carpeta)
+    assert ledger['a' * 64]['estado'] == ESTADO_CONSOLIDADO
+    assert ledger['b' * 64]['estado'] == ESTADO_LISTO
+
+def test_redeposito_tras_purgar_no_duplica_filas(bandeja):
+    escribir_config(bandeja, RETENCION_SHARDS_DIAS=0)
+    correr_etl(bandeja, '--incremental')
+    carpeta_shards = os.path.join(bandeja, 'Archive', '_shards', 'PASILLOS')
+    assert [n for n in os.listdir(carpeta_shards) if n.endswith('.csv')] == []
+    filas = {nombre: len(leer_csv(os.path.join(bandeja, 'Export', nombre))) for nombre in GRUPOS.values()}
+
+    devolver_archivados(bandeja)
+    correr_etl(bandeja, '--incremental')
+    assert {nombre: len(leer_csv(os.path.join(bandeja, 'Export', nombre))) for nombre in GRUPOS.values()} == filas
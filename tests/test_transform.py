@@ -0,0 +1,49 @@
+# tests/test_transform.py
+"""Campos de tiempo de la transformación (ruta rápida por texto, datetime y ruta lenta)."""
+from datetime import datetime
+from benchmarks.generar_sitrad import FORMATOS_FECHA_LIBRO, generar_libro
+from src.config import CONFIGURACION_ARCHIVOS
+from src.extract import leer_archivo_excel
+from src.transform import campos_de_tiempo, limpiar_y_estandarizar
+
+CONFIG = dict(next(c for c in CONFIGURACION_ARCHIVOS if c['tipo'] == 'SENSOR_1'), nombre_identificador='Pasillo 3')
+
+def _transformar(fechas, formato_llave='yyyymmddhhmm'):
+    headers = list(CONFIG['column_mapping'])
+    filas = [[fecha] + [None] * (len(headers) - 1) for fecha in fechas]
+    filas, schema = limpiar_y_estandarizar(headers, filas, CONFIG, formato_llave=formato_llave)
+    columnas = ('Anio', 'Mes', 'Dia', 'Hora_10min', 'Llave_Comun')
+    return [tuple(fila[schema.index(c)] for c in columnas) for fila in filas]
+
+def test_llave_de_23_55_igual_en_todas_las_rutas():
+    for formato_llave in ('yyyymmddhhmm', 'minutos'):
+        esperado = campos_de_tiempo(datetime(2026, 1, 2, 23, 57, 30), formato_llave)
+        # Texto con el formato detectado, datetime y texto en otro formato (ruta lenta)
+        obtenidos = _transformar(['02/01/2026 23:57:30', datetime(2026, 1, 2, 23, 57, 30),
+                                  '2026-01-02 23:57:30'], formato_llave)
+        assert obtenidos == [esperado[:4] + (str(esperado[4]),)] * 3
+
+def test_llave_en_minutos_de_23_55_es_el_dia_siguiente():
+    assert campos_de_tiempo(datetime(2026, 1, 2, 23, 55), 'minutos')[4] == \
+        campos_de_tiempo(datetime(2026, 1, 3, 0, 4), 'minutos')[4]
+    assert campos_de_tiempo(datetime(2026, 1, 2, 23, 55))[4] == 202601020000
+
+def test_textos_invalidos_se_descartan_igual_que_en_la_ruta_lenta():
+    # El primer texto fija el formato con segundos; el resto tiene ese mismo largo
+    invalidos = ['02/01/2026 10:05:99', '02/01/2026 10:05:x1', '02/01/2026 10:05 12', '02/01/2026 10:05:3Z']
+    obtenidos = _transformar(['02/01/2026 10:05:30'] + invalidos)
+    assert obtenidos[0] == (2026, 1, 2, '10:10', '202601021010')
+    assert obtenidos[1:] == [(None, None, None, None, None)] * len(invalidos)
+
+def test_cada_formato_de_fecha_del_generador_da_las_mismas_llaves(tmp_path):
+    llaves = {}
+    for formato_fecha in FORMATOS_FECHA_LIBRO:
+        ruta = str(tmp_path / f'{formato_fecha}.xlsx')
+        generar_libro(ruta, CONFIG, CONFIG['nombres_internos'][0], 30, formato_fecha=formato_fecha)
+        headers, filas, config = leer_archivo_excel(ruta)
+        filas, schema = limpiar_y_estandarizar(headers, filas, config)
+        llaves[formato_fecha] = [fila[schema.index('Llave_Comun')] for fila in filas]
+    assert all(llaves['datetime'])
+    # Sin segundos el redondeo puede caer en otro intervalo; con segundos coincide con datetime
+    assert llaves['iso'] == llaves['dmy_seg'] == llaves['datetime']
+    assert all(llaves['dmy']) and all(llaves['mixto'])
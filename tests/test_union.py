@@ -0,0 +1,43 @@
+# tests/test_union.py
+"""La tabla unificada no mezcla sistemas de presión ni módulos de compresores distintos."""
+from src.config import COLUMNAS_SALIDA_COMPRESORES, COLUMNAS_SALIDA_PRESION, COLUMNAS_SALIDA_SENSORES
+import src.union
+from src.union import filas_tabla_unificada
+
+LLAVE = '202601050800'
+
+def _fila(cabecera, **valores):
+    fila = [''] * len(cabecera)
+    for columna, valor in dict(valores, Llave_Comun=LLAVE, FechaHora_Original='2026-01-05 08:01:00').items():
+        fila[cabecera.index(columna)] = valor
+    return fila
+
+def _unir(monkeypatch, presion, compresores):
+    salidas = {'PASILLOS': [list(COLUMNAS_SALIDA_SENSORES),
+                            _fila(COLUMNAS_SALIDA_SENSORES, Pasillo='Pasillo 3', Pasillo_est='P003')],
+               'PRESION': [list(COLUMNAS_SALIDA_PRESION)] + presion,
+               'COMPRESORES': [list(COLUMNAS_SALIDA_COMPRESORES)] + compresores}
+    # Las salidas se leen de las listas en memoria en lugar de CSV
+    monkeypatch.setattr(src.union, '_leer_salida', lambda nombre: (fila for fila in salidas[nombre]))
+    filas = list(filas_tabla_unificada({nombre: nombre for nombre in salidas}, {}))
+    return dict(zip(filas[0], filas[1]))
+
+def test_un_sistema_conserva_los_nombres_de_columna(monkeypatch):
+    fila = _unir(monkeypatch,
+                 [_fila(COLUMNAS_SALIDA_PRESION, Sistema='Alta', Presion_Gas='10.0')],
+                 [_fila(COLUMNAS_SALIDA_COMPRESORES, Modulo='MOD1', G1_Comp1_Estado='Conectado')])
+    assert fila['Sistema'] == 'Alta'
+    assert fila['Presion_Gas'] == 10.0
+    assert fila['G1_Comp1_Estado'] == 'Conectado'
+
+def test_varios_sistemas_y_modulos_tienen_columnas_propias(monkeypatch):
+    fila = _unir(monkeypatch,
+                 [_fila(COLUMNAS_SALIDA_PRESION, Sistema='Alta', Presion_Gas='10.0'),
+                  _fila(COLUMNAS_SALIDA_PRESION, Sistema='Baja', Presion_Gas='2.0')],
+                 [_fila(COLUMNAS_SALIDA_COMPRESORES, Modulo='MOD1', G1_Comp1_Estado='Conectado'),
+                  _fila(COLUMNAS_SALIDA_COMPRESORES, Modulo='MOD2', G1_Comp1_Estado='Desconectado')])
+    assert 'Presion_Gas' not in fila
+    assert fila['Presion_Gas_Alta'] == 10.0
+    assert fila['Presion_Gas_Baja'] == 2.0
+    assert fila['G1_Comp1_Estado_MOD1'] == 'Conectado'
+    assert fila['G1_Comp1_Estado_MOD2'] == 'Desconectado'